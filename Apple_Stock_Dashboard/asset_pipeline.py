@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # brotli là tùy chọn: thiếu thì chỉ tạo bản .gz
+    brotli = None
+
+HASH_LENGTH = 10
+MANIFEST_FILE = 'asset-manifest.json'
+
+# Các file được đổi tên theo mã băm (plotly-<phiên bản>.min.js đã có phiên bản trong tên nên giữ nguyên)
+FINGERPRINT_EXTENSIONS = ('.png', '.jpg', '.webp', '.svg', '.html', '.json')
+# Các file văn bản được nén sẵn thành .gz/.br để nginx trả thẳng (gzip_static)
+COMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.xml', '.txt')
+MIN_COMPRESS_BYTES = 256
+GZIP_LEVEL = 9
+# brotli mức 11 chậm hơn mức 9 hơn 20 lần (plotly.js 4.8 MB: 19 s so với 0.8 s) mà chỉ nhỏ hơn khoảng 10%:
+# file lớn dùng mức 9 để build không bị chặn ở bước nén
+BROTLI_QUALITY = 11
+BROTLI_LARGE_QUALITY = 9
+BROTLI_LARGE_BYTES = 1 << 20
+
+_HASHED_NAME = re.compile(rf"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<ext>\.[^.]+)$")
+
+
+def hashed_name(filename, data):
+    """
+    'chart.png' + nội dung -> 'chart.<sha256[:10]>.png'.
+    """
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def logical_name(filename):
+    """
+    Bỏ mã băm khỏi tên file ('chart.<hash>.png' -> 'chart.png'); trả về None nếu tên không có mã băm.
+    """
+    match = _HASHED_NAME.match(filename)
+    return f"{match['stem']}{match['ext']}" if match else None
+
+
+def remove_stale_versions(directory, filename, keep):
+    """
+    Xóa các bản có mã băm cũ của `filename` trong thư mục (trừ `keep`); bản nén của chúng
+    được precompress_site dọn sau.
+    """
+    for existing in os.listdir(directory):
+        if existing != keep and logical_name(existing) == filename:
+            os.remove(os.path.join(directory, existing))
+
+
+def fingerprint_file(path):
+    """
+    Tạo bản sao <tên>.<mã băm><đuôi> cạnh file gốc (file gốc giữ nguyên để cache build vẫn dùng được)
+    và xóa các bản băm cũ. Trả về đường dẫn bản sao.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    directory, filename = os.path.split(path)
+    name = hashed_name(filename, data)
+    target = os.path.join(directory, name)
+    if not os.path.exists(target):
+        shutil.copyfile(path, target + '.tmp')
+        os.replace(target + '.tmp', target)
+    remove_stale_versions(directory, filename, keep=name)
+    return target
+
+
+def fingerprint_outputs(site_dir, dir_names):
+    """
+    Đổi tên theo mã băm mọi file biểu đồ trong các thư mục con `dir_names` của site_dir và ghi
+    asset-manifest.json ánh xạ tên logic -> tên đã băm (đường dẫn tương đối, dùng '/').
+    File chỉ có bản đã băm (vd: CSS/JS trong assets/) được ghi nguyên tên. Trả về manifest.
+    """
+    manifest = {}
+    for dir_name in dir_names:
+        directory = os.path.join(site_dir, dir_name)
+        if not os.path.isdir(directory):
+            continue
+        names = sorted(os.listdir(directory))
+        for name in names:
+            path = os.path.join(directory, name)
+            if (not os.path.isfile(path) or logical_name(name) is not None
+                    or not name.endswith(FINGERPRINT_EXTENSIONS)):
+                continue
+            manifest[f"{dir_name}/{name}"] = f"{dir_name}/{os.path.basename(fingerprint_file(path))}"
+        for name in names:
+            logical = logical_name(name)
+            if logical and f"{dir_name}/{logical}" not in manifest and os.path.exists(os.path.join(directory, name)):
+                manifest[f"{dir_name}/{logical}"] = f"{dir_name}/{name}"
+
+    path = os.path.join(site_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+    return manifest
+
+
+def _brotli_quality(size):
+    return BROTLI_LARGE_QUALITY if size >= BROTLI_LARGE_BYTES else BROTLI_QUALITY
+
+
+def _compress_file(path, data, suffix, level, compress, cache_dir=None, used=None):
+    """
+    Ghi bản nén path+suffix nếu chưa có hoặc cũ hơn file gốc. Với cache_dir, bản nén được lưu theo
+    mã băm nội dung + mức nén nên file có nội dung đã gặp (vd: plotly.js, biểu đồ không đổi nhưng
+    được ghi lại) chỉ cần chép. Trả về kích thước bản nén.
+    """
+    target = path + suffix
+    cached = None
+    if cache_dir is not None:
+        cached = os.path.join(cache_dir, f"{hashlib.sha256(data).hexdigest()[:32]}.{level}{suffix}")
+        used.add(os.path.basename(cached))
+    if os.path.exists(target) and os.stat(target).st_mtime_ns >= os.stat(path).st_mtime_ns:
+        if cached is not None and not os.path.exists(cached):
+            shutil.copyfile(target, cached)
+        return os.path.getsize(target)
+    if cached is not None and os.path.exists(cached):
+        shutil.copyfile(cached, target + '.tmp')
+        os.replace(target + '.tmp', target)
+        return os.path.getsize(target)
+
+    compressed = compress(data)
+    with open(target + '.tmp', 'wb') as f:
+        f.write(compressed)
+    os.replace(target + '.tmp', target)
+    if cached is not None:
+        shutil.copyfile(target, cached + '.tmp')
+        os.replace(cached + '.tmp', cached)
+    return len(compressed)
+
+
+def _iter_files(site_dir, targets):
+    """
+    Liệt kê các file trong `targets`, bỏ qua thư mục ẩn (vd: .build_cache của từng mã) và file gốc
+    đã có bản băm cạnh nó cùng bản nén của nó (trang chỉ tham chiếu bản băm).
+    """
+    for target in targets:
+        path = os.path.join(site_dir, target)
+        if os.path.isfile(path):
+            yield path
+        elif os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+                fingerprinted = {logical_name(name) for name in files} - {None}
+                for name in sorted(files):
+                    base = name[:-3] if name.endswith(('.gz', '.br')) else name
+                    if base not in fingerprinted:
+                        yield os.path.join(root, name)
+
+
+def precompress_site(site_dir, targets, cache_dir=None):
+    """
+    Tạo bản .gz (và .br nếu có thư viện brotli) cạnh mọi file văn bản trong `targets`
+    (file hoặc thư mục, tương đối với site_dir). Bản nén còn mới được giữ nguyên; bản nén
+    không còn file gốc bị xóa. Với cache_dir, bản nén được dùng lại theo nội dung file và các bản
+    không còn file nào dùng tới bị dọn. Trả về thống kê {'files', 'bytes', 'gzip_bytes', 'brotli_bytes'}.
+    """
+    stats = {'files': 0, 'bytes': 0, 'gzip_bytes': 0, 'brotli_bytes': 0}
+    used = set()
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    for path in _iter_files(site_dir, targets):
+        if path.endswith(('.gz', '.br')):
+            if not os.path.exists(path[:-3]):
+                os.remove(path)
+            continue
+        if not path.endswith(COMPRESS_EXTENSIONS) or os.path.getsize(path) < MIN_COMPRESS_BYTES:
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        stats['files'] += 1
+        stats['bytes'] += len(data)
+        stats['gzip_bytes'] += _compress_file(path, data, '.gz', GZIP_LEVEL,
+                                              lambda data: gzip.compress(data, GZIP_LEVEL, mtime=0),
+                                              cache_dir, used)
+        if brotli is not None:
+            quality = _brotli_quality(len(data))
+            stats['brotli_bytes'] += _compress_file(path, data, '.br', quality,
+                                                    lambda data: brotli.compress(data, quality=quality),
+                                                    cache_dir, used)
+
+    if cache_dir is not None:
+        for name in os.listdir(cache_dir):
+            if name not in used:
+                os.remove(os.path.join(cache_dir, name))
+    return stats
+
+
+def export_site(site_dir, targets, export_dir):
+    """
+    Chép các file cần xuất bản trong `targets` (kèm bản .gz/.br) sang export_dir, giữ nguyên đường dẫn
+    tương đối. File gốc đã có bản băm và thư mục ẩn (cache build) không được chép, để ảnh Docker chỉ
+    chứa những gì trang web tham chiếu. Trả về số file đã chép.
+    """
+    paths = set()
+    for path in _iter_files(site_dir, targets):
+        paths.add(path)
+        for suffix in ('.gz', '.br'):
+            if os.path.isfile(path + suffix):
+                paths.add(path + suffix)
+
+    for path in sorted(paths):
+        target = os.path.join(export_dir, os.path.relpath(path, site_dir))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(path, target)
+    return len(paths)
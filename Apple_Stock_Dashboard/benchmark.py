@@ -0,0 +1,225 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import build_website
+import chart_scheduler
+import synthetic_data
+
+NEWS_TEXT = ("Apple announces new iPhone MacBook Vision Pro developer tools Swift Xcode "
+             "App Store WWDC revenue growth services privacy silicon ") * 20
+
+# Thời gian khởi động tối đa (giây, gồm cả trình thông dịch) của CLI build_website.py trước khi vào một bước:
+# --help và lệnh 'pages' chỉ cần mức này vì thư viện nặng được nạp trễ trong bước cần đến chúng
+STARTUP_BUDGET_SECONDS = 0.5
+# Các thư viện không được nạp khi chỉ import build_website
+HEAVY_MODULES = ['numpy', 'pandas', 'matplotlib', 'seaborn', 'plotly', 'wordcloud', 'kagglehub', 'requests']
+# Mã chạy trong một tiến trình Python mới để đo chi phí khởi động của từng lệnh
+STARTUP_PROBES = {
+    'python (trống)': 'pass',
+    'cli (--help, pages)': 'import build_website',
+    'process': 'import build_website, frame_cache, indicators, rollup_store, stream_aggregates',
+    'charts': ('import build_website, frame_cache, indicators, rollup_store, stream_aggregates, sketches, '
+               'matplotlib.pyplot, seaborn, plotly.express, wordcloud'),
+}
+
+
+def _quiet(func, *args, **kwargs):
+    # Tắt các dòng print của pipeline để không làm nhiễu kết quả đo
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def time_call(func, repeat, *args, **kwargs):
+    """
+    Chạy func `repeat` lần, trả về (danh sách thời gian, kết quả lần chạy cuối).
+    """
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = _quiet(func, *args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def _entry(rows, tickers, stage, timings):
+    best = min(timings)
+    return {
+        'rows': rows,
+        'tickers': tickers,
+        'stage': stage,
+        'seconds_min': round(best, 4),
+        'seconds_median': round(statistics.median(timings), 4),
+        'rows_per_second': round(rows / best, 1) if best > 0 else None,
+    }
+
+
+def benchmark_dataset(rows, tickers, repeat, out_dir, seed=0):
+    generated = synthetic_data.effective_tickers(rows, tickers)
+    if generated != tickers:
+        print(f"ℹ {rows:,} dòng vượt quá {synthetic_data.MAX_DAILY_ROWS:,} phiên mỗi mã: "
+              f"dữ liệu được chia cho {generated} mã thay vì {tickers}.")
+        tickers = generated
+    csv_path = synthetic_data.ensure_synthetic_csv(os.path.join(out_dir, 'data'), rows, tickers, seed)
+    run_dir = os.path.join(out_dir, f"run_{rows}_{tickers}")
+    static_dir = os.path.join(run_dir, 'charts_static')
+    interactive_dir = os.path.join(run_dir, 'charts_interactive')
+    os.makedirs(static_dir, exist_ok=True)
+    os.makedirs(interactive_dir, exist_ok=True)
+
+    print(f"▶ Benchmark {rows:,} dòng / {tickers} mã")
+    results = []
+
+    timings, df = time_call(build_website.process_stock_data, repeat, csv_path)
+    results.append(_entry(rows, tickers, 'process_stock_data', timings))
+
+    timings, _ = time_call(build_website.process_stock_data_chunked, repeat, csv_path,
+                           chunksize=200_000, keep_frame=False)
+    results.append(_entry(rows, tickers, 'process_stock_data_chunked', timings))
+
+    if tickers > 1:
+        # Nhiều mã: đo đúng đường build thật (một dashboard cho mỗi mã, chạy song song) thay vì vẽ một
+        # dashboard từ frame gộp, nơi ngày của các mã đan xen nhau và không còn tăng dần
+        timings, partitions = time_call(build_website.partition_by_ticker, repeat, df)
+        results.append(_entry(rows, tickers, 'partition_by_ticker', timings))
+        timings, _ = time_call(build_website.build_multi_ticker_site, repeat, df, NEWS_TEXT, run_dir, use_cache=False)
+        results.append(_entry(rows, tickers, 'build_multi_ticker_site', timings))
+        for ticker, df_ticker in partitions.items():
+            timings, _ = time_call(build_website.get_chart_jobs, repeat, df_ticker, None, static_dir, interactive_dir)
+            results.append(_entry(len(df_ticker), 1, f'get_chart_jobs[{ticker}]', timings))
+        return results
+
+    bundle_name = _quiet(build_website.write_plotly_bundle, interactive_dir)
+    timings, jobs = time_call(build_website.get_chart_jobs, repeat, df, NEWS_TEXT, static_dir,
+                              interactive_dir, bundle_name)
+    results.append(_entry(rows, tickers, 'get_chart_jobs', timings))
+
+    for job in jobs:
+        timings = []
+        for _ in range(repeat):
+            result = _quiet(chart_scheduler.run_chart_job, job)
+            if not result['ok']:
+                print(f"⚠ Biểu đồ {job['name']} bị lỗi:\n{result['error']}")
+                break
+            timings.append(result['seconds'])
+        if timings:
+            results.append(_entry(rows, tickers, f"chart:{job['name']}", timings))
+
+    timings, _ = time_call(build_website.create_html_pages, repeat, run_dir, 'charts_static', 'charts_interactive')
+    results.append(_entry(rows, tickers, 'create_html_pages', timings))
+    return results
+
+
+def benchmark_startup(repeat):
+    """
+    Đo thời gian khởi động (tiến trình mới) cho từng mục trong STARTUP_PROBES và kiểm tra
+    import build_website với STARTUP_BUDGET_SECONDS. Trả về (danh sách kết quả, thư viện nặng bị nạp sớm).
+    """
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for name, code in STARTUP_PROBES.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=source_dir, check=True)
+            timings.append(time.perf_counter() - start)
+        results.append({'probe': name, 'seconds_min': round(min(timings), 4),
+                        'seconds_median': round(statistics.median(timings), 4)})
+
+    check = ("import sys, build_website; "
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', check], cwd=source_dir, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    return results, [m for m in output.split(',') if m]
+
+
+def format_startup(results, eager_modules):
+    header = f"{'Lệnh':<24} {'Min (s)':>9} {'Median (s)':>11}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(f"{r['probe']:<24} {r['seconds_min']:>9.3f} {r['seconds_median']:>11.3f}")
+
+    cli = next(r for r in results if r['probe'] == 'cli (--help, pages)')
+    status = '✓ trong ngân sách' if cli['seconds_min'] <= STARTUP_BUDGET_SECONDS else '⚠ VƯỢT ngân sách'
+    lines.append(f"\nKhởi động CLI: {cli['seconds_min']:.3f}s / ngân sách {STARTUP_BUDGET_SECONDS:.2f}s ({status})")
+    if eager_modules:
+        lines.append(f"⚠ import build_website đã nạp sẵn: {', '.join(eager_modules)}")
+    return "\n".join(lines)
+
+
+def scaling_table(results):
+    """
+    Với mỗi bước và mỗi số mã, ước lượng bậc tăng trưởng giữa hai kích thước liên tiếp:
+    exponent = log(t2/t1) / log(n2/n1) (≈1 là tuyến tính).
+    """
+    lines = []
+    groups = {}
+    for r in results:
+        groups.setdefault((r['stage'], r['tickers']), []).append(r)
+
+    for (stage, tickers), entries in groups.items():
+        entries.sort(key=lambda e: e['rows'])
+        parts = [f"{e['rows']:,}: {e['seconds_min']:.3f}s" for e in entries]
+        exponents = []
+        for a, b in zip(entries, entries[1:]):
+            if a['seconds_min'] > 0 and b['seconds_min'] > 0 and b['rows'] != a['rows']:
+                exponents.append(math.log(b['seconds_min'] / a['seconds_min']) / math.log(b['rows'] / a['rows']))
+        exponent_text = ', '.join(f"{x:.2f}" for x in exponents) or '-'
+        lines.append(f"{stage:<36} {tickers:>6} | {' | '.join(parts)} | bậc: {exponent_text}")
+    return "\n".join(lines)
+
+
+def format_results(results):
+    header = f"{'Bước':<36} {'Dòng':>12} {'Mã':>6} {'Min (s)':>9} {'Median (s)':>11} {'Dòng/s':>14}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        rps = '-' if r['rows_per_second'] is None else f"{r['rows_per_second']:,.0f}"
+        lines.append(f"{r['stage']:<36} {r['rows']:>12,} {r['tickers']:>6} {r['seconds_min']:>9.3f} "
+                     f"{r['seconds_median']:>11.3f} {rps:>14}")
+    return "\n".join(lines)
+
+
+def parse_int_list(value):
+    return [int(v.replace('_', '')) for v in value.split(',') if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline Dashboard trên dữ liệu giả lập (offline).")
+    parser.add_argument('--sizes', type=parse_int_list, default=[10_000, 100_000],
+                        help="Danh sách số dòng, vd: 10000,1000000,10000000")
+    parser.add_argument('--tickers', type=parse_int_list, default=[1],
+                        help="Danh sách số mã cổ phiếu, vd: 1,10,1000")
+    parser.add_argument('--repeat', type=int, default=3, help="Số lần lặp cho mỗi phép đo.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed sinh dữ liệu (cùng seed = cùng dữ liệu).")
+    parser.add_argument('--out-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.bench'),
+                        help="Thư mục chứa dữ liệu giả lập và kết quả.")
+    args = parser.parse_args()
+
+    startup_results, eager_modules = benchmark_startup(args.repeat)
+
+    all_results = []
+    for tickers in args.tickers:
+        for rows in args.sizes:
+            all_results += benchmark_dataset(rows, tickers, args.repeat, args.out_dir, seed=args.seed)
+
+    print("\n--- KẾT QUẢ BENCHMARK ---")
+    print(format_results(all_results))
+    print("\n--- KHẢ NĂNG MỞ RỘNG (theo số dòng) ---")
+    print(scaling_table(all_results))
+    print("\n--- THỜI GIAN KHỞI ĐỘNG ---")
+    print(format_startup(startup_results, eager_modules))
+
+    report_path = os.path.join(args.out_dir, 'benchmark_results.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'sizes': args.sizes, 'tickers': args.tickers, 'repeat': args.repeat,
+                   'seed': args.seed, 'results': all_results,
+                   'startup': {'budget_seconds': STARTUP_BUDGET_SECONDS, 'probes': startup_results,
+                               'eager_modules': eager_modules}}, f, indent=2, ensure_ascii=False)
+    print(f"\nĐã ghi kết quả: {report_path}")
@@ -0,0 +1,182 @@
+import hashlib
+import inspect
+import json
+import os
+import sys
+from functools import lru_cache
+from importlib import metadata
+
+CACHE_DIR_NAME = '.build_cache'
+MANIFEST_FILE = 'manifest.json'
+
+# Các thư viện ảnh hưởng trực tiếp đến nội dung file biểu đồ được sinh ra
+TRACKED_LIBRARIES = ['numpy', 'pandas', 'matplotlib', 'seaborn', 'plotly', 'wordcloud']
+
+# Thư mục mã nguồn của dự án: hàm/module nằm ở đây được tính vào khóa cache của biểu đồ dùng đến chúng
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_library_versions():
+    """
+    Trả về phiên bản của Python và các thư viện vẽ biểu đồ,
+    dùng làm một phần của khóa cache.
+    """
+    versions = {'python': sys.version.split()[0]}
+    for name in TRACKED_LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def hash_input(value):
+    """
+    Tính hash nội dung cho dữ liệu đầu vào của một biểu đồ
+    (DataFrame, Series, chuỗi hoặc giá trị JSON).
+    """
+    import pandas as pd
+
+    hasher = hashlib.sha256()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        hasher.update(json.dumps([str(c) for c in frame.columns]).encode('utf-8'))
+        hasher.update(json.dumps([str(t) for t in frame.dtypes]).encode('utf-8'))
+        hasher.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    elif isinstance(value, bytes):
+        hasher.update(value)
+    elif isinstance(value, str):
+        hasher.update(value.encode('utf-8'))
+    else:
+        hasher.update(json.dumps(value, sort_keys=True, default=str).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _file_source(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _is_project_file(path):
+    return bool(path) and os.path.dirname(os.path.abspath(path)) == SOURCE_DIR
+
+
+def _code_names(code):
+    """
+    Mọi tên toàn cục/thuộc tính/module mà đoạn mã (kể cả hàm lồng bên trong) tham chiếu tới.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+@lru_cache(maxsize=None)
+def code_digest(render_func):
+    """
+    Hash mã của hàm vẽ cùng mọi thứ của dự án mà nó dùng tới: hàm khác (đệ quy), module của dự án
+    (toàn bộ file, kể cả module được import bên trong hàm) và hằng số cấp module (vd: CHART_DATA_SOURCES).
+    Nhờ vậy sửa một hàm phụ như chart_data.write_figure_spec cũng làm các biểu đồ dùng nó được vẽ lại.
+    Tên có thể bị tính thừa (vd: thuộc tính trùng tên module) nhưng không bao giờ bị thiếu.
+    """
+    parts = {}
+    pending, seen = [render_func], set()
+    while pending:
+        func = pending.pop()
+        if func.__qualname__ in seen:
+            continue
+        seen.add(func.__qualname__)
+        parts[func.__qualname__] = inspect.getsource(func)
+        namespace = func.__globals__
+        for name in sorted(_code_names(func.__code__)):
+            value = namespace.get(name)
+            if value is None:
+                path = os.path.join(SOURCE_DIR, f'{name}.py')
+                if os.path.exists(path):
+                    parts[f'{name}.py'] = _file_source(path)
+            elif inspect.ismodule(value):
+                if _is_project_file(getattr(value, '__file__', None)):
+                    parts[os.path.basename(value.__file__)] = _file_source(value.__file__)
+            elif inspect.isfunction(value):
+                if _is_project_file(inspect.getsourcefile(value)):
+                    pending.append(value)
+            elif isinstance(value, (str, int, float, bool, tuple, list, dict)):
+                parts[f'const:{name}'] = repr(value)
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def compute_chart_key(render_func, data, params, versions):
+    """
+    Khóa cache của một biểu đồ = hash(dữ liệu đầu vào, tham số, mã hàm vẽ và mã dự án nó dùng (code_digest),
+    phiên bản thư viện).
+    """
+    payload = {
+        'data': hash_input(data),
+        'params': params,
+        'render': code_digest(render_func),
+        'versions': versions,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def load_manifest(cache_dir):
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠ Không đọc được manifest cache ({e}). Sẽ vẽ lại toàn bộ.")
+        return {}
+
+
+def save_manifest(cache_dir, manifest):
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def job_outputs(output_path, written=None):
+    """
+    Các file một job đã ghi: file chính `output_path` cùng các file mà hàm vẽ trả về (vd: các bản @2x/WebP
+    của WordCloud). Hàm vẽ không trả về gì thì chỉ có file chính.
+    """
+    outputs = [output_path]
+    for path in written or []:
+        if os.path.abspath(path) != os.path.abspath(output_path):
+            outputs.append(path)
+    return outputs
+
+
+def is_chart_fresh(manifest, name, key, output_path):
+    """
+    Biểu đồ được coi là còn mới khi khóa trùng khớp và mọi file đầu ra đã ghi lại (xem record_chart)
+    vẫn còn nguyên kích thước.
+    """
+    entry = manifest.get(name)
+    if not entry or entry.get('key') != key or not entry.get('outputs'):
+        return False
+    directory = os.path.dirname(output_path)
+    for file_name, size in entry['outputs'].items():
+        path = os.path.join(directory, file_name)
+        if not os.path.exists(path) or os.path.getsize(path) != size:
+            return False
+    return os.path.basename(output_path) in entry['outputs']
+
+
+def record_chart(manifest, name, key, outputs):
+    """
+    Ghi khóa và kích thước của mọi file đầu ra (danh sách từ job_outputs, file đầu tiên là file chính).
+    Đường dẫn được lưu tương đối với thư mục của file chính.
+    """
+    directory = os.path.dirname(outputs[0])
+    manifest[name] = {
+        'key': key,
+        'outputs': {os.path.relpath(path, directory): os.path.getsize(path) for path in outputs},
+    }
@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows không có module resource
+    resource = None
+
+
+def peak_rss_bytes(children=False):
+    """
+    Bộ nhớ RSS cao nhất (byte) của tiến trình hiện tại hoặc của các tiến trình con đã kết thúc.
+    Trả về None nếu hệ điều hành không hỗ trợ.
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def output_size(paths):
+    total = 0
+    for path in paths or []:
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def new_report():
+    return {
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'stages': [],
+    }
+
+
+def record_stage(report, name, wall_seconds, cpu_seconds=None, peak_rss=None, output_bytes=0, **extra):
+    entry = {
+        'name': name,
+        'wall_seconds': round(wall_seconds, 4),
+        'cpu_seconds': None if cpu_seconds is None else round(cpu_seconds, 4),
+        'peak_rss_bytes': peak_rss,
+        'output_bytes': output_bytes,
+    }
+    entry.update(extra)
+    report['stages'].append(entry)
+    return entry
+
+
+@contextmanager
+def profile_stage(report, name, outputs=None):
+    """
+    Đo thời gian thực, thời gian CPU và RSS cao nhất của một bước build.
+    `outputs` là danh sách file (có thể được điền thêm bên trong khối with)
+    dùng để tính tổng số byte đầu ra của bước đó.
+    """
+    outputs = outputs if outputs is not None else []
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield outputs
+    finally:
+        record_stage(
+            report, name,
+            wall_seconds=time.perf_counter() - wall_start,
+            cpu_seconds=time.process_time() - cpu_start,
+            peak_rss=peak_rss_bytes(),
+            output_bytes=output_size(outputs),
+        )
+
+
+def record_chart_results(report, results, prefix='chart:'):
+    """
+    Thêm số liệu của từng biểu đồ (được đo trong tiến trình vẽ) vào báo cáo.
+    """
+    for result in results:
+        record_stage(
+            report, prefix + result['name'],
+            wall_seconds=result.get('seconds', 0.0),
+            cpu_seconds=result.get('cpu_seconds'),
+            peak_rss=result.get('peak_rss_bytes'),
+            output_bytes=output_size([result['output']]) if result.get('ok') else 0,
+            cached=result.get('cached', False),
+            ok=result.get('ok', True),
+        )
+
+
+def write_json_report(report, path):
+    report['finished_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    report['children_peak_rss_bytes'] = peak_rss_bytes(children=True)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def _format_bytes(value):
+    if value is None:
+        return '-'
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(value) < 1024 or unit == 'GB':
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def format_summary(report):
+    """
+    Bảng tóm tắt dạng văn bản: mỗi dòng một bước build.
+    """
+    header = f"{'Bước':<36} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak RSS':>10} {'Output':>10}"
+    lines = [header, '-' * len(header)]
+    for stage in report['stages']:
+        name = stage['name'] + (' (cache)' if stage.get('cached') else '') + ('' if stage.get('ok', True) else ' (lỗi)')
+        cpu = '-' if stage['cpu_seconds'] is None else f"{stage['cpu_seconds']:.2f}"
+        lines.append(
+            f"{name[:36]:<36} {stage['wall_seconds']:>9.2f} {cpu:>9} "
+            f"{_format_bytes(stage['peak_rss_bytes']):>10} {_format_bytes(stage['output_bytes']):>10}"
+        )
+    return "\n".join(lines)
@@ -1,14 +1,22 @@
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-from wordcloud import WordCloud
-import xml.etree.ElementTree as ET
-import kagglehub
-import json       
+import json
+import argparse
+
+# Chỉ các module nhẹ được import ở đây. pandas, matplotlib, seaborn, plotly, wordcloud và các module
+# xử lý dữ liệu (frame_cache, indicators, regression, rollup_store, sketches, stream_aggregates) được import trong
+# hàm cần đến chúng, để --help, lệnh 'pages' hay lần build dùng cache không phải trả chi phí nạp thư viện.
+import asset_pipeline
+import build_cache
+import build_profiler
+import chart_data
+import chart_scheduler
+import dashboard_server
+import data_source
+import downsampling
+import news_feed
+import news_wordcloud
+import page_templates
+import rss_parser
 
 def setup_kaggle_api(api_key_json):
     """
@@ -35,209 +43,80 @@ def setup_kaggle_api(api_key_json):
         print(f"⚠ Lỗi khi cài đặt Kaggle API: {e}")
         print("Vui lòng cài đặt thủ công file kaggle.json vào ~/.kaggle/kaggle.json")
 
-def download_kaggle_dataset():
+KAGGLE_DATASET_HANDLE = "isaaclopgu/apple-stock-data-daily-updated"
+DATASET_FILENAME = 'Apple_historical_data.csv'
+
+def download_kaggle_dataset(mirror_dir, source=KAGGLE_DATASET_HANDLE, ttl_seconds=data_source.DEFAULT_TTL_SECONDS,
+                            offline=False, force=False, seed_path=None):
     """
-    Tải dataset từ Kaggle Hub và trả về đường dẫn đến file CSV.
+    Lấy dataset qua mirror cục bộ (có manifest checksum và TTL) và trả về đường dẫn đến file CSV.
+    Chỉ gọi Kaggle khi mirror đã hết hạn; `source` cũng có thể là một thư mục cục bộ thay cho Kaggle.
+    seed_path là bản dữ liệu đi kèm repo, chỉ dùng để tạo mirror lần đầu và không bao giờ bị ghi đè.
     """
-    print("Đang tải dataset từ Kaggle (isaaclopgu/apple-stock-data-daily-updated)...")
+    print(f"Đang lấy dataset ({source})...")
     try:
-        # Sử dụng code của bạn để tải
-        dataset_path = kagglehub.dataset_download("isaaclopgu/apple-stock-data-daily-updated")
-        
-        print(f"Dataset đã được tải về tại: {dataset_path}")
-
-        # Giờ chúng ta cần đường dẫn đến file CSV cụ thể bên trong thư mục đó
-        # Dựa trên dataset, file tên là 'Apple_historical_data.csv'
-        csv_file_path = os.path.join(dataset_path, 'Apple_historical_data.csv')
-        
-        if os.path.exists(csv_file_path):
-            print(f"✓ Tải thành công. Sử dụng file: {csv_file_path}")
-            return csv_file_path
-        else:
-            # Dự phòng: Nếu không tìm thấy file, thử tìm file .csv đầu tiên
-            for file in os.listdir(dataset_path):
-                if file.endswith('.csv'):
-                    print(f"✓ Tải thành công (Tìm thấy file: {file})")
-                    return os.path.join(dataset_path, file)
-            
-            print(f"⚠ Lỗi: Đã tải dataset tới {dataset_path} nhưng không tìm thấy file 'Apple_historical_data.csv'.")
-            return None
+        csv_file_path = data_source.fetch_dataset(mirror_dir, source, DATASET_FILENAME,
+                                                  ttl_seconds=ttl_seconds, offline=offline, force=force,
+                                                  seed_path=seed_path)
+        if csv_file_path is None:
+            print(f"⚠ Lỗi: Không có file '{DATASET_FILENAME}' để sử dụng.")
+        return csv_file_path
             
     except Exception as e:
         print(f"⚠ Lỗi nghiêm trọng khi tải dataset Kaggle: {e}")
         print("Hãy đảm bảo bạn đã cài đặt thư viện: pip install kaggle kagglehub")
         return None
 
-def get_global_css():
-    return """
-    <style>
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
-            margin: 0;
-            background-color: #f4f7f6;
-            color: #333;
-        }
-        .container {
-            max-width: 1400px;
-            margin: 0 auto;
-            padding: 20px;
-        }
+def process_stock_data(filepath, cache_dir=None):
+    import pandas as pd
+    import frame_cache
 
-        nav {
-            background-color: #ffffff;
-            padding: 15px 30px;
-            border-bottom: 1px solid #ddd;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-            text-align: center;
-        }
-        nav a {
-            margin: 0 20px;
-            text-decoration: none;
-            font-size: 18px;
-            font-weight: 500;
-            color: #007bff;
-            transition: color 0.2s;
-        }
-        nav a:hover {
-            color: #0056b3;
-        }
-        nav a.active {
-            color: #333;
-            font-weight: 700;
-            border-bottom: 2px solid #333;
-            padding-bottom: 5px;
-        }
+    print(f"Đang xử lý dữ liệu cổ phiếu từ: {filepath}")
+    if not os.path.exists(filepath):
+        print(f"Lỗi: Không tìm thấy file tại {filepath}")
+        return None
 
-        h1 {
-            color: #222;
-            border-bottom: 2px solid #007bff;
-            padding-bottom: 10px;
-        }
-        
-        .chart-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(600px, 1fr));
-            gap: 25px;
-            margin-top: 30px;
-        }
+    if cache_dir is not None:
+        df = frame_cache.load_cached_frame(filepath, cache_dir)
+        if df is not None:
+            print(f"↷ Dùng dữ liệu đã xử lý từ cache ({len(df)} dòng). Xong.")
+            return df
 
-        .chart-card {
-            background-color: #ffffff;
-            border-radius: 8px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-            padding: 25px;
-            overflow: hidden;
-        }
-        .chart-card h2 {
-            margin-top: 0;
-            color: #0056b3;
-            border-bottom: 1px solid #eee;
-            padding-bottom: 15px;
-        }
-        
-        .chart-card img,
-        .chart-card iframe {
-            width: 100%;
-            border-radius: 5px;
-            border: 1px solid #eee;
-            box-sizing: border-box;
-            cursor: pointer;
-            transition: transform 0.2s ease-in-out, box-shadow 0.2s ease-in-out;
-        }
-        .chart-card img:hover,
-        .chart-card iframe:hover {
-            transform: scale(1.02);
-            box-shadow: 0 8px 16px rgba(0,0,0,0.1);
-        }
-        
-        .insight {
-            background-color: #e6f7ff;
-            border-left: 5px solid #007bff;
-            padding: 15px 20px;
-            margin-top: 20px;
-            margin-bottom: 20px;
-            border-radius: 4px;
-            font-size: 1.05em;
-            line-height: 1.6;
-        }
-        .insight strong {
-            color: #0056b3;
-        }
+        appended = frame_cache.load_appended_frame(filepath, cache_dir, clean_stock_frame)
+        if appended is not None:
+            df, new_rows, info = appended
+            frame_cache.save_cached_frame(filepath, cache_dir, df, **info)
+            print(f"↷ File dữ liệu chỉ được nối thêm: xử lý {len(new_rows)} dòng mới "
+                  f"({len(df)} dòng tổng cộng). Xong.")
+            return df
 
-        .modal-overlay {
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(0, 0, 0, 0.85);
-            display: none;
-            justify-content: center;
-            align-items: center;
-            z-index: 1000;
-        }
-        .modal-overlay.visible {
-            display: flex;
-        }
-        .modal-content {
-            position: relative;
-            background: #fff;
-            padding: 20px;
-            border-radius: 8px;
-            width: 90vw;
-            height: 90vh;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-            display: flex;
-            justify-content: center;
-            align-items: center;
-        }
-        .modal-content iframe,
-        .modal-content img {
-            width: 100%;
-            height: 100%;
-            border: none;
-            object-fit: contain;
-        }
-        .modal-close {
-            position: absolute;
-            top: -15px;
-            right: -15px;
-            width: 35px;
-            height: 35px;
-            line-height: 35px;
-            text-align: center;
-            background: #fff;
-            border-radius: 50%;
-            font-size: 28px;
-            font-weight: bold;
-            color: #333;
-            cursor: pointer;
-            z-index: 1001;
-        }
+    raw = pd.read_csv(filepath)
+    header, csv_rows = list(raw.columns), len(raw)
+    df = clean_stock_frame(raw)
 
-        @media (max-width: 700px) {
-            .chart-grid {
-                grid-template-columns: 1fr;
-            }
-            nav a {
-                display: block;
-                margin: 10px 0;
-            }
-            .modal-content {
-                width: 95vw;
-                height: 80vh;
-            }
-        }
-    </style>
-    """
+    if cache_dir is not None:
+        frame_cache.save_cached_frame(filepath, cache_dir, df, header=header, csv_rows=csv_rows)
+    
+    print("Xử lý dữ liệu cổ phiếu... Xong.")
+    return df
 
-def process_stock_data(filepath):
-    print(f"Đang xử lý dữ liệu cổ phiếu từ: {filepath}")
-    try:
-        df = pd.read_csv(filepath)
-    except FileNotFoundError:
-        print(f"Lỗi: Không tìm thấy file tại {filepath}")
-        return None
+# Kiểu dữ liệu gọn cho chế độ đọc theo chunk. Volume được đọc dạng float
+# (để chấp nhận ô trống) rồi ép về int64 sau khi bỏ các dòng thiếu dữ liệu.
+STOCK_CSV_DTYPES = {
+    'Open': 'float32',
+    'High': 'float32',
+    'Low': 'float32',
+    'Close': 'float32',
+    'Volume': 'float64',
+    'ticker': 'category',
+    'name': 'category',
+}
+
+def clean_stock_frame(df):
+    """
+    Chuẩn hóa cột Date, bỏ dòng thiếu dữ liệu và thêm các cột Year, Month, Day, Daily_Change_Percent.
+    """
+    import pandas as pd
 
     temp_date_col = pd.to_datetime(df['Date'], utc=True, errors='coerce')
     df['Date'] = temp_date_col.dt.date
@@ -249,178 +128,391 @@ def process_stock_data(filepath):
     df['Month'] = df['Date'].dt.month
     df['Day'] = df['Date'].dt.day
     df['Daily_Change_Percent'] = ((df['Close'] - df['Open']) / df['Open']) * 100
-    
-    print("Xử lý dữ liệu cổ phiếu... Xong.")
     return df
 
-def get_apple_news_text():
-    print("Đang lấy tin tức từ Apple Newsroom RSS Feed...")
+def process_stock_data_chunked(filepath, chunksize=200_000, keep_frame=True):
+    """
+    Đọc file CSV theo từng chunk với kiểu dữ liệu gọn (float32, category), tính các cột
+    phái sinh cho từng chunk và cập nhật dần các phép tổng hợp (khối lượng theo tháng,
+    histogram, tương quan, sketch phân phối theo năm). Với keep_frame=False, bộ nhớ chỉ
+    phụ thuộc vào chunksize.
+
+    Trả về (df hoặc None, aggregates).
+    """
+    import pandas as pd
+    import stream_aggregates
 
-    url = "https://developer.apple.com/news/rss/news.rss"
+    print(f"Đang xử lý dữ liệu cổ phiếu theo chunk ({chunksize} dòng) từ: {filepath}")
+    if not os.path.exists(filepath):
+        print(f"Lỗi: Không tìm thấy file tại {filepath}")
+        return None, None
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "application/rss+xml, application/xml, text/xml, */*",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+    aggregates = stream_aggregates.init_aggregates()
+    frames = []
+    for chunk in pd.read_csv(filepath, dtype=STOCK_CSV_DTYPES, chunksize=chunksize):
+        chunk = clean_stock_frame(chunk)
+        chunk['Volume'] = chunk['Volume'].astype('int64')
+        chunk['Year'] = chunk['Year'].astype('int16')
+        chunk['Month'] = chunk['Month'].astype('int8')
+        chunk['Day'] = chunk['Day'].astype('int8')
+        chunk['Daily_Change_Percent'] = chunk['Daily_Change_Percent'].astype('float32')
+
+        stream_aggregates.update_aggregates(aggregates, chunk)
+        if keep_frame:
+            frames.append(chunk)
+
+    df = None
+    if keep_frame and frames:
+        # union_categoricals giữ cột ticker/name ở dạng category khi nối các chunk
+        df = pd.concat(frames, ignore_index=True)
+        for col in ['ticker', 'name']:
+            if col in df.columns:
+                df[col] = pd.api.types.union_categoricals([f[col] for f in frames])
+
+    print(f"Xử lý dữ liệu cổ phiếu theo chunk... Xong ({aggregates['rows']} dòng).")
+    return df, aggregates
+
+def parse_news_feed(content, limit=10):
+    """
+    Chuyển nội dung RSS thành danh sách dòng văn bản (tiêu đề, mô tả, link) của tối đa `limit` tin.
+    Parser dừng ngay sau tin thứ `limit`, không dựng cây XML của cả feed.
+    """
+    text_data = []
+    count = 0
+    for idx, item in enumerate(rss_parser.iter_rss_items(content, limit=limit), 1):
+        count = idx
+        title = rss_parser.strip_html(item.get('title'))
+        desc_text = rss_parser.strip_html(item.get('description'))
+        link = item.get('link')
+
+        if title:
+            text_data.append(f"{idx}. {title}")
+        if desc_text:
+            text_data.append(f"   {desc_text[:200]}...")
+        if link:
+            text_data.append(f"   Link: {link}")
+        text_data.append("")
+
+    if count == 0:
+        print("Không tìm thấy items trong RSS feed.")
+    else:
+        print(f"✓ Lấy thành công {count} tin")
+    return text_data
+
+def get_apple_news_text(feeds=None, cache_dir=None, max_age=news_feed.DEFAULT_MAX_AGE_SECONDS,
+                        deadline=news_feed.DEFAULT_DEADLINE_SECONDS):
+    print("Đang lấy tin tức từ Apple Newsroom RSS Feed...")
+
+    feeds = feeds or news_feed.DEFAULT_FEEDS
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), build_cache.CACHE_DIR_NAME, 'news')
 
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        print(f"Status code: {response.status_code}")
-        print(f"Content type: {response.headers.get('Content-Type', 'Unknown')}")
+        results = news_feed.fetch_feeds(feeds, cache_dir, max_age=max_age, deadline=deadline)
 
-        try:
-            root = ET.fromstring(response.content)
-            
-            items = root.findall('.//item')
-            
-            if not items:
-                print("Không tìm thấy items trong RSS feed.")
-                return "Không có tin tức"
-
-            text_data = []
-            for idx, item in enumerate(items[:10], 1):
-                title = item.find('title')
-                description = item.find('description')
-                link = item.find('link')
-                
-                if title is not None and title.text:
-                    text_data.append(f"{idx}. {title.text.strip()}")
-                    
-                if description is not None and description.text:
-                    desc_soup = BeautifulSoup(description.text, 'html.parser')
-                    desc_text = desc_soup.get_text(strip=True)
-                    if desc_text:
-                        text_data.append(f"   {desc_text[:200]}...")
-                
-                if link is not None and link.text:
-                    text_data.append(f"   Link: {link.text.strip()}")
-                
-                text_data.append("")
-            
-            result = "\n".join(text_data)
-            print(f"✓ Lấy thành công {len(items)} tin từ Apple Newsroom")
-            return result if result else "Không có nội dung tin tức"
-            
-        except ET.ParseError as e:
-            print(f"Lỗi parse XML với ElementTree: {e}")
-            
-            print("Thử lại với BeautifulSoup...")
-            soup = BeautifulSoup(response.content, 'xml')
-            items = soup.find_all('item')
-            
-            if not items:
-                print("BeautifulSoup cũng không tìm thấy items.")
-                return "Không có tin tức"
-            
-            text_data = []
-            for idx, item in enumerate(items[:10], 1):
-                title = item.find('title')
-                description = item.find('description')
-                
-                if title:
-                    text_data.append(f"{idx}. {title.get_text(strip=True)}")
-                if description:
-                    desc_text = BeautifulSoup(description.get_text(), 'html.parser').get_text(strip=True)
-                    text_data.append(f"   {desc_text[:200]}...")
-                text_data.append("")
-            
-            result = "\n".join(text_data)
-            print(f"✓ Lấy thành công {len(items)} tin (BeautifulSoup)")
-            return result if result else "Không có nội dung tin tức"
+        text_data = []
+        for result in results:
+            print(f"  {result['url']}: {result['status']}")
+            if result['content']:
+                text_data += parse_news_feed(result['content'])
+
+        if not any(result['content'] for result in results):
+            return "Không thể lấy tin tức"
+        result = "\n".join(text_data)
+        return result if result else "Không có nội dung tin tức"
 
-    except requests.exceptions.Timeout:
-        print("⚠ Timeout: Server phản hồi quá lâu")
-        return "Không thể kết nối (timeout)"
-    
-    except requests.exceptions.ConnectionError:
-        print("⚠ Lỗi kết nối mạng")
-        return "Không thể kết nối mạng"
-    
-    except requests.exceptions.HTTPError as e:
-        print(f"⚠ Lỗi HTTP {response.status_code}: {e}")
-        return f"Lỗi server (HTTP {response.status_code})"
-    
-    except requests.exceptions.RequestException as e:
-        print(f"⚠ Lỗi request: {e}")
-        return "Không thể lấy tin tức"
-    
     except Exception as e:
         print(f"⚠ Lỗi không xác định: {type(e).__name__} - {e}")
         return "Lỗi xử lý tin tức"
     
-def create_visualizations(df, news_text, static_dir, interactive_dir):
-    print("Đang tạo biểu đồ (phiên bản 10 biểu đồ)...")
-    
-    df_recent = df[df['Year'] > df['Year'].max() - 15]
-    df_grouped = df.groupby(['Year', 'Month'])['Volume'].sum().reset_index()
-    df_sample = df.sample(min(5000, len(df)))
-    
+def render_daily_change_histogram(hist_df, output_path):
+    """
+    Vẽ histogram kèm đường KDE từ các bin đã được tổng hợp sẵn (sketches.histogram_frame), không cần dữ liệu thô.
+    """
+    import matplotlib.pyplot as plt
+
+    color = 'C0'
     plt.figure(figsize=(10, 6))
-    sns.histplot(df['Daily_Change_Percent'], bins=50, kde=True)
+    plt.bar(hist_df['left'], hist_df['count'], width=hist_df['right'] - hist_df['left'],
+            align='edge', edgecolor='white', color=color, alpha=0.75)
+    plt.plot((hist_df['left'] + hist_df['right']) / 2, hist_df['kde'], color=color)
     plt.title('Phân phối % Thay đổi giá hàng ngày')
     plt.xlabel('% Thay đổi')
     plt.ylabel('Tần suất')
-    plt.savefig(os.path.join(static_dir, 'daily_change_histogram.png'))
+    plt.savefig(output_path)
     plt.close()
 
-    plt.figure(figsize=(12, 7))
-    sns.boxplot(x='Year', y='Close', data=df_recent)
+def render_price_boxplot(box_stats, output_path):
+    """
+    Vẽ boxplot từ thống kê theo năm trong bảng tổng hợp (q25/q50/q75 và râu whislo/whishi)
+    thay vì từ từng dòng dữ liệu; các điểm ngoại lai không được vẽ riêng.
+    """
+    import matplotlib.pyplot as plt
+
+    stats = [{'label': str(row.Year), 'q1': row.q25, 'med': row.q50, 'q3': row.q75,
+              'whislo': row.whislo, 'whishi': row.whishi, 'fliers': []}
+             for row in box_stats.itertuples(index=False)]
+    fig, ax = plt.subplots(figsize=(12, 7))
+    boxes = ax.bxp(stats, patch_artist=True, showfliers=False)
+    # Màu 'C<i>' lấy theo chu kỳ màu mặc định (giống sns.color_palette()) nên không cần nạp seaborn
+    for i, patch in enumerate(boxes['boxes']):
+        patch.set_facecolor(f'C{i}')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Close')
     plt.title('Boxplot giá đóng cửa (15 năm gần nhất)')
-    plt.savefig(os.path.join(static_dir, 'price_boxplot_by_year.png'))
-    plt.close()
-    
+    plt.savefig(output_path)
+    plt.close(fig)
+
+def render_correlation_heatmap(corr, output_path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     plt.figure(figsize=(8, 6))
-    corr_cols = ['Open', 'High', 'Low', 'Close', 'Volume', 'Daily_Change_Percent']
-    corr = df[corr_cols].corr()
     sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm')
     plt.title('Heatmap tương quan')
-    plt.savefig(os.path.join(static_dir, 'correlation_heatmap.png'))
+    plt.savefig(output_path)
     plt.close()
 
+def render_news_wordcloud(frequencies, output_path, scales=news_wordcloud.SCALES, formats=news_wordcloud.FORMATS,
+                          seed=news_wordcloud.RANDOM_SEED, title=news_wordcloud.TITLE):
+    """
+    Vẽ WordCloud từ bảng tần suất từ (news_wordcloud.word_frequencies) với seed cố định, không qua matplotlib;
+    ghi PNG tối ưu và WebP ở các tỉ lệ `scales` (news_wordcloud.png, news_wordcloud@2x.webp, ...),
+    giữ tiêu đề trong ảnh như trước. Trả về danh sách file đã ghi để cache biểu đồ kiểm tra đủ mọi bản.
+    """
     try:
-        wordcloud = WordCloud(width=800, height=400, background_color='white').generate(news_text)
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.title('WordCloud Tin tức về Apple')
-        plt.savefig(os.path.join(static_dir, 'news_wordcloud.png'))
-        plt.close()
+        return news_wordcloud.render_variants(frequencies, output_path, scales=scales, formats=formats, seed=seed,
+                                              title=title)
     except ValueError:
         print("Lỗi: Không thể tạo WordCloud. Bỏ qua.")
+        return []
 
-    plt.figure(figsize=(12, 7))
-    sns.violinplot(x='Year', y='Daily_Change_Percent', data=df_recent)
+def render_daily_change_violin(violin_df, output_path):
+    """
+    Vẽ violin từ mật độ đã làm mượt theo năm (sketches.yearly_violin_frame) thay vì chạy KDE trên từng dòng.
+    Như seaborn (density_norm='area'), mọi năm dùng chung một thang chiều rộng.
+    """
+    import matplotlib.pyplot as plt
+
+    years = sorted(violin_df['Year'].unique())
+    scale = 0.4 / violin_df['density'].max()
+    fig, ax = plt.subplots(figsize=(12, 7))
+    for position, year in enumerate(years):
+        part = violin_df[violin_df['Year'] == year]
+        half_width = part['density'] * scale
+        ax.fill_betweenx(part['value'], position - half_width, position + half_width,
+                         facecolor=f'C{position}', edgecolor='0.25', linewidth=0.8)
+        q1, median, q3 = part[['q25', 'q50', 'q75']].iloc[0]
+        ax.vlines(position, q1, q3, color='0.25', linewidth=4)
+        ax.scatter([position], [median], color='white', s=12, zorder=3)
+    ax.set_xticks(range(len(years)), [str(year) for year in years])
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Daily_Change_Percent')
     plt.title('Violin Plot: % Thay đổi hàng ngày (15 năm gần nhất)')
     plt.ylim(-10, 10)
-    plt.savefig(os.path.join(static_dir, 'daily_change_violin_by_year.png'))
+    plt.savefig(output_path)
+    plt.close(fig)
+
+def render_indicator_panels(df_panels, output_path):
+    """
+    Ba biểu đồ chung trục thời gian: RSI, độ biến động (năm hóa) và mức sụt giảm từ đỉnh (drawdown).
+    """
+    import matplotlib.pyplot as plt
+    import indicators
+
+    rsi_col = f'RSI_{indicators.RSI_PERIOD}'
+    volatility_col = f'Volatility_{indicators.VOLATILITY_WINDOW}'
+    fig, (ax_rsi, ax_vol, ax_dd) = plt.subplots(3, 1, figsize=(12, 9), sharex=True)
+    ax_rsi.plot(df_panels['Date'], df_panels[rsi_col], linewidth=0.8)
+    ax_rsi.axhline(70, color='red', linestyle='--', linewidth=0.8)
+    ax_rsi.axhline(30, color='green', linestyle='--', linewidth=0.8)
+    ax_rsi.set_ylim(0, 100)
+    ax_rsi.set_title(f'RSI ({indicators.RSI_PERIOD} phiên)')
+    ax_vol.plot(df_panels['Date'], df_panels[volatility_col], linewidth=0.8, color='darkorange')
+    ax_vol.set_title(f'Độ biến động {indicators.VOLATILITY_WINDOW} phiên (năm hóa, %)')
+    ax_dd.fill_between(df_panels['Date'], df_panels['Drawdown_Percent'], 0, color='firebrick', alpha=0.5)
+    ax_dd.set_title('Drawdown: % giảm so với đỉnh gần nhất')
+    plt.tight_layout()
+    plt.savefig(output_path)
+    plt.close(fig)
+
+# Ảnh xem trước (trong charts_static) của từng biểu đồ tương tác; treemap và sunburst dùng chung một ảnh
+CHART_PREVIEWS = {
+    'price_over_time': 'price_over_time_preview.png',
+    'volume_over_time': 'volume_over_time_preview.png',
+    'scatter_regression': 'scatter_regression_preview.png',
+    'volume_treemap': 'volume_by_year_preview.png',
+    'volume_sunburst': 'volume_by_year_preview.png',
+    'price_indicators': 'price_indicators_preview.png',
+}
+
+# Chuỗi dữ liệu (file charts_data/<tên>.json) mà mỗi biểu đồ tương tác dùng ở chế độ 'data'
+CHART_DATA_SOURCES = {
+    'price_over_time': 'price_series',
+    'volume_over_time': 'volume_series',
+    'scatter_regression': 'high_low_sample',
+    'volume_treemap': 'volume_by_month',
+    'volume_sunburst': 'volume_by_month',
+    'price_indicators': 'indicator_series',
+}
+
+# Các đường vẽ cùng giá đóng cửa trên biểu đồ chỉ báo
+PRICE_INDICATOR_COLUMNS = ['Close', 'SMA_50', 'SMA_200', 'BB_Upper', 'BB_Lower']
+
+# Số điểm vẽ trên scatter High vs Low và trên ảnh xem trước của nó (mẫu phân tầng theo năm)
+SCATTER_SAMPLE_SIZE = 5000
+SCATTER_PREVIEW_SIZE = 2000
+
+def render_chart_preview(data, output_path, kind, x, y, title):
+    """
+    Ảnh xem trước nhỏ (PNG) của một biểu đồ tương tác, hiển thị trong lúc iframe chưa được tải.
+    kind: 'line', 'area', 'scatter' hoặc 'bar'.
+    """
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(6, 3.2), dpi=80)
+    if kind == 'line':
+        plt.plot(data[x], data[y], linewidth=1)
+    elif kind == 'area':
+        plt.fill_between(data[x], data[y], linewidth=0)
+    elif kind == 'scatter':
+        plt.scatter(data[x], data[y], s=2, alpha=0.5)
+    else:
+        plt.bar(data[x].astype(str), data[y])
+        plt.xticks(rotation=90, fontsize=6)
+    plt.title(title, fontsize=10)
+    plt.tight_layout()
+    plt.savefig(output_path)
     plt.close()
 
+def density_heatmap(df, x, y, title):
+    """
+    Heatmap số điểm trong mỗi ô của lưới 2D (đếm sẵn bằng downsampling.density_grid) thay cho biểu đồ
+    điểm/đường khi dữ liệu quá lớn để nhúng từng điểm vào trang.
+    """
+    import plotly.graph_objects as go
+
+    x_centers, y_centers, counts = downsampling.density_grid(df[x].to_numpy(), df[y].to_numpy())
+    fig = go.Figure(go.Heatmap(x=x_centers, y=y_centers, z=counts, colorscale='Viridis', colorbar_title='Số điểm',
+                               hovertemplate=f'{x}: %{{x}}<br>{y}: %{{y}}<br>Số điểm: %{{z}}<extra></extra>'))
+    fig.update_layout(title=f'{title} - mật độ {len(df)} điểm', xaxis_title=x, yaxis_title=y)
+    return fig
+
+def render_price_over_time(df_price, output_path, include_plotlyjs=True, ticker='AAPL', data_source=None,
+                           render_mode='svg'):
+    import plotly.express as px
+
+    title = f'Biến động giá đóng cửa ({ticker}) theo thời gian'
+    if render_mode == 'density':
+        fig_density = density_heatmap(df_price, 'Date', 'Close', title)
+        if data_source:
+            chart_data.write_figure_spec(fig_density, output_path, date_axes=['xaxis'])
+            return
+        fig_density.write_html(output_path, include_plotlyjs=include_plotlyjs)
+        return
+
+    fig_line = px.line(df_price, x='Date', y='Close', title=title, render_mode=render_mode)
+    if data_source:
+        chart_data.write_figure_spec(fig_line, output_path, {0: {'x': (data_source, 'Date'), 'y': (data_source, 'Close')}},
+                                     date_axes=['xaxis'])
+        return
+    fig_line.write_html(output_path, include_plotlyjs=include_plotlyjs)
+
+def render_price_indicators(df_indicators, output_path, include_plotlyjs=True, ticker='AAPL', data_source=None,
+                            render_mode='svg'):
+    import plotly.express as px
 
-    fig_line = px.line(df, x='Date', y='Close', title='Biến động giá đóng cửa (AAPL) theo thời gian')
-    fig_line.write_html(os.path.join(interactive_dir, 'price_over_time.html'))
+    fig = px.line(df_indicators, x='Date', y=PRICE_INDICATOR_COLUMNS,
+                  title=f'Giá đóng cửa ({ticker}), SMA 50/200 và dải Bollinger', render_mode=render_mode)
+    fig.update_traces(line_width=1)
+    fig.update_traces(line_dash='dot', selector=lambda trace: trace.name.startswith('BB_'))
+    fig.update_layout(legend_title_text='')
+    if data_source:
+        chart_data.write_figure_spec(fig, output_path, {
+            index: {'x': (data_source, 'Date'), 'y': (data_source, column)}
+            for index, column in enumerate(PRICE_INDICATOR_COLUMNS)}, date_axes=['xaxis'])
+        return
+    fig.write_html(output_path, include_plotlyjs=include_plotlyjs)
 
-    fig_scatter = px.scatter(df_sample, x='High', y='Low', trendline='ols', 
-                             title='Scatter Plot High vs Low (có hồi quy - 5000 điểm mẫu)')
-    fig_scatter.write_html(os.path.join(interactive_dir, 'scatter_regression.html'))
+def render_scatter_regression(df_sample, output_path, fit, include_plotlyjs=True, data_source=None,
+                              render_mode='svg'):
+    """
+    Scatter High vs Low của mẫu điểm phân tầng theo năm (hoặc heatmap mật độ với render_mode='density'),
+    kèm đường hồi quy OLS và khoảng tin cậy 95% được tính trên toàn bộ dữ liệu (`fit`, xem regression.ols_fit).
+    """
+    import plotly.express as px
+    import regression
+
+    title = f"Scatter Plot High vs Low (hồi quy OLS trên {fit['n']} dòng, R² = {fit['r2']:.4f}"
+    if render_mode == 'density':
+        fig_scatter = density_heatmap(df_sample, 'High', 'Low', title + ')')
+    else:
+        fig_scatter = px.scatter(df_sample, x='High', y='Low', render_mode=render_mode,
+                                 title=f'{title} - {len(df_sample)} điểm mẫu theo năm)')
+    line = regression.trendline_frame(fit, df_sample['High'].min(), df_sample['High'].max())
+    fig_scatter.add_scatter(x=line['x'], y=line['upper'], mode='lines', line_width=0, hoverinfo='skip',
+                            showlegend=False)
+    fig_scatter.add_scatter(x=line['x'], y=line['lower'], mode='lines', line_width=0, fill='tonexty',
+                            fillcolor='rgba(239, 85, 59, 0.2)', hoverinfo='skip', name='Khoảng tin cậy 95%')
+    fig_scatter.add_scatter(x=line['x'], y=line['y'], mode='lines', line_color='rgb(239, 85, 59)',
+                            name=f"Low = {fit['slope']:.4f} × High + {fit['intercept']:.4f}")
+    fig_scatter.update_layout(showlegend=False)
+    if data_source:
+        # Ở chế độ dữ liệu, df_sample chính là mẫu được xuất ra file nên các điểm khớp với file dữ liệu;
+        # đường hồi quy, khoảng tin cậy và lưới mật độ có kích thước cố định nên giữ nguyên trong file cấu hình
+        bindings = {} if render_mode == 'density' else {0: {'x': (data_source, 'High'), 'y': (data_source, 'Low')}}
+        chart_data.write_figure_spec(fig_scatter, output_path, bindings)
+        return
+    # div_id cố định để cùng dữ liệu luôn cho cùng một file HTML
+    fig_scatter.write_html(output_path, include_plotlyjs=include_plotlyjs, div_id='scatter_regression')
+
+def render_volume_treemap(df_grouped, output_path, include_plotlyjs=True, data_source=None):
+    import plotly.express as px
 
     fig_treemap = px.treemap(df_grouped, path=[px.Constant('Tất cả'), 'Year', 'Month'], values='Volume',
                              title='Treemap tổng khối lượng giao dịch theo Năm/Tháng')
-    fig_treemap.write_html(os.path.join(interactive_dir, 'volume_treemap.html'))
-    
-    fig_area = px.area(df, x='Date', y='Volume', title='Biến động Khối lượng Giao dịch theo thời gian')
-    fig_area.write_html(os.path.join(interactive_dir, 'volume_over_time.html'))
+    if data_source:
+        chart_data.write_figure_spec(fig_treemap, output_path, hierarchy={0: {
+            'source': data_source, 'path': ['Year', 'Month'], 'values': 'Volume', 'root': 'Tất cả', 'color': None}})
+        return
+    fig_treemap.write_html(output_path, include_plotlyjs=include_plotlyjs)
+
+def render_volume_over_time(df_volume, output_path, include_plotlyjs=True, data_source=None, render_mode='svg'):
+    import plotly.express as px
+
+    title = 'Biến động Khối lượng Giao dịch theo thời gian'
+    if render_mode == 'density':
+        fig_density = density_heatmap(df_volume, 'Date', 'Volume', title)
+        if data_source:
+            chart_data.write_figure_spec(fig_density, output_path, date_axes=['xaxis'])
+            return
+        fig_density.write_html(output_path, include_plotlyjs=include_plotlyjs)
+        return
+
+    if render_mode == 'webgl':
+        # px.area không có render_mode: dùng đường WebGL tô vùng xuống trục hoành
+        fig_area = px.line(df_volume, x='Date', y='Volume', title=title, render_mode='webgl')
+        fig_area.update_traces(fill='tozeroy')
+    else:
+        fig_area = px.area(df_volume, x='Date', y='Volume', title=title)
+    if data_source:
+        chart_data.write_figure_spec(fig_area, output_path, {0: {'x': (data_source, 'Date'), 'y': (data_source, 'Volume')}},
+                                     date_axes=['xaxis'])
+        return
+    fig_area.write_html(output_path, include_plotlyjs=include_plotlyjs)
+
+def render_volume_sunburst(df_grouped, output_path, include_plotlyjs=True, ticker='AAPL', company='Apple',
+                           data_source=None):
+    import plotly.express as px
 
     fig_sunburst = px.sunburst(
-    df_grouped,
-    path=['Year', 'Month'],
-    values='Volume',
-    color='Year',
-    color_continuous_scale='Blues',
-    title='📊 Sunburst: Khối lượng giao dịch Apple (AAPL) theo Năm và Tháng',
-)
+        df_grouped,
+        path=['Year', 'Month'],
+        values='Volume',
+        color='Year',
+        color_continuous_scale='Blues',
+        title=f'📊 Sunburst: Khối lượng giao dịch {company} ({ticker}) theo Năm và Tháng',
+    )
 
     fig_sunburst.update_traces(
         textinfo="label+percent parent",
@@ -438,13 +530,323 @@ def create_visualizations(df, news_text, static_dir, interactive_dir):
         font=dict(family="Arial", size=13)
     )
 
-    fig_sunburst.write_html(os.path.join(interactive_dir, 'volume_sunburst.html'))
+    if data_source:
+        chart_data.write_figure_spec(fig_sunburst, output_path, hierarchy={0: {
+            'source': data_source, 'path': ['Year', 'Month'], 'values': 'Volume', 'root': None, 'color': 'Year'}})
+    else:
+        fig_sunburst.write_html(output_path, include_plotlyjs=include_plotlyjs)
     print("✅ Biểu đồ Sunburst (nâng cấp) đã được tạo!")
-        
-    print("Tạo biểu đồ... Xong (10 biểu đồ).")
+
+def plotly_bundle_name():
+    import plotly.offline
+
+    return f"plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+
+def plotly_script_src(plotly_js, bundle_dir, page_dir):
+    """
+    Đường dẫn plotly.js cho trang tự vẽ biểu đồ (chế độ 'data'): CDN hoặc file dùng chung.
+    """
+    if plotly_js == 'cdn':
+        return f"https://cdn.plot.ly/{plotly_bundle_name()}"
+    return os.path.relpath(os.path.join(bundle_dir, plotly_bundle_name()), page_dir).replace(os.sep, '/')
+
+def write_plotly_bundle(bundle_dir):
+    """
+    Ghi plotly.js (có kèm số phiên bản trong tên file) vào thư mục biểu đồ tương tác
+    một lần duy nhất, để mọi biểu đồ cùng tham chiếu thay vì nhúng riêng vào từng file.
+    """
+    import plotly.offline
+
+    bundle_name = plotly_bundle_name()
+    bundle_path = os.path.join(bundle_dir, bundle_name)
+    if not os.path.exists(bundle_path):
+        with open(bundle_path, 'w', encoding='utf-8') as f:
+            f.write(plotly.offline.get_plotlyjs())
+        print(f"✓ Đã ghi thư viện Plotly dùng chung: {bundle_name}")
+    return bundle_name
+
+def wordcloud_job(news_text, static_dir, cache_dir=None, scales=news_wordcloud.SCALES,
+                  formats=news_wordcloud.FORMATS):
+    return {'name': 'news_wordcloud', 'render': render_news_wordcloud,
+            'data': news_wordcloud.word_frequencies(news_text, cache_dir),
+            'params': {'scales': list(scales), 'formats': list(formats), 'seed': news_wordcloud.RANDOM_SEED,
+                       'title': news_wordcloud.TITLE},
+            'output': os.path.join(static_dir, 'news_wordcloud.png')}
+
+def monthly_volume_frame(rollups):
+    """
+    Tổng khối lượng theo Năm/Tháng (Year, Month, Volume) từ bảng tổng hợp cấp tháng, dùng cho treemap/sunburst.
+    """
+    import rollup_store
+
+    return (rollup_store.query(rollups, 'month', 'Volume', ['sum'])
+            .rename(columns={'sum': 'Volume'})[['Year', 'Month', 'Volume']])
+
+# Mỗi hàm *_chart_data dựng dữ liệu và tham số vẽ của đúng một biểu đồ tương tác từ df của một mã.
+# options gồm 'mode' (cách vẽ đã chọn, xem downsampling.resolve_render_mode), 'max_points', 'downsample',
+# 'scatter_points', 'ticker', 'company' và 'rollups' (có thể None). Trả về (dữ liệu, tham số của hàm vẽ).
+
+def price_over_time_chart_data(df, options):
+    if options['mode'] == 'density':
+        # Lưới mật độ đếm trên mọi dòng nên không giảm mẫu
+        data = df[['Date', 'Close']]
+    else:
+        data = downsampling.downsample_frame(df[['Date', 'Close']], 'Date', 'Close', options['max_points'],
+                                             options['downsample'])
+    return data, {'ticker': options['ticker'], 'render_mode': options['mode']}
+
+def volume_over_time_chart_data(df, options):
+    if options['mode'] == 'density':
+        data = df[['Date', 'Volume']]
+    else:
+        data = downsampling.downsample_frame(df[['Date', 'Volume']], 'Date', 'Volume', options['max_points'],
+                                             options['downsample'])
+    return data, {'render_mode': options['mode']}
+
+def scatter_regression_chart_data(df, options):
+    import regression
+
+    # Đường hồi quy dùng mọi dòng; biểu đồ chỉ vẽ mẫu điểm phân tầng theo năm (seed cố định)
+    fit = regression.ols_fit(df['High'], df['Low'])
+    if options['mode'] == 'density':
+        data = df[['High', 'Low']]
+    else:
+        data = regression.stratified_sample(df[['Year', 'High', 'Low']],
+                                            options['scatter_points'] or len(df))[['High', 'Low']]
+    return data, {'fit': fit, 'render_mode': options['mode']}
+
+def price_indicators_chart_data(df, options):
+    data = downsampling.downsample_frame(df[['Date'] + PRICE_INDICATOR_COLUMNS], 'Date', 'Close',
+                                         options['max_points'], options['downsample'])
+    # Nhiều đường chồng nhau nên không chuyển sang mật độ
+    mode = 'webgl' if options['mode'] == 'density' else options['mode']
+    return data, {'ticker': options['ticker'], 'render_mode': mode}
+
+def _monthly_volume(df, options):
+    if options.get('rollups') is not None:
+        return monthly_volume_frame(options['rollups'])
+    # Chỉ cần tổng theo tháng: không dựng cả bảng tổng hợp (phân vị, râu boxplot...) cho một biểu đồ
+    return df.groupby(['Year', 'Month'], as_index=False, sort=True)['Volume'].sum()
+
+def volume_treemap_chart_data(df, options):
+    return _monthly_volume(df, options), {}
+
+def volume_sunburst_chart_data(df, options):
+    return _monthly_volume(df, options), {'ticker': options['ticker'], 'company': options['company']}
+
+# Biểu đồ tương tác -> (hàm vẽ, hàm dựng dữ liệu). get_chart_jobs dùng khi build cả trang; server
+# (render_chart_payload) chỉ dựng đúng biểu đồ được yêu cầu và nguồn dữ liệu của nó.
+INTERACTIVE_CHARTS = {
+    'price_over_time': (render_price_over_time, price_over_time_chart_data),
+    'volume_over_time': (render_volume_over_time, volume_over_time_chart_data),
+    'scatter_regression': (render_scatter_regression, scatter_regression_chart_data),
+    'volume_treemap': (render_volume_treemap, volume_treemap_chart_data),
+    'volume_sunburst': (render_volume_sunburst, volume_sunburst_chart_data),
+    'price_indicators': (render_price_indicators, price_indicators_chart_data),
+}
+
+def get_chart_jobs(df, news_text, static_dir, interactive_dir, include_plotlyjs=True,
+                   downsample='lttb', max_points=2000, aggregates=None, ticker='AAPL', company='Apple',
+                   chart_mode='html', data_dir=None, rollups=None, cache_dir=None,
+                   wordcloud_scales=news_wordcloud.SCALES, wordcloud_formats=news_wordcloud.FORMATS,
+                   render_mode='auto', scatter_points=SCATTER_SAMPLE_SIZE):
+    """
+    Mô tả các biểu đồ (kèm ảnh xem trước của biểu đồ tương tác) dưới dạng các "job" độc lập: mỗi job chỉ nhận đúng
+    phần dữ liệu nó cần, nhờ vậy có thể tính khóa cache riêng cho từng biểu đồ.
+
+    Nếu có `aggregates` (chế độ đọc theo chunk), histogram, boxplot, violin, heatmap, treemap và sunburst
+    được vẽ từ các phép tổng hợp và sketch (sketches); nếu df là None thì chỉ các biểu đồ đó được tạo.
+    WordCloud bị bỏ qua khi news_text là None (vd: dùng chung một WordCloud cho nhiều mã); dữ liệu của nó là
+    bảng tần suất từ gộp từ chỉ mục theo từng tin trong `cache_dir`, nên tin không đổi thì khóa cache không đổi.
+
+    Với chart_mode='data', biểu đồ tương tác được ghi thành file cấu hình <tên>.figure.json trong data_dir,
+    kèm các job xuất chuỗi dữ liệu dùng chung (CHART_DATA_SOURCES) thành file JSON dạng cột.
+
+    Treemap, sunburst và boxplot đọc từ bảng tổng hợp `rollups` (rollup_store) thay vì quét lại df;
+    nếu không truyền vào, các cấp tháng/năm được dựng tại chỗ từ df.
+
+    render_mode (downsampling.RENDER_MODES) chọn cách vẽ biểu đồ giá/khối lượng/scatter: 'auto' chuyển sang
+    WebGL rồi sang heatmap mật độ theo số dòng dữ liệu của mã (trước khi giảm mẫu). scatter_points là số điểm mẫu của scatter (0: mọi dòng).
+    """
+    import indicators
+    import regression
+    import rollup_store
+    import sketches
+    import stream_aggregates
+
+    jobs = []
+    if rollups is None and df is not None:
+        rollups = rollup_store.build_rollups(df, levels=['month', 'year'])
+
+    def interactive_job(name, render, data, **params):
+        if chart_mode == 'data':
+            return {'name': name, 'render': render, 'data': data,
+                    'params': {**params, 'data_source': CHART_DATA_SOURCES[name]},
+                    'output': os.path.join(data_dir, name + chart_data.FIGURE_SUFFIX)}
+        return {'name': name, 'render': render, 'data': data,
+                'params': {**params, 'include_plotlyjs': include_plotlyjs},
+                'output': os.path.join(interactive_dir, f'{name}.html')}
+
+    def data_job(source, frame):
+        return {'name': source, 'render': chart_data.write_chart_data, 'data': frame, 'params': {},
+                'output': os.path.join(data_dir, f'{source}.json')}
+
+    if aggregates is not None:
+        hist_sketch, yearly = aggregates['histogram'], aggregates['yearly']
+        corr = stream_aggregates.correlation_frame(aggregates)
+        df_grouped = stream_aggregates.monthly_volume_frame(aggregates)
+    else:
+        hist_sketch, yearly = sketches.binned_sketch(df['Daily_Change_Percent']), None
+        corr = df[stream_aggregates.CORR_COLS].corr()
+        df_grouped = monthly_volume_frame(rollups)
+
+    # Boxplot/violin của 15 năm gần nhất. Có frame thì bảng tổng hợp (luôn được dựng từ df) cho phân vị
+    # chính xác của boxplot; không có frame (df=None, chỉ có aggregates) thì cả hai được vẽ từ sketch
+    # theo năm đã cộng dồn khi đọc theo chunk.
+    if rollups is not None:
+        since_year = rollups['year']['Year'].max() - 15
+        box_stats = rollup_store.query(rollups, 'year', 'Close', ['q25', 'q50', 'q75', 'whislo', 'whishi'],
+                                       since_year=since_year)
+    else:
+        since_year = sketches.latest_year(yearly) - 15
+        box_stats = sketches.yearly_box_frame(yearly, since_year)
+    if yearly is None:
+        # Violin chỉ cần histogram % thay đổi của các năm được vẽ, không cần sketch giá đóng cửa
+        yearly = sketches.yearly_change_sketches(df[df['Year'] > since_year])
+
+    jobs += [
+        {'name': 'daily_change_histogram', 'render': render_daily_change_histogram,
+         'data': sketches.histogram_frame(hist_sketch, target_bins=50), 'params': {},
+         'output': os.path.join(static_dir, 'daily_change_histogram.png')},
+        {'name': 'price_boxplot_by_year', 'render': render_price_boxplot,
+         'data': box_stats, 'params': {},
+         'output': os.path.join(static_dir, 'price_boxplot_by_year.png')},
+        {'name': 'daily_change_violin_by_year', 'render': render_daily_change_violin,
+         'data': sketches.yearly_violin_frame(yearly, since_year), 'params': {},
+         'output': os.path.join(static_dir, 'daily_change_violin_by_year.png')},
+        # Làm tròn theo độ chính xác hiển thị (fmt='.2f'): vài dòng mới không làm heatmap bị vẽ lại
+        {'name': 'correlation_heatmap', 'render': render_correlation_heatmap,
+         'data': corr.round(2), 'params': {},
+         'output': os.path.join(static_dir, 'correlation_heatmap.png')},
+        interactive_job('volume_treemap', render_volume_treemap, df_grouped),
+        interactive_job('volume_sunburst', render_volume_sunburst, df_grouped, ticker=ticker, company=company),
+        {'name': 'volume_by_year_preview', 'render': render_chart_preview,
+         'data': df_grouped.groupby('Year', as_index=False)['Volume'].sum(),
+         'params': {'kind': 'bar', 'x': 'Year', 'y': 'Volume', 'title': 'Khối lượng giao dịch theo Năm'},
+         'output': os.path.join(static_dir, CHART_PREVIEWS['volume_treemap'])},
+    ]
+    if chart_mode == 'data':
+        jobs.append(data_job('volume_by_month', df_grouped))
+
+    if news_text is not None:
+        jobs.append(wordcloud_job(news_text, static_dir, cache_dir, wordcloud_scales, wordcloud_formats))
+
+    if df is None:
+        return jobs
+
+    if not indicators.has_indicators(df):
+        df = indicators.add_indicators(df)
+    df_recent = df[df['Year'] > since_year]
+    # 'auto' chọn cách vẽ theo số dòng gốc của mã (trước khi giảm mẫu/lấy mẫu): sau khi giảm mẫu mọi chuỗi
+    # chỉ còn vài nghìn điểm nên nếu xét số điểm được vẽ thì không bao giờ đạt ngưỡng WebGL/mật độ
+    options = {'mode': downsampling.resolve_render_mode(len(df), render_mode), 'max_points': max_points,
+               'downsample': downsample, 'scatter_points': scatter_points, 'ticker': ticker, 'company': company}
+    series = {name: INTERACTIVE_CHARTS[name][1](df, options)
+              for name in ('price_over_time', 'scatter_regression', 'volume_over_time', 'price_indicators')}
+    df_price, df_volume, df_indicators = (series[name][0] for name in
+                                          ('price_over_time', 'volume_over_time', 'price_indicators'))
+
+    if chart_mode == 'data':
+        # Biểu đồ mật độ lưu sẵn lưới số đếm trong file cấu hình nên không cần xuất chuỗi dữ liệu gốc
+        jobs += [data_job(CHART_DATA_SOURCES[name], data) for name, (data, params) in series.items()
+                 if params['render_mode'] != 'density']
+
+    jobs += [interactive_job(name, INTERACTIVE_CHARTS[name][0], data, **params)
+             for name, (data, params) in series.items()]
+    jobs += [
+        {'name': 'indicator_panels', 'render': render_indicator_panels,
+         'data': df_recent[['Date', f'RSI_{indicators.RSI_PERIOD}', f'Volatility_{indicators.VOLATILITY_WINDOW}',
+                            'Drawdown_Percent']], 'params': {},
+         'output': os.path.join(static_dir, 'indicator_panels.png')},
+        {'name': 'price_over_time_preview', 'render': render_chart_preview,
+         'data': df_price, 'params': {'kind': 'line', 'x': 'Date', 'y': 'Close', 'title': f'Giá đóng cửa ({ticker})'},
+         'output': os.path.join(static_dir, CHART_PREVIEWS['price_over_time'])},
+        {'name': 'scatter_regression_preview', 'render': render_chart_preview,
+         'data': regression.stratified_sample(df[['Year', 'High', 'Low']], SCATTER_PREVIEW_SIZE)[['High', 'Low']],
+         'params': {'kind': 'scatter', 'x': 'High', 'y': 'Low', 'title': 'High vs Low'},
+         'output': os.path.join(static_dir, CHART_PREVIEWS['scatter_regression'])},
+        {'name': 'volume_over_time_preview', 'render': render_chart_preview,
+         'data': df_volume, 'params': {'kind': 'area', 'x': 'Date', 'y': 'Volume', 'title': 'Khối lượng giao dịch'},
+         'output': os.path.join(static_dir, CHART_PREVIEWS['volume_over_time'])},
+        {'name': 'price_indicators_preview', 'render': render_chart_preview,
+         'data': df_indicators, 'params': {'kind': 'line', 'x': 'Date', 'y': 'Close',
+                                            'title': f'Giá & chỉ báo kỹ thuật ({ticker})'},
+         'output': os.path.join(static_dir, CHART_PREVIEWS['price_indicators'])},
+    ]
+    return jobs
+
+def create_visualizations(df, news_text, static_dir, interactive_dir, use_cache=True, cache_dir=None,
+                          workers=None, plotly_js='shared', downsample='lttb', max_points=2000,
+                          aggregates=None, ticker='AAPL', company='Apple', plotly_bundle_dir=None,
+                          chart_mode='html', data_dir=None, rollups=None, wordcloud_scales=news_wordcloud.SCALES,
+                          wordcloud_formats=news_wordcloud.FORMATS, render_mode='auto',
+                          scatter_points=SCATTER_SAMPLE_SIZE):
+    print("Đang tạo biểu đồ (phiên bản 10 biểu đồ)...")
+
+    if chart_mode == 'data':
+        # Trang tự vẽ biểu đồ từ charts_data/ nên plotly.js luôn là file riêng (dùng chung hoặc CDN)
+        data_dir = data_dir or os.path.join(os.path.dirname(os.path.abspath(interactive_dir)), chart_data.DATA_DIR_NAME)
+        os.makedirs(data_dir, exist_ok=True)
+        if plotly_js == 'inline':
+            plotly_js = 'shared'
+
+    # 'shared': một file plotly.js dùng chung | 'inline': nhúng vào từng biểu đồ | 'cdn': tải từ CDN
+    if plotly_js == 'shared':
+        # plotly_bundle_dir cho phép nhiều dashboard (nhiều mã cổ phiếu) dùng chung một file
+        bundle_dir = plotly_bundle_dir or interactive_dir
+        bundle_path = os.path.join(bundle_dir, write_plotly_bundle(bundle_dir))
+        include_plotlyjs = os.path.relpath(bundle_path, interactive_dir).replace(os.sep, '/')
+    elif plotly_js == 'cdn':
+        include_plotlyjs = 'cdn'
+    else:
+        include_plotlyjs = True
+
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(static_dir)), build_cache.CACHE_DIR_NAME)
+
+    manifest = build_cache.load_manifest(cache_dir) if use_cache else {}
+    versions = build_cache.get_library_versions()
+
+    pending, cached = [], []
+    chart_jobs = get_chart_jobs(df, news_text, static_dir, interactive_dir, include_plotlyjs,
+                                downsample=downsample, max_points=max_points, aggregates=aggregates,
+                                ticker=ticker, company=company, chart_mode=chart_mode, data_dir=data_dir,
+                                rollups=rollups, cache_dir=cache_dir, wordcloud_scales=wordcloud_scales,
+                                wordcloud_formats=wordcloud_formats, render_mode=render_mode,
+                                scatter_points=scatter_points)
+    for job in chart_jobs:
+        job['key'] = build_cache.compute_chart_key(job['render'], job['data'], job['params'], versions)
+        if use_cache and build_cache.is_chart_fresh(manifest, job['name'], job['key'], job['output']):
+            print(f"↷ Bỏ qua {job['name']} (dữ liệu không đổi)")
+            cached.append({'name': job['name'], 'output': job['output'], 'ok': True, 'error': None,
+                           'seconds': 0.0, 'cached': True})
+            continue
+        pending.append(job)
+
+    results = chart_scheduler.render_chart_jobs(pending, workers=workers)
+    for job, result in zip(pending, results):
+        if result['ok'] and all(os.path.exists(path) for path in result['outputs']):
+            build_cache.record_chart(manifest, job['name'], job['key'], result['outputs'])
+        else:
+            manifest.pop(job['name'], None)
+
+    build_cache.save_manifest(cache_dir, manifest)
+    failed = chart_scheduler.report_chart_errors(results)
+    print(f"Tạo biểu đồ... Xong (vẽ lại {len(pending) - len(failed)}, dùng cache {len(cached)}, lỗi {len(failed)}).")
+    return results + cached
 
 # HÀM NÀY BỊ THIẾU TRONG FILE CỦA BẠN
-def get_navigation_menu(current_page=""):
+def get_navigation_menu(current_page="", include_story=True, hub_href=None):
     pages = {
         "index.html": "Trang chủ (Tổng quan)",
         "1_timeseries.html": "Phân tích Thời gian",
@@ -452,8 +854,12 @@ def get_navigation_menu(current_page=""):
         "3_relationships.html": "Phân tích Quan hệ",
         "4_storytelling.html": "Câu chuyện Dữ liệu"
     }
+    if not include_story:
+        pages.pop("4_storytelling.html")
     
     menu_html = '<nav>'
+    if hub_href:
+        menu_html += f'<a href="{hub_href}">&larr; Tất cả mã</a>'
     for page_file, page_title in pages.items():
         active_class = 'active' if page_file == current_page else ''
         menu_html += f'<a href="{page_file}" class="{active_class}">{page_title}</a>'
@@ -461,367 +867,772 @@ def get_navigation_menu(current_page=""):
     menu_html += '</nav>'
     return menu_html
 
-def create_html_pages(base_dir, static_dir_name, interactive_dir_name):
+def create_html_pages(base_dir, static_dir_name, interactive_dir_name, ticker='AAPL', company='Apple',
+                      wordcloud_variants=None, hub_href=None, shared_assets=None, asset_manifest=None,
+                      chart_mode='html', plotly_src=None):
+    """
+    Tạo các trang HTML từ templates/ (bố cục chung + khối nội dung + thẻ biểu đồ).
+    CSS/JS dùng chung nằm ở assets/ với tên có mã băm; `shared_assets` là kết quả của
+    page_templates.write_shared_assets khi nhiều dashboard dùng chung một bản (mặc định: ghi vào base_dir).
+    `asset_manifest` (từ asset_pipeline.fingerprint_outputs) đổi đường dẫn biểu đồ sang tên đã băm.
+    Với chart_mode='data', biểu đồ tương tác được vẽ ngay trên trang từ charts_data/ bằng plotly.js
+    tại `plotly_src` (mặc định: file dùng chung trong thư mục biểu đồ tương tác).
+    `wordcloud_variants` là các bản WordCloud [(định dạng, tỉ lệ, đường dẫn)] khi dùng chung giữa nhiều mã.
+    Trang nào có nội dung không đổi thì không ghi lại. Trả về danh sách đường dẫn các trang.
+    """
     print("Đang tạo các trang web HTML (phiên bản nâng cấp V4)...")
-    
-    global_css = get_global_css()
-    
-    modal_html_and_js = """
-        <div class="modal-overlay" id="chartModal">
-            <span class="modal-close" id="modalCloseButton">&times;</span>
-            <div class="modal-content" id="modalContent">
-                </div>
-        </div>
-        <script>
-            document.addEventListener('DOMContentLoaded', () => {
-                const modal = document.getElementById('chartModal');
-                const modalContent = document.getElementById('modalContent');
-                const closeModal = document.getElementById('modalCloseButton');
-                const charts = document.querySelectorAll('.chart-card img, .chart-card iframe');
-                charts.forEach(chart => {
-                    chart.addEventListener('click', (e) => {
-                        e.preventDefault(); 
-                        modalContent.innerHTML = '';
-                        let newElement;
-                        if (chart.tagName === 'IMG') {
-                            newElement = document.createElement('img');
-                            newElement.src = chart.src;
-                        } else if (chart.tagName === 'IFRAME') {
-                            newElement = document.createElement('iframe');
-                            newElement.src = chart.src;
-                            newElement.setAttribute('frameborder', '0');
-                        }
-                        if (newElement) {
-                            modalContent.appendChild(newElement);
-                            modal.classList.add('visible');
-                        }
-                    });
-                });
-                const closeTheModal = () => {
-                    modal.classList.remove('visible');
-                    modalContent.innerHTML = '';
-                };
-                closeModal.addEventListener('click', closeTheModal);
-                modal.addEventListener('click', (e) => {
-                    if (e.target === modal) {
-                        closeTheModal();
-                    }
-                });
-            });
-        </script>
-    """
-
-    html_index = f"""
-    <html>
-        <head>
-            <title>Trang chủ - Dashboard Cổ phiếu Apple</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            {global_css}
-        </head>
-        <body>
-            {get_navigation_menu("index.html")}
-            <div class="container">
-                <h1>Trang chủ: Tổng quan Tin tức & Tương quan</h1>
-                <p>Tổng hợp các tin tức và mối tương quan của cổ phiếu Apple (AAPL). (Click vào biểu đồ để xem toàn màn hình)</p>
-                <div class="chart-grid">
-                    <div class="chart-card">
-                        <h2>WordCloud Tin tức</h2>
-                        <p class="insight"><strong>Insight:</strong> Các từ khóa nổi bật trong tin tức gần đây.</p>
-                        <img src="{static_dir_name}/news_wordcloud.png" alt="WordCloud Tin tức">
-                    </div>
-                    <div class="chart-card">
-                        <h2>Heatmap Tương quan</h2>
-                        <p class="insight"><strong>Insight:</strong> 'Open', 'High', 'Low', 'Close' tương quan 1:1. Mối quan hệ giữa 'Volume' và 'Daily_Change' không rõ rệt.</p>
-                        <img src="{static_dir_name}/correlation_heatmap.png" alt="Heatmap Tương quan">
-                    </div>
-                </div>
-            </div>
-            {modal_html_and_js}
-        </body>
-    </html>
-    """
-    with open(os.path.join(base_dir, 'index.html'), 'w', encoding='utf-8') as f:
-        f.write(html_index)
-
-    html_page1 = f"""
-    <html>
-        <head>
-            <title>Phân tích Thời gian</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            {global_css}
-        </head>
-        <body>
-            {get_navigation_menu("1_timeseries.html")}
-            <div class="container">
-                <h1>Phân tích Biến động theo Thời gian (Tương tác)</h1>
-                <p>Click vào biểu đồ để mở chế độ xem lớn (vẫn giữ nguyên tương tác).</p>
-                <div class="chart-grid">
-                    <div class="chart-card">
-                        <h2>Biểu đồ Đường: Giá Đóng cửa</h2>
-                        <p class="insight"><strong>Insight:</strong> Cho thấy sự tăng trưởng dài hạn. Bạn có thể zoom vào để xem các đợt khủng hoảng và phục hồi.</p>
-                        <iframe src="{interactive_dir_name}/price_over_time.html" height="500" title="Biểu đồ đường giá đóng cửa"></iframe>
-                    </div>
-                    <div class="chart-card">
-                        <h2>Biểu đồ Vùng: Khối lượng Giao dịch</h2>
-                        <p class="insight"><strong>Insight:</strong> Những đỉnh khối lượng đột biến thường xảy ra khi có tin tức lớn (báo cáo tài chính, ra mắt sản phẩm).</p>
-                        <iframe src="{interactive_dir_name}/volume_over_time.html" height="500" title="Biểu đồ vùng khối lượng giao dịch"></iframe>
-                    </div>
-                </div>
-            </div>
-            {modal_html_and_js}
-        </body>
-    </html>
-    """
-    with open(os.path.join(base_dir, '1_timeseries.html'), 'w', encoding='utf-8') as f:
-        f.write(html_page1)
-
-    html_page2 = f"""
-    <html>
-        <head>
-            <title>Phân tích Phân phối & Rủi ro</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            {global_css}
-        </head>
-        <body>
-            {get_navigation_menu("2_distributions.html")}
-            <div class="container">
-                <h1>Phân tích Phân phối & Rủi ro (Tĩnh)</h1>
-                <p>Click vào biểu đồ để phóng to và xem chi tiết hơn.</p>
-                <div class="chart-grid">
-                    <div class="chart-card">
-                        <h2>Histogram % Thay đổi hàng ngày</h2>
-                        <p class="insight"><strong>Insight:</strong> Hầu hết các ngày, giá chỉ thay đổi nhẹ (quanh 0%). Các "đuôi" (tails) ở 2 bên thể hiện rủi ro "sự kiện bất ngờ".</p>
-                        <img src="{static_dir_name}/daily_change_histogram.png" alt="Histogram % Thay đổi hàng ngày">
-                    </div>
-                    <div class="chart-card">
-                        <h2>Boxplot Giá đóng cửa (15 năm gần nhất)</h2>
-                        <p class="insight"><strong>Insight:</strong> Cho thấy xu hướng tăng giá (hộp đi lên) và mức độ biến động (hộp càng dài, biến động càng lớn) qua từng năm.</p>
-                        <img src="{static_dir_name}/price_boxplot_by_year.png" alt="Boxplot Giá đóng cửa">
-                    </div>
-                    <div class="chart-card">
-                        <h2>Violin Plot: % Thay đổi hàng ngày </h2>
-                        <p class="insight"><strong>Insight:</strong> Kết hợp Histogram và Boxplot. Phần "thân đàn" phình to cho thấy dữ liệu tập trung (quanh 0%) ở các năm.</p>
-                        <img src="{static_dir_name}/daily_change_violin_by_year.png" alt="Violin Plot % Thay đổi hàng ngày">
-                    </div>
-                </div>
-            </div>
-            {modal_html_and_js}
-        </body>
-    </html>
-    """
-    with open(os.path.join(base_dir, '2_distributions.html'), 'w', encoding='utf-8') as f:
-        f.write(html_page2)
-    
-    html_page3 = f"""
-    <html>
-        <head>
-            <title>Phân tích Mối quan hệ & Phân cấp</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            {global_css}
-        </head>
-        <body>
-            {get_navigation_menu("3_relationships.html")}
-            <div class="container">
-                <h1>Phân tích Mối quan hệ & Phân cấp (Tương tác)</h1>
-                <p>Click vào biểu đồ để mở chế độ xem lớn (vẫn giữ nguyên tương tác).</p>
-                <div class="chart-grid">
-                    <div class="chart-card">
-                        <h2>Scatter Plot High vs Low (Tương tác)</h2>
-                        <p class="insight"><strong>Insight:</strong> Các điểm tập trung dày đặc quanh đường chéo cho thấy mối tương quan 1:1, thể hiện tính nhất quán của dữ liệu.</p>
-                        <iframe src="{interactive_dir_name}/scatter_regression.html" height="500" title="Scatter Plot High vs Low"></iframe>
-                    </div>
-                    <div class="chart-card">
-                        <h2>Treemap Khối lượng Giao dịch (Tương tác)</h2>
-                        <p class="insight"><strong>Insight:</strong> Nhấp vào một năm (ví dụ: 2020) để "zoom" vào và xem tháng nào trong năm đó có giao dịch sôi động nhất.</p>
-                        <iframe src="{interactive_dir_name}/volume_treemap.html" height="700" title="Treemap Khối lượng Giao dịch"></iframe>
-                    </div>
-                    <div class="chart-card">
-                        <h2>Sunburst Khối lượng Giao dịch (Tương tác)</h2>
-                        <p class="insight"><strong>Insight:</strong> Tương tự Treemap nhưng ở dạng hình tròn. Vòng trong là Năm, vòng ngoài là Tháng. Giúp so sánh trực quan các tháng.</p>
-                        <iframe src="{interactive_dir_name}/volume_sunburst.html" height="700" title="Sunburst Khối lượng Giao dịch"></iframe>
-                    </div>
-                </div>
-            </div>
-            {modal_html_and_js}
-        </body>
-    </html>
-    """
-    with open(os.path.join(base_dir, '3_relationships.html'), 'w', encoding='utf-8') as f:
-        f.write(html_page3)
-        
-    html_page4 = f"""
-    <html>
-        <head>
-            <title>Câu chuyện Dữ liệu Apple</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            {global_css}
-            <style>
-                .story-container {{
-                    max-width: 900px;
-                    margin: 20px auto;
-                    line-height: 1.7;
-                    font-size: 1.1em;
-                }}
-                .story-container h2 {{
-                    color: #0056b3;
-                    border-bottom: 2px solid #007bff;
-                    padding-bottom: 10px;
-                    margin-top: 40px;
-                }}
-                .story-container .chart-card {{
-                    margin-top: 20px;
-                    margin-bottom: 30px;
-                }}
-                .story-container .insight {{
-                    font-size: 1.1em;
-                    line-height: 1.6;
-                }}
-            </style>
-        </head>
-        <body>
-            {get_navigation_menu("4_storytelling.html")}
-            
-            <div class="container story-container">
-                <h1>Câu chuyện của Apple qua 45 năm Dữ liệu</h1>
-                <p>Dữ liệu không chỉ là những con số. Đó là những câu chuyện. Bằng cách nhìn vào lịch sử giá cổ phiếu Apple (AAPL) từ 1980 đến 2025,
-                chúng ta có thể thấy được một trong những hành trình kinh doanh đáng kinh ngạc nhất lịch sử.</p>
-
-                <h2>Chương 1: Sự Khởi đầu Khiêm tốn và Sự Sống còn</h2>
-                <p>Nhìn vào biểu đồ giá dài hạn, chúng ta thấy một đường gần như bằng phẳng kéo dài suốt 20 năm đầu tiên (1980-2000). 
-                Đây là thời kỳ Apple chỉ là một công ty máy tính thích hợp (niche), chật vật cạnh tranh và thậm chí suýt phá sản.</p>
-                <p>Giá cổ phiếu (đã điều chỉnh) gần như bằng 0. Nếu bạn zoom vào, bạn sẽ thấy sự biến động, nhưng trên bức tranh toàn cảnh, 
-                đó chỉ là một đường thẳng. Đó là câu chuyện về sự sống còn.</p>
-                
-                <div class="chart-card">
-                    <h3>Biểu đồ Đường: Giá Đóng cửa (1980 - 2025)</h3>
-                    <p class="insight">
-                        <strong>Insight:</strong> Toàn bộ sự tăng trưởng dường như chỉ xảy ra sau năm 2005. 
-                        Điều này cho thấy tầm quan trọng của việc "tái phát minh" công ty. 
-                        Bạn có thể click vào biểu đồ và dùng công cụ zoom để xem kỹ 20 năm đầu tiên.
-                    </p>
-                    <iframe src="{interactive_dir_name}/price_over_time.html" height="500" title="Biểu đồ đường giá đóng cửa"></iframe>
-                </div>
-
-                <h2>Chương 2: Cuộc Cách mạng iPhone (2007)</h2>
-                <p>Một điều gì đó đã thay đổi rõ rệt vào khoảng năm 2007. Đó chính là iPhone. 
-                Đây không chỉ là một sản phẩm mới; đó là một "điểm uốn" (inflection point) đã thay đổi quỹ đạo của công ty mãi mãi.
-                Từ thời điểm đó, đường giá bắt đầu một quỹ đạo gần như thẳng đứng.</p>
-                
-                <p>Nhưng không chỉ giá cả. Hãy nhìn vào khối lượng giao dịch. Sự quan tâm (và tiền bạc) của thị trường 
-                đổ vào Apple tăng vọt. Những "ngọn núi" về khối lượng giao dịch đột nhiên xuất hiện, thường trùng với các sự kiện ra mắt sản phẩm 
-                hoặc báo cáo tài chính quan trọng.</p>
-                
-                <div class="chart-card">
-                    <h3>Biểu đồ Vùng: Khối lượng Giao dịch</h3>
-                    <p class="insight">
-                        <strong>Insight:</strong> Khối lượng giao dịch (sự quan tâm) bùng nổ sau kỷ nguyên iPhone. 
-                        Những đợt tăng đột biến khổng lồ (như giai đoạn 2008, 2020) cho thấy những thời điểm thị trường 
-                        vừa phấn khích vừa hoảng sợ, nhưng luôn tập trung vào Apple.
-                    </p>
-                    <iframe src="{interactive_dir_name}/volume_over_time.html" height="500" title="Biểu đồ vùng khối lượng giao dịch"></iframe>
-                </div>
-
-                <h2>Chương 3: Tính cách của một Gã khổng lồ</h2>
-                <p>Khi đã trở thành công ty lớn nhất thế giới, Apple có còn rủi ro không? Biểu đồ Histogram về % thay đổi hàng ngày cho chúng ta câu trả lời.</p>
-                <p>Hầu hết các ngày (phần đỉnh nhọn ở giữa), cổ phiếu Apple rất "buồn tẻ", chỉ di chuyển nhẹ quanh 0%. 
-                Đây là đặc điểm của một cổ phiếu vốn hóa lớn, ổn định. 
-                Nhưng... hãy nhìn vào hai "cái đuôi" (tails) ở hai bên. Luôn có những ngày hiếm hoi mà cổ phiếu 
-                tăng hoặc giảm cực mạnh (5-10%).</p>
-                
-                <div class="chart-card">
-                    <h3>Histogram % Thay đổi hàng ngày</h3>
-                    <p class="insight">
-                        <strong>Insight:</strong> Apple là một cổ phiếu <strong>ổn định nhưng không nhàm chán</strong>. 
-                        Nó ổn định 95% thời gian, nhưng 5% còn lại là những biến động cực lớn. 
-                        Đây là rủi ro và cũng là cơ hội mà dữ liệu cảnh báo.
-                    </p>
-                    <img src="{static_dir_name}/daily_change_histogram.png" alt="Histogram % Thay đổi hàng ngày">
-                </div>
-                
-                <h2>Chương 4: Thị trường đang Nghĩ gì?</h2>
-                <p>Cuối cùng, chúng ta có thể kết hợp dữ liệu để hiểu "tâm lý thị trường". 
-                Biểu đồ Treemap cho thấy những năm và tháng nào "nóng" nhất về giao dịch (các ô càng lớn, khối lượng càng nhiều). 
-                Thường thì đó là các tháng cuối năm (mùa lễ hội, ra mắt sản phẩm) hoặc các giai đoạn khủng hoảng (như đầu năm 2020).</p>
-                
-                <p>Khi kết hợp với WordCloud (lấy từ tin tức), chúng ta thấy thị trường đang tập trung vào đâu. 
-                Những từ như "iPhone", "Pro", "Doanh thu" (Revenue) luôn là trung tâm. Câu chuyện của Apple luôn xoay quanh 
-                sự đổi mới sản phẩm và kết quả tài chính.</p>
-
-                <div class="chart-grid">
-                    <div class="chart-card">
-                        <h2>Treemap Khối lượng Giao dịch</h2>
-                        <p class="insight">Click vào các năm để xem tháng nào sôi động nhất.</p>
-                        <iframe src="{interactive_dir_name}/volume_treemap.html" height="500" title="Treemap Khối lượng Giao dịch"></iframe>
-                    </div>
-                    <div class="chart-card">
-                        <h2>WordCloud Tin tức</h2>
-                        <p class="insight">Thị trường luôn tập trung vào sản phẩm và lợi nhuận.</p>
-                        <img src="{static_dir_name}/news_wordcloud.png" alt="WordCloud Tin tức">
-                    </div>
-                </div>
-
-                <h2>Kết luận</h2>
-                <p>Câu chuyện của Apple, được kể qua dữ liệu, là một câu chuyện về sự kiên nhẫn và sự bùng nổ. 
-                Hơn 20 năm đầu kiên trì gần như vô hình, theo sau là 20 năm tăng trưởng phi mã được thúc đẩy 
-                bởi sự đổi mới mang tính cách mạng (iPhone). Dữ liệu cho thấy rõ ràng Apple đã biến mình 
-                từ một công ty máy tính thích hợp thành một gã khổng lồ về công nghệ tiêu dùng, và thị trường 
-                đã phản ứng lại bằng sự quan tâm và giá trị bùng nổ.</p>
-
-            </div>
-            {modal_html_and_js}
-        </body>
-    </html>
-    """
-    with open(os.path.join(base_dir, '4_storytelling.html'), 'w', encoding='utf-8') as f:
-        f.write(html_page4)
-    
-    print("Tạo các trang web HTML... Xong (phiên bản V4 - có Storytelling).")
 
-# KHỐI THỰC THI NÀY ĐÃ ĐƯỢC CẬP NHẬT
-if __name__ == "__main__":
-    # --- THAY ĐỔI LỚN ---
-    print("--- BƯỚC 1: CÀI ĐẶT & TẢI DỮ LIỆU ---")
-    
-    KAGGLE_API_KEY = {"username":"hoangtuanjs","key":"28bed3d819cf1400ed7ded78868f3486"}
-    
-    # Cài đặt API key vào vị trí
-    setup_kaggle_api(KAGGLE_API_KEY)
-    
-    # Tải dataset và lấy đường dẫn file CSV
-    DATA_FILE_PATH = download_kaggle_dataset()
-    print("-" * 30 + "\n")
+    # Trang "Câu chuyện Dữ liệu" chỉ viết cho Apple
+    include_story = ticker == 'AAPL'
+    asset_manifest = asset_manifest or {}
+    if wordcloud_variants is None:
+        wordcloud_variants = news_wordcloud.manifest_variants(asset_manifest, f"{static_dir_name}/news_wordcloud.png")
+    if shared_assets is None:
+        shared_assets = page_templates.write_shared_assets(base_dir)
+    hrefs = page_templates.asset_hrefs(shared_assets, base_dir)
+
+    card = page_templates.chart_card
+
+    def image(src, alt):
+        return page_templates.image_media(asset_manifest.get(src, src), alt)
+
+    if plotly_src is None:
+        plotly_src = f"{interactive_dir_name}/{plotly_bundle_name()}"
+
+    def iframe(chart_name, height, title):
+        preview = f"{static_dir_name}/{CHART_PREVIEWS[chart_name]}"
+        preview = asset_manifest.get(preview, preview)
+        if chart_mode == 'data':
+            figure = f"{chart_data.DATA_DIR_NAME}/{chart_name}{chart_data.FIGURE_SUFFIX}"
+            source = CHART_DATA_SOURCES[chart_name]
+            data_file = f"{chart_data.DATA_DIR_NAME}/{source}.json"
+            return page_templates.plotly_media(asset_manifest.get(figure, figure),
+                                               {source: asset_manifest.get(data_file, data_file)},
+                                               plotly_src, height, title, preview=preview)
+        src = f"{interactive_dir_name}/{chart_name}.html"
+        return page_templates.iframe_media(asset_manifest.get(src, src), height, title, preview=preview)
+
+    pages = {
+        'index.html': dict(
+            title=f"Trang chủ - Dashboard Cổ phiếu {company}",
+            blocks={'company': company, 'ticker': ticker, 'cards': [
+                card("WordCloud Tin tức",
+                     "<strong>Insight:</strong> Các từ khóa nổi bật trong tin tức gần đây.",
+                     page_templates.picture_media(wordcloud_variants, "WordCloud Tin tức")),
+                card("Heatmap Tương quan",
+                     "<strong>Insight:</strong> 'Open', 'High', 'Low', 'Close' tương quan 1:1. "
+                     "Mối quan hệ giữa 'Volume' và 'Daily_Change' không rõ rệt.",
+                     image(f"{static_dir_name}/correlation_heatmap.png", "Heatmap Tương quan")),
+            ]},
+        ),
+        '1_timeseries.html': dict(
+            title="Phân tích Thời gian",
+            blocks={'cards': [
+                card("Biểu đồ Đường: Giá Đóng cửa",
+                     "<strong>Insight:</strong> Cho thấy sự tăng trưởng dài hạn. "
+                     "Bạn có thể zoom vào để xem các đợt khủng hoảng và phục hồi.",
+                     iframe('price_over_time', 500, "Biểu đồ đường giá đóng cửa")),
+                card("Biểu đồ Vùng: Khối lượng Giao dịch",
+                     "<strong>Insight:</strong> Những đỉnh khối lượng đột biến thường xảy ra khi có tin tức lớn "
+                     "(báo cáo tài chính, ra mắt sản phẩm).",
+                     iframe('volume_over_time', 500, "Biểu đồ vùng khối lượng giao dịch")),
+                card("Giá & Chỉ báo Kỹ thuật: SMA 50/200, Dải Bollinger",
+                     "<strong>Insight:</strong> Giá nằm trên SMA 200 cho thấy xu hướng tăng dài hạn; "
+                     "dải Bollinger nở rộng khi thị trường biến động mạnh và co hẹp khi thị trường tích lũy.",
+                     iframe('price_indicators', 500, "Biểu đồ giá và chỉ báo kỹ thuật")),
+                card("RSI, Độ biến động & Drawdown (15 năm gần nhất)",
+                     "<strong>Insight:</strong> RSI trên 70 (quá mua) hoặc dưới 30 (quá bán) thường đi kèm "
+                     "các đợt biến động tăng vọt; drawdown cho biết giá đang thấp hơn đỉnh gần nhất bao nhiêu %.",
+                     image(f"{static_dir_name}/indicator_panels.png", "RSI, độ biến động và drawdown")),
+            ]},
+        ),
+        '2_distributions.html': dict(
+            title="Phân tích Phân phối & Rủi ro",
+            blocks={'cards': [
+                card("Histogram % Thay đổi hàng ngày",
+                     "<strong>Insight:</strong> Hầu hết các ngày, giá chỉ thay đổi nhẹ (quanh 0%). "
+                     "Các \"đuôi\" (tails) ở 2 bên thể hiện rủi ro \"sự kiện bất ngờ\".",
+                     image(f"{static_dir_name}/daily_change_histogram.png", "Histogram % Thay đổi hàng ngày")),
+                card("Boxplot Giá đóng cửa (15 năm gần nhất)",
+                     "<strong>Insight:</strong> Cho thấy xu hướng tăng giá (hộp đi lên) và mức độ biến động "
+                     "(hộp càng dài, biến động càng lớn) qua từng năm.",
+                     image(f"{static_dir_name}/price_boxplot_by_year.png", "Boxplot Giá đóng cửa")),
+                card("Violin Plot: % Thay đổi hàng ngày ",
+                     "<strong>Insight:</strong> Kết hợp Histogram và Boxplot. Phần \"thân đàn\" phình to "
+                     "cho thấy dữ liệu tập trung (quanh 0%) ở các năm.",
+                     image(f"{static_dir_name}/daily_change_violin_by_year.png", "Violin Plot % Thay đổi hàng ngày")),
+            ]},
+        ),
+        '3_relationships.html': dict(
+            title="Phân tích Mối quan hệ & Phân cấp",
+            blocks={'cards': [
+                card("Scatter Plot High vs Low (Tương tác)",
+                     "<strong>Insight:</strong> Các điểm tập trung dày đặc quanh đường chéo cho thấy "
+                     "mối tương quan 1:1, thể hiện tính nhất quán của dữ liệu.",
+                     iframe('scatter_regression', 500, "Scatter Plot High vs Low")),
+                card("Treemap Khối lượng Giao dịch (Tương tác)",
+                     "<strong>Insight:</strong> Nhấp vào một năm (ví dụ: 2020) để \"zoom\" vào và xem tháng nào "
+                     "trong năm đó có giao dịch sôi động nhất.",
+                     iframe('volume_treemap', 700, "Treemap Khối lượng Giao dịch")),
+                card("Sunburst Khối lượng Giao dịch (Tương tác)",
+                     "<strong>Insight:</strong> Tương tự Treemap nhưng ở dạng hình tròn. Vòng trong là Năm, "
+                     "vòng ngoài là Tháng. Giúp so sánh trực quan các tháng.",
+                     iframe('volume_sunburst', 700, "Sunburst Khối lượng Giao dịch")),
+            ]},
+        ),
+    }
+    if include_story:
+        pages['4_storytelling.html'] = dict(
+            title="Câu chuyện Dữ liệu Apple",
+            container_class='container story-container',
+            blocks={
+                'price_card': card(
+                    "Biểu đồ Đường: Giá Đóng cửa (1980 - 2025)",
+                    "<strong>Insight:</strong> Toàn bộ sự tăng trưởng dường như chỉ xảy ra sau năm 2005. "
+                    "Điều này cho thấy tầm quan trọng của việc \"tái phát minh\" công ty. "
+                    "Bạn có thể click vào biểu đồ và dùng công cụ zoom để xem kỹ 20 năm đầu tiên.",
+                    iframe('price_over_time', 500, "Biểu đồ đường giá đóng cửa"),
+                    heading='h3'),
+                'volume_card': card(
+                    "Biểu đồ Vùng: Khối lượng Giao dịch",
+                    "<strong>Insight:</strong> Khối lượng giao dịch (sự quan tâm) bùng nổ sau kỷ nguyên iPhone. "
+                    "Những đợt tăng đột biến khổng lồ (như giai đoạn 2008, 2020) cho thấy những thời điểm thị trường "
+                    "vừa phấn khích vừa hoảng sợ, nhưng luôn tập trung vào Apple.",
+                    iframe('volume_over_time', 500, "Biểu đồ vùng khối lượng giao dịch"),
+                    heading='h3'),
+                'histogram_card': card(
+                    "Histogram % Thay đổi hàng ngày",
+                    "<strong>Insight:</strong> Apple là một cổ phiếu <strong>ổn định nhưng không nhàm chán</strong>. "
+                    "Nó ổn định 95% thời gian, nhưng 5% còn lại là những biến động cực lớn. "
+                    "Đây là rủi ro và cũng là cơ hội mà dữ liệu cảnh báo.",
+                    image(f"{static_dir_name}/daily_change_histogram.png", "Histogram % Thay đổi hàng ngày"),
+                    heading='h3'),
+                'treemap_card': card(
+                    "Treemap Khối lượng Giao dịch",
+                    "Click vào các năm để xem tháng nào sôi động nhất.",
+                    iframe('volume_treemap', 500, "Treemap Khối lượng Giao dịch")),
+                'wordcloud_card': card(
+                    "WordCloud Tin tức",
+                    "Thị trường luôn tập trung vào sản phẩm và lợi nhuận.",
+                    page_templates.picture_media(wordcloud_variants, "WordCloud Tin tức")),
+            },
+        )
+
+    written, changed = [], 0
+    for page_file, page in pages.items():
+        blocks = {key: '\n'.join(value) if isinstance(value, list) else value
+                  for key, value in page['blocks'].items()}
+        html = page_templates.render_page(page_file, page['title'],
+                                          get_navigation_menu(page_file, include_story, hub_href), hrefs,
+                                          container_class=page.get('container_class', 'container'), **blocks)
+        path = os.path.join(base_dir, page_file)
+        changed += page_templates.write_if_changed(path, html)
+        written.append(path)
+
+    print(f"Tạo các trang web HTML... Xong ({ticker}: ghi lại {changed}/{len(pages)} trang, "
+          f"{len(pages) - changed} trang không đổi).")
+    return written
+
+def get_ticker_label(df_ticker):
+    """
+    Trả về (mã, tên công ty) của một phân vùng, vd: ('AAPL', 'Apple Inc.').
+    """
+    ticker = str(df_ticker['ticker'].iloc[0]) if 'ticker' in df_ticker.columns else 'AAPL'
+    company = ticker
+    if 'name' in df_ticker.columns:
+        company = str(df_ticker['name'].iloc[0]).replace(' Historical Data', '').replace(f' ({ticker})', '').strip()
+    return ticker, company or ticker
 
-    if DATA_FILE_PATH is None:
-        print("Dừng chương trình vì không thể tải dữ liệu từ Kaggle.")
-        # exit() # Bỏ comment nếu muốn chương trình dừng hẳn
+def partition_by_ticker(df):
+    """
+    Tách DataFrame nhiều mã thành {mã: DataFrame đã sắp xếp theo ngày}.
+    """
+    partitions = {}
+    for ticker, df_ticker in df.groupby('ticker', observed=True, sort=True):
+        partitions[str(ticker)] = df_ticker.sort_values('Date').reset_index(drop=True)
+    return partitions
+
+def build_ticker_dashboard(df_ticker, ticker_dir, wordcloud_variants=None, hub_href=None, plotly_bundle_dir=None,
+                           use_cache=True, plotly_js='shared', downsample='lttb', max_points=2000,
+                           shared_assets=None, chart_mode='html', append=False, rollups=None, render_mode='auto',
+                           scatter_points=SCATTER_SAMPLE_SIZE):
+    """
+    Tạo toàn bộ biểu đồ và trang HTML của một mã cổ phiếu trong thư mục riêng.
+    Chạy trong tiến trình con nên bên trong vẽ tuần tự (workers=1).
+    Với append=True, histogram/heatmap/treemap/sunburst được vẽ từ trạng thái tổng hợp lưu trong
+    cache của mã và chỉ cộng thêm các dòng mới (xem stream_aggregates.load_or_update_aggregates).
+    `rollups` là phần bảng tổng hợp của mã này (rollup_store.select_ticker).
+    """
+    import stream_aggregates
+
+    ticker, company = get_ticker_label(df_ticker)
+    static_dir = os.path.join(ticker_dir, 'charts_static')
+    interactive_dir = os.path.join(ticker_dir, 'charts_interactive')
+    os.makedirs(static_dir, exist_ok=True)
+    os.makedirs(interactive_dir, exist_ok=True)
+
+    aggregates = None
+    if append:
+        cache_dir = os.path.join(ticker_dir, build_cache.CACHE_DIR_NAME)
+        aggregates, _ = stream_aggregates.load_or_update_aggregates(df_ticker, cache_dir if use_cache else None)
+
+    results = create_visualizations(df_ticker, None, static_dir, interactive_dir, use_cache=use_cache, workers=1,
+                                    plotly_js=plotly_js, downsample=downsample, max_points=max_points,
+                                    aggregates=aggregates, ticker=ticker, company=company,
+                                    plotly_bundle_dir=plotly_bundle_dir, chart_mode=chart_mode, rollups=rollups,
+                                    render_mode=render_mode, scatter_points=scatter_points)
+    failed = [r['name'] for r in results if not r['ok']]
+    if failed:
+        raise RuntimeError(f"{ticker}: lỗi khi vẽ {', '.join(failed)}")
+
+    create_ticker_pages(ticker_dir, ticker, company, wordcloud_variants=wordcloud_variants, hub_href=hub_href,
+                        plotly_bundle_dir=plotly_bundle_dir, plotly_js=plotly_js, shared_assets=shared_assets,
+                        chart_mode=chart_mode)
+
+def create_ticker_pages(ticker_dir, ticker, company, wordcloud_variants=None, hub_href=None, plotly_bundle_dir=None,
+                        plotly_js='shared', shared_assets=None, chart_mode='html'):
+    """
+    Tạo các trang HTML của một mã từ các biểu đồ đã có trong ticker_dir (không cần đến dữ liệu).
+    """
+    interactive_dir = os.path.join(ticker_dir, 'charts_interactive')
+    asset_manifest = asset_pipeline.fingerprint_outputs(
+        ticker_dir, ['charts_static', 'charts_interactive', chart_data.DATA_DIR_NAME])
+    return create_html_pages(ticker_dir, 'charts_static', 'charts_interactive', ticker=ticker, company=company,
+                             wordcloud_variants=wordcloud_variants, hub_href=hub_href, shared_assets=shared_assets,
+                             asset_manifest=asset_manifest, chart_mode=chart_mode,
+                             plotly_src=plotly_script_src(plotly_js, plotly_bundle_dir or interactive_dir, ticker_dir))
+
+def create_ticker_index_page(base_dir, tickers_dir_name, summaries, shared_assets=None):
+    """
+    Trang chủ liệt kê dashboard của tất cả các mã.
+    """
+    if shared_assets is None:
+        shared_assets = page_templates.write_shared_assets(base_dir)
+
+    cards = []
+    for item in summaries:
+        cards.append(page_templates.chart_card(
+            f"<a href=\"{tickers_dir_name}/{item['ticker']}/index.html\">{item['ticker']}</a>",
+            f"<strong>Giá đóng cửa gần nhất:</strong> {item['last_close']:,.2f} ({item['last_date']})<br>"
+            f"<strong>Dữ liệu:</strong> {item['first_date']} → {item['last_date']} ({item['rows']:,} phiên)",
+            f"<p>{item['company']}</p>"))
+
+    html_hub = page_templates.render_page('hub.html', f"Dashboard Cổ phiếu - {len(summaries)} mã", '',
+                                          page_templates.asset_hrefs(shared_assets, base_dir),
+                                          count=len(summaries), cards='\n'.join(cards))
+    page_templates.write_if_changed(os.path.join(base_dir, 'index.html'), html_hub)
+
+def build_multi_ticker_site(df, news_text, base_dir, workers=None, use_cache=True, plotly_js='shared',
+                            downsample='lttb', max_points=2000, tickers_dir_name='tickers', chart_mode='html',
+                            append=False, rollups=None, wordcloud_scales=news_wordcloud.SCALES,
+                            wordcloud_formats=news_wordcloud.FORMATS, render_mode='auto',
+                            scatter_points=SCATTER_SAMPLE_SIZE):
+    """
+    Tạo một dashboard cho mỗi mã trong base_dir/<tickers_dir_name>/<MÃ>/ và một trang chủ chung.
+    Các phần dùng chung (plotly.js, WordCloud tin tức, CSS/JS của trang) chỉ được tạo một lần;
+    các mã được xử lý song song trên process pool.
+    `rollups` là bảng tổng hợp nhiều mã dựng một lần (rollup_store); mỗi dashboard chỉ nhận phần của mã đó.
+    Trả về (kết quả từng mã, thông tin tóm tắt của các mã đã tạo thành công).
+    """
+    import rollup_store
+
+    partitions = partition_by_ticker(df)
+    print(f"Đang tạo dashboard cho {len(partitions)} mã cổ phiếu...")
+
+    shared_static_dir = os.path.join(base_dir, 'charts_static')
+    shared_interactive_dir = os.path.join(base_dir, 'charts_interactive')
+    os.makedirs(shared_static_dir, exist_ok=True)
+    os.makedirs(shared_interactive_dir, exist_ok=True)
+    if plotly_js == 'shared' or (chart_mode == 'data' and plotly_js != 'cdn'):
+        write_plotly_bundle(shared_interactive_dir)
+    render_shared_wordcloud(news_text, shared_static_dir, os.path.join(base_dir, build_cache.CACHE_DIR_NAME),
+                            use_cache=use_cache, scales=wordcloud_scales, formats=wordcloud_formats)
+    shared_assets = page_templates.write_shared_assets(base_dir)
+    wordcloud_variants = shared_wordcloud_variants(base_dir)
+
+    jobs = []
+    summaries = []
+    for ticker, df_ticker in partitions.items():
+        ticker_dir = os.path.join(base_dir, tickers_dir_name, ticker)
+        jobs.append({
+            'name': ticker,
+            'render': build_ticker_dashboard,
+            'data': df_ticker,
+            'params': {
+                'wordcloud_variants': wordcloud_variants,
+                'hub_href': '../../index.html',
+                'plotly_bundle_dir': shared_interactive_dir,
+                'use_cache': use_cache,
+                'plotly_js': plotly_js,
+                'downsample': downsample,
+                'max_points': max_points,
+                'shared_assets': shared_assets,
+                'chart_mode': chart_mode,
+                'append': append,
+                'rollups': rollup_store.select_ticker(rollups, ticker) if rollups is not None else None,
+                'render_mode': render_mode,
+                'scatter_points': scatter_points,
+            },
+            'output': ticker_dir,
+        })
+        summaries.append({
+            'ticker': ticker,
+            'company': get_ticker_label(df_ticker)[1],
+            'rows': len(df_ticker),
+            'first_date': str(df_ticker['Date'].iloc[0].date()),
+            'last_date': str(df_ticker['Date'].iloc[-1].date()),
+            'last_close': float(df_ticker['Close'].iloc[-1]),
+        })
+
+    results = chart_scheduler.render_chart_jobs(jobs, workers=workers)
+    failed = chart_scheduler.report_chart_errors(results)
+
+    summaries = [s for s in summaries if s['ticker'] not in failed]
+    create_ticker_index_page(base_dir, tickers_dir_name, summaries, shared_assets=shared_assets)
+    print(f"Tạo dashboard nhiều mã... Xong ({len(partitions) - len(failed)}/{len(partitions)} mã).")
+    return results, summaries
+
+def render_shared_wordcloud(news_text, static_dir, cache_dir, use_cache=True, scales=news_wordcloud.SCALES,
+                            formats=news_wordcloud.FORMATS):
+    """
+    Vẽ WordCloud dùng chung cho mọi mã, qua cùng cache biểu đồ như create_visualizations:
+    tin tức không đổi (cùng bảng tần suất từ, cùng seed) thì không dựng lại bố cục.
+    """
+    job = wordcloud_job(news_text, static_dir, cache_dir, scales, formats)
+    manifest = build_cache.load_manifest(cache_dir) if use_cache else {}
+    key = build_cache.compute_chart_key(job['render'], job['data'], job['params'], build_cache.get_library_versions())
+    if use_cache and build_cache.is_chart_fresh(manifest, job['name'], key, job['output']):
+        print(f"↷ Bỏ qua {job['name']} (dữ liệu không đổi)")
+        return
+    outputs = build_cache.job_outputs(job['output'], job['render'](job['data'], job['output'], **job['params']))
+    if all(os.path.exists(path) for path in outputs):
+        build_cache.record_chart(manifest, job['name'], key, outputs)
+        build_cache.save_manifest(cache_dir, manifest)
+
+def shared_wordcloud_variants(base_dir):
+    """
+    Các bản (đã băm tên) của WordCloud dùng chung, với đường dẫn tính từ thư mục của từng mã.
+    """
+    shared_manifest = asset_pipeline.fingerprint_outputs(base_dir, ['charts_static', 'assets'])
+    return news_wordcloud.manifest_variants(shared_manifest, 'charts_static/news_wordcloud.png', prefix='../../')
+
+def build_multi_ticker_pages(base_dir, summaries, plotly_js='shared', chart_mode='html', tickers_dir_name='tickers'):
+    """
+    Tạo lại trang HTML của mọi mã và trang chủ chung từ các biểu đồ đã vẽ (lệnh 'pages').
+    """
+    shared_assets = page_templates.write_shared_assets(base_dir)
+    wordcloud_variants = shared_wordcloud_variants(base_dir)
+    for item in summaries:
+        create_ticker_pages(os.path.join(base_dir, tickers_dir_name, item['ticker']), item['ticker'], item['company'],
+                            wordcloud_variants=wordcloud_variants, hub_href='../../index.html',
+                            plotly_bundle_dir=os.path.join(base_dir, 'charts_interactive'), plotly_js=plotly_js,
+                            shared_assets=shared_assets, chart_mode=chart_mode)
+    create_ticker_index_page(base_dir, tickers_dir_name, summaries, shared_assets=shared_assets)
+
+def precompress_outputs(base_dir, targets, cache_dir=None):
+    """
+    Tạo bản .gz/.br cho các file văn bản của website để nginx phục vụ trực tiếp (gzip_static).
+    Bản nén được lưu theo nội dung file trong cache_dir để các lần build sau chỉ cần chép lại.
+    """
+    stats = asset_pipeline.precompress_site(base_dir, targets, cache_dir)
+    if not stats['files']:
+        print("Không có file nào cần nén.")
+        return stats
+    line = (f"Nén sẵn {stats['files']} file: {stats['bytes'] / 1e6:.2f} MB -> "
+            f"gzip {stats['gzip_bytes'] / 1e6:.2f} MB")
+    if asset_pipeline.brotli is not None:
+        line += f", brotli {stats['brotli_bytes'] / 1e6:.2f} MB"
     else:
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        STATIC_DIR_PATH = os.path.join(BASE_DIR, 'charts_static')
-        INTERACTIVE_DIR_PATH = os.path.join(BASE_DIR, 'charts_interactive')
+        line += " (chưa cài brotli, bỏ qua .br)"
+    print(line)
+    return stats
 
-        STATIC_DIR_NAME = 'charts_static'
-        INTERACTIVE_DIR_NAME = 'charts_interactive'
+# Các lệnh của CLI: mỗi lệnh chỉ nạp thư viện mà bước đó cần (vd: 'pages' không cần pandas hay matplotlib)
+PIPELINE_COMMANDS = ['fetch', 'process', 'charts', 'pages', 'all', 'serve']
+# Trạng thái của lần vẽ biểu đồ gần nhất (một/nhiều mã, chế độ biểu đồ) để lệnh 'pages' chạy độc lập
+SITE_STATE_FILE = 'site.json'
+STATIC_DIR_NAME = 'charts_static'
+INTERACTIVE_DIR_NAME = 'charts_interactive'
 
-        os.makedirs(STATIC_DIR_PATH, exist_ok=True)
-        os.makedirs(INTERACTIVE_DIR_PATH, exist_ok=True)
+def save_site_state(cache_dir, state):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, SITE_STATE_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
 
+def load_site_state(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, SITE_STATE_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-        print("--- BƯỚC 2: XỬ LÝ DỮ LIỆU ---")
-        df = process_stock_data(DATA_FILE_PATH) 
-        news_text = get_apple_news_text()
-        print("-" * 30 + "\n")
+def run_fetch_stage(args, profile, base_dir, allow_network=True):
+    """
+    BƯỚC 1: trả về đường dẫn file CSV (--data hoặc mirror dữ liệu trong base_dir/.build_cache/mirror).
+    Với allow_network=False (lệnh 'process'/'charts'), chỉ dùng mirror đã có.
+    """
+    print("--- BƯỚC 1: CÀI ĐẶT & TẢI DỮ LIỆU ---")
+    with build_profiler.profile_stage(profile, 'download') as download_outputs:
+        if args.data:
+            data_file_path = os.path.abspath(args.data) if os.path.exists(args.data) else None
+            print(f"Dùng dữ liệu có sẵn: {args.data}")
+        else:
+            offline = args.offline or not allow_network
+            if not offline and not os.path.isdir(args.source):
+                KAGGLE_API_KEY = {"username":"hoangtuanjs","key":"28bed3d819cf1400ed7ded78868f3486"}
 
-        if df is not None:
-            print("--- BƯỚC 3: TẠO BIỂU ĐỒ ---")
-            create_visualizations(df, news_text, STATIC_DIR_PATH, INTERACTIVE_DIR_PATH)
-            print("-" * 30 + "\n")
+                # Cài đặt API key vào vị trí
+                setup_kaggle_api(KAGGLE_API_KEY)
+
+            # Mirror nằm trong thư mục cache (không theo dõi bởi git); data/ chỉ là bản dữ liệu mẫu đi kèm repo
+            data_file_path = download_kaggle_dataset(os.path.join(base_dir, build_cache.CACHE_DIR_NAME, 'mirror'),
+                                                     source=args.source, ttl_seconds=args.ttl_hours * 3600,
+                                                     offline=offline, force=args.refresh,
+                                                     seed_path=os.path.join(base_dir, 'data', DATASET_FILENAME))
+        if data_file_path:
+            download_outputs.append(data_file_path)
+    if args.command == 'fetch':
+        # Làm mới cache tin tức để lệnh 'charts' sau đó không phải chờ mạng
+        with build_profiler.profile_stage(profile, 'get_apple_news_text'):
+            get_apple_news_text(feeds=args.news_feed, max_age=args.news_max_age * 60)
+    print("-" * 30 + "\n")
+    return data_file_path
+
+def run_process_stage(args, profile, data_file_path, cache_dir):
+    """
+    BƯỚC 2: đọc và làm sạch dữ liệu, tính chỉ báo kỹ thuật và bảng tổng hợp (đều được lưu cache trong cache_dir).
+    Trả về dict {'df', 'aggregates', 'rollups', 'is_multi_ticker'}.
+    """
+    import indicators
+    import rollup_store
+    import stream_aggregates
+
+    print("--- BƯỚC 2: XỬ LÝ DỮ LIỆU ---")
+    use_cache_dir = None if args.full_rebuild else cache_dir
+    aggregates, rollups = None, None
+    with build_profiler.profile_stage(profile, 'process_stock_data'):
+        if args.chunksize:
+            df, aggregates = process_stock_data_chunked(data_file_path, chunksize=args.chunksize)
+        else:
+            df = process_stock_data(data_file_path, cache_dir=use_cache_dir)
+    if df is not None:
+        with build_profiler.profile_stage(profile, 'compute_indicators'):
+            df = indicators.add_indicators(df, cache_dir=use_cache_dir)
+        with build_profiler.profile_stage(profile, 'build_rollups'):
+            rollups = rollup_store.load_or_build_rollups(df, use_cache_dir)
+    is_multi_ticker = df is not None and 'ticker' in df.columns and df['ticker'].nunique() > 1
+    if args.append and df is not None and aggregates is None and not is_multi_ticker:
+        with build_profiler.profile_stage(profile, 'update_aggregates'):
+            aggregates, added = stream_aggregates.load_or_update_aggregates(df, use_cache_dir)
+        print(f"Cập nhật phép tổng hợp... Xong (cộng thêm {added} dòng, tổng {aggregates['rows']} dòng).")
+    print("-" * 30 + "\n")
+    return {'df': df, 'aggregates': aggregates, 'rollups': rollups, 'is_multi_ticker': is_multi_ticker}
+
+def run_charts_stage(args, profile, base_dir, cache_dir, data):
+    """
+    BƯỚC 3: vẽ biểu đồ (với nhiều mã: biểu đồ và trang của từng mã, chạy song song)
+    và ghi lại trạng thái site cho lệnh 'pages'.
+    """
+    with build_profiler.profile_stage(profile, 'get_apple_news_text'):
+        news_text = get_apple_news_text(feeds=args.news_feed, max_age=args.news_max_age * 60)
+
+    if data['is_multi_ticker']:
+        print("--- BƯỚC 3 & 4: TẠO DASHBOARD CHO TỪNG MÃ ---")
+        with build_profiler.profile_stage(profile, 'build_multi_ticker_site'):
+            results, summaries = build_multi_ticker_site(
+                data['df'], news_text, base_dir, workers=args.workers, use_cache=not args.full_rebuild,
+                plotly_js=args.plotly_js, downsample=args.downsample, max_points=args.max_points,
+                chart_mode=args.chart_mode, append=args.append, rollups=data['rollups'],
+                wordcloud_scales=args.wordcloud_scales, wordcloud_formats=args.wordcloud_formats,
+                render_mode=args.render_mode, scatter_points=args.scatter_points)
+        build_profiler.record_chart_results(profile, results, prefix='ticker:')
+        state = {'layout': 'multi', 'tickers_dir': 'tickers', 'tickers': summaries}
+    else:
+        print("--- BƯỚC 3: TẠO BIỂU ĐỒ ---")
+        for dir_name in (STATIC_DIR_NAME, INTERACTIVE_DIR_NAME, chart_data.DATA_DIR_NAME):
+            os.makedirs(os.path.join(base_dir, dir_name), exist_ok=True)
+        with build_profiler.profile_stage(profile, 'create_visualizations'):
+            results = create_visualizations(data['df'], news_text, os.path.join(base_dir, STATIC_DIR_NAME),
+                                            os.path.join(base_dir, INTERACTIVE_DIR_NAME),
+                                            use_cache=not args.full_rebuild, workers=args.workers,
+                                            plotly_js=args.plotly_js, downsample=args.downsample,
+                                            max_points=args.max_points, aggregates=data['aggregates'],
+                                            chart_mode=args.chart_mode, rollups=data['rollups'],
+                                            wordcloud_scales=args.wordcloud_scales,
+                                            wordcloud_formats=args.wordcloud_formats,
+                                            render_mode=args.render_mode, scatter_points=args.scatter_points)
+        build_profiler.record_chart_results(profile, results)
+        state = {'layout': 'single'}
+    print("-" * 30 + "\n")
+
+    state.update({'chart_mode': args.chart_mode, 'plotly_js': args.plotly_js})
+    save_site_state(cache_dir, state)
+    return state
 
+def run_pages_stage(profile, base_dir, state, write_pages=True, export_dir=None):
+    """
+    BƯỚC 4 & 5: tạo trang HTML từ các biểu đồ đã vẽ và nén sẵn file tĩnh. Không nạp pandas/matplotlib/plotly.
+    `state` là trạng thái do bước vẽ biểu đồ ghi lại (chế độ biểu đồ, danh sách mã).
+    Với export_dir, các file cần xuất bản (không gồm file gốc chưa băm và cache build) được chép sang đó.
+    """
+    plotly_js, chart_mode = state['plotly_js'], state['chart_mode']
+    if state['layout'] == 'multi':
+        if write_pages:
             print("--- BƯỚC 4: TẠO WEBSITE ---")
-            create_html_pages(BASE_DIR, STATIC_DIR_NAME, INTERACTIVE_DIR_NAME)
+            with build_profiler.profile_stage(profile, 'create_html_pages'):
+                build_multi_ticker_pages(base_dir, state['tickers'], plotly_js=plotly_js, chart_mode=chart_mode,
+                                         tickers_dir_name=state['tickers_dir'])
             print("-" * 30 + "\n")
+        targets = ['index.html', page_templates.ASSETS_DIR_NAME, INTERACTIVE_DIR_NAME, state['tickers_dir']]
+    else:
+        print("--- BƯỚC 4: TẠO WEBSITE ---")
+        with build_profiler.profile_stage(profile, 'create_html_pages') as page_outputs:
+            shared_assets = page_templates.write_shared_assets(base_dir)
+            asset_manifest = asset_pipeline.fingerprint_outputs(
+                base_dir, [STATIC_DIR_NAME, INTERACTIVE_DIR_NAME, chart_data.DATA_DIR_NAME,
+                           page_templates.ASSETS_DIR_NAME])
+            page_outputs += create_html_pages(
+                base_dir, STATIC_DIR_NAME, INTERACTIVE_DIR_NAME, shared_assets=shared_assets,
+                asset_manifest=asset_manifest, chart_mode=chart_mode,
+                plotly_src=plotly_script_src(plotly_js, os.path.join(base_dir, INTERACTIVE_DIR_NAME), base_dir))
+        print("-" * 30 + "\n")
+        targets = page_outputs + [page_templates.ASSETS_DIR_NAME, INTERACTIVE_DIR_NAME,
+                                  chart_data.DATA_DIR_NAME, asset_pipeline.MANIFEST_FILE]
+
+    print("--- BƯỚC 5: NÉN SẴN FILE TĨNH ---")
+    with build_profiler.profile_stage(profile, 'precompress'):
+        precompress_outputs(base_dir, targets, os.path.join(base_dir, build_cache.CACHE_DIR_NAME, 'compressed'))
+    print("-" * 30 + "\n")
+
+    if export_dir:
+        export_targets = list(dict.fromkeys(targets + [STATIC_DIR_NAME, asset_pipeline.MANIFEST_FILE]))
+        with build_profiler.profile_stage(profile, 'export'):
+            count = asset_pipeline.export_site(base_dir, export_targets, export_dir)
+        print(f"Đã chép {count} file cần xuất bản vào {export_dir}.")
+
+    print("\n=== HOÀN TẤT DỰ ÁN! ===")
+    print(f"Mở file sau trong trình duyệt để xem website của bạn:")
+    print(f"file://{os.path.join(base_dir, 'index.html')}")
+
+# Giới hạn số điểm mỗi chuỗi mà API của server cho phép yêu cầu (tham số points)
+SERVER_MAX_POINTS = 100_000
+
+def render_chart_payload(df, name, max_points=2000, downsample='lttb', render_mode='auto',
+                         scatter_points=SCATTER_SAMPLE_SIZE, ticker='AAPL', company='Apple'):
+    """
+    Vẽ một biểu đồ tương tác (khóa của INTERACTIVE_CHARTS) từ df như job của chế độ 'data': chỉ dữ liệu
+    của biểu đồ này và nguồn CHART_DATA_SOURCES của nó được tính, không dựng lại cả bộ biểu đồ.
+    Trả về {'figure': cấu hình hình vẽ, 'sources': {tên nguồn: dữ liệu dạng cột}}, cùng định dạng với
+    charts_data/ mà common_script.js ghép lại để vẽ.
+    """
+    import tempfile
+
+    render, build = INTERACTIVE_CHARTS[name]
+    options = {'mode': downsampling.resolve_render_mode(len(df), render_mode), 'max_points': max_points,
+               'downsample': downsample, 'scatter_points': scatter_points, 'ticker': ticker, 'company': company}
+    data, params = build(df, options)
+    source = CHART_DATA_SOURCES[name]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = os.path.join(tmp_dir, name + chart_data.FIGURE_SUFFIX)
+        render(data, output, data_source=source, **params)
+        with open(output, 'r', encoding='utf-8') as f:
+            figure = json.load(f)
+    # Biểu đồ mật độ lưu sẵn lưới số đếm trong cấu hình nên không kèm chuỗi dữ liệu
+    sources = {} if params.get('render_mode') == 'density' else {source: chart_data.chart_data_payload(data)}
+    return {'figure': figure, 'sources': sources}
+
+def make_chart_service(df, max_points=2000, downsample='lttb', render_mode='auto', scatter_points=SCATTER_SAMPLE_SIZE):
+    """
+    Tạo ba hàm cho dashboard_server từ df đã xử lý (giữ trong bộ nhớ suốt thời gian chạy server):
+    - describe(): danh sách biểu đồ, mã và khoảng ngày của từng mã, tham số mặc định;
+    - render_chart(tên, tham số): biểu đồ của một mã (ticker) trong khoảng ngày [start, end] với tối đa
+      `points` điểm mỗi chuỗi và cách vẽ render_mode, xem render_chart_payload;
+    - normalize_params(tên, tham số): kiểm tra tham số và trả về dạng chuẩn (chỉ các tham số đã biết,
+      mã viết hoa, số điểm là số nguyên, ngày dạng ISO) dùng làm khóa cache của server.
+    Các chỉ báo đã được tính trên toàn bộ lịch sử nên SMA/RSI... ở đầu khoảng ngày vẫn đúng.
+    """
+    import pandas as pd
+
+    frames = partition_by_ticker(df) if 'ticker' in df.columns else {get_ticker_label(df)[0]: df}
+    companies = {ticker: get_ticker_label(frame)[1] for ticker, frame in frames.items()}
+    default_ticker = next(iter(frames))
+    defaults = {'ticker': default_ticker, 'points': max_points, 'render_mode': render_mode}
 
-            print("\n=== HOÀN TẤT DỰ ÁN! ===")
-            print(f"Mở file sau trong trình duyệt để xem website của bạn:")
-            print(f"file://{os.path.join(BASE_DIR, 'index.html')}")
+    def describe():
+        return {
+            'charts': list(INTERACTIVE_CHARTS),
+            'tickers': {ticker: {'company': companies[ticker], 'rows': len(frame),
+                                 'first_date': str(frame['Date'].iloc[0].date()),
+                                 'last_date': str(frame['Date'].iloc[-1].date())}
+                        for ticker, frame in frames.items()},
+            'defaults': defaults,
+            'render_modes': downsampling.RENDER_MODES,
+            'max_points': SERVER_MAX_POINTS,
+        }
+
+    def normalize_params(name, params):
+        if name not in INTERACTIVE_CHARTS:
+            raise KeyError(f"Không có biểu đồ '{name}' (chọn trong {', '.join(INTERACTIVE_CHARTS)})")
+        ticker = params.get('ticker', default_ticker).upper()
+        if ticker not in frames:
+            raise KeyError(f"Không có mã '{ticker}'")
+        try:
+            points = int(params.get('points', max_points))
+        except ValueError:
+            raise ValueError(f"points phải là số nguyên: {params['points']}")
+        if not 10 <= points <= SERVER_MAX_POINTS:
+            raise ValueError(f"points phải trong khoảng 10..{SERVER_MAX_POINTS}")
+        mode = params.get('render_mode', render_mode)
+        if mode not in downsampling.RENDER_MODES:
+            raise ValueError(f"render_mode không hợp lệ: {mode} (chọn trong {', '.join(downsampling.RENDER_MODES)})")
+
+        normalized = {'ticker': ticker, 'points': points, 'render_mode': mode}
+        for bound in ('start', 'end'):
+            if bound in params:
+                try:
+                    normalized[bound] = pd.Timestamp(params[bound]).isoformat()
+                except ValueError:
+                    raise ValueError(f"{bound} không phải ngày hợp lệ (YYYY-MM-DD): {params[bound]}")
+        return normalized
+
+    def render_chart(name, params):
+        params = normalize_params(name, params)
+        ticker, points, mode = params['ticker'], params['points'], params['render_mode']
+        frame = frames[ticker]
+        if 'start' in params or 'end' in params:
+            mask = frame['Date'].between(pd.Timestamp(params.get('start', frame['Date'].iloc[0])),
+                                         pd.Timestamp(params.get('end', frame['Date'].iloc[-1])))
+            frame = frame[mask].reset_index(drop=True)
+        if len(frame) < 2:
+            raise ValueError("Khoảng ngày đã chọn có ít hơn 2 dòng dữ liệu")
+
+        payload = render_chart_payload(frame, name, max_points=points, downsample=downsample, render_mode=mode,
+                                       scatter_points=scatter_points, ticker=ticker, company=companies[ticker])
+        payload['params'] = {'ticker': ticker, 'start': str(frame['Date'].iloc[0].date()),
+                             'end': str(frame['Date'].iloc[-1].date()), 'points': points, 'render_mode': mode,
+                             'rows': len(frame)}
+        return payload
+
+    return describe, render_chart, normalize_params
+
+def run_serve_stage(args, base_dir, data):
+    """
+    Lệnh 'serve': giữ df đã xử lý trong bộ nhớ, phục vụ các trang đã build trong base_dir
+    và vẽ biểu đồ theo yêu cầu qua API (xem dashboard_server).
+    """
+    print("--- SERVER DASHBOARD ---")
+    if not os.path.exists(os.path.join(base_dir, 'index.html')):
+        print("⚠ Chưa có trang HTML nào. Hãy chạy lệnh 'all' trước; API biểu đồ vẫn hoạt động.")
+    describe, render_chart, normalize_params = make_chart_service(
+        data['df'], max_points=args.max_points, downsample=args.downsample,
+        render_mode=args.render_mode, scatter_points=args.scatter_points)
+    dashboard_server.serve(base_dir, describe, render_chart, host=args.host, port=args.port,
+                           normalize_params=normalize_params)
+
+def parse_scales(value):
+    return sorted({int(v) for v in value.split(',') if v.strip()})
+
+def parse_formats(value):
+    formats = [v.strip().lower() for v in value.split(',') if v.strip()]
+    invalid = [fmt for fmt in formats if fmt not in news_wordcloud.FORMAT_OPTIONS]
+    if invalid:
+        raise argparse.ArgumentTypeError(f"định dạng không hỗ trợ: {', '.join(invalid)} "
+                                         f"(chọn trong {', '.join(news_wordcloud.FORMAT_OPTIONS)})")
+    return formats
+
+# KHỐI THỰC THI NÀY ĐÃ ĐƯỢC CẬP NHẬT
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Xây dựng website Dashboard cổ phiếu Apple.")
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help="Bỏ qua cache, vẽ lại toàn bộ biểu đồ.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Số tiến trình vẽ biểu đồ song song (mặc định: số CPU, 1 = tuần tự).")
+    parser.add_argument('--plotly-js', choices=['shared', 'inline', 'cdn'], default='shared',
+                        help="Cách đưa plotly.js vào biểu đồ tương tác (mặc định: một file dùng chung).")
+    parser.add_argument('--downsample', choices=downsampling.DOWNSAMPLE_METHODS, default='lttb',
+                        help="Thuật toán giảm mẫu cho biểu đồ giá/khối lượng theo thời gian.")
+    parser.add_argument('--chart-mode', choices=chart_data.CHART_MODES, default='html',
+                        help="'html': mỗi biểu đồ tương tác là một file HTML; 'data': trang tự vẽ biểu đồ "
+                             "từ các file dữ liệu JSON dùng chung (charts_data/).")
+    parser.add_argument('--append', action='store_true',
+                        help="Chế độ cập nhật tăng dần: lưu các phép tổng hợp (khối lượng theo tháng, mô-men tương quan, "
+                             "histogram) và chỉ cộng thêm các dòng mới kể từ lần build trước.")
+    parser.add_argument('--max-points', type=int, default=2000,
+                        help="Số điểm tối đa của mỗi biểu đồ đường/vùng sau khi giảm mẫu.")
+    parser.add_argument('--render-mode', choices=downsampling.RENDER_MODES, default='auto',
+                        help=f"Cách vẽ biểu đồ giá/khối lượng/scatter. auto: SVG, chuyển sang WebGL từ "
+                             f"{downsampling.WEBGL_THRESHOLD} dòng dữ liệu (mỗi mã, trước khi giảm mẫu) và "
+                             f"sang heatmap mật độ đếm sẵn từ {downsampling.DENSITY_THRESHOLD} dòng.")
+    parser.add_argument('--scatter-points', type=int, default=SCATTER_SAMPLE_SIZE,
+                        help="Số điểm mẫu (phân tầng theo năm) của scatter High vs Low; 0 để vẽ mọi dòng.")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Đọc CSV theo từng chunk N dòng với kiểu dữ liệu gọn (cho file rất lớn).")
+    parser.add_argument('--data', default=None,
+                        help="Dùng file CSV có sẵn thay vì tải từ Kaggle (có thể chứa nhiều mã cổ phiếu).")
+    parser.add_argument('--profile-report', default=None,
+                        help="Đường dẫn file JSON báo cáo thời gian/bộ nhớ từng bước (mặc định: .build_cache/build_profile.json).")
+    parser.add_argument('--source', default=KAGGLE_DATASET_HANDLE,
+                        help="Handle Kaggle hoặc thư mục cục bộ chứa file CSV (thay cho Kaggle).")
+    parser.add_argument('--offline', action='store_true',
+                        help="Không kết nối mạng, chỉ dùng mirror dữ liệu cục bộ.")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Bỏ qua TTL, kiểm tra upstream ngay.")
+    parser.add_argument('--ttl-hours', type=float, default=data_source.DEFAULT_TTL_SECONDS / 3600,
+                        help="Thời gian mirror dữ liệu được coi là còn mới (giờ).")
+    parser.add_argument('--news-feed', action='append', default=None,
+                        help="URL feed RSS tin tức (có thể lặp lại; mặc định: các feed của Apple).")
+    parser.add_argument('--news-max-age', type=float, default=news_feed.DEFAULT_MAX_AGE_SECONDS / 60,
+                        help="Thời gian (phút) tin tức trong cache được dùng lại mà không gửi request.")
+    parser.add_argument('--wordcloud-scales', type=parse_scales, default=list(news_wordcloud.SCALES),
+                        help="Các tỉ lệ kích thước của ảnh WordCloud so với bản 800x400, vd: 1,2 (mặc định).")
+    parser.add_argument('--wordcloud-formats', type=parse_formats, default=list(news_wordcloud.FORMATS),
+                        help="Định dạng ảnh WordCloud, vd: png,webp (mặc định); luôn có bản png 1x làm ảnh dự phòng.")
+    parser.add_argument('--export-dir', default=None,
+                        help="Chép các file cần xuất bản (trang, bản đã băm của biểu đồ, bản nén .gz/.br) vào "
+                             "thư mục này sau bước nén, vd: để đóng gói ảnh Docker.")
+    parser.add_argument('--host', default=dashboard_server.DEFAULT_HOST,
+                        help="Địa chỉ lắng nghe của lệnh 'serve'.")
+    parser.add_argument('--port', type=int, default=dashboard_server.DEFAULT_PORT,
+                        help="Cổng của lệnh 'serve'.")
+    parser.add_argument('command', nargs='?', choices=PIPELINE_COMMANDS, default='all',
+                        help="Bước cần chạy: fetch (tải dữ liệu và tin tức), process (xử lý dữ liệu, chỉ báo, "
+                             "bảng tổng hợp), charts (xử lý + vẽ biểu đồ), pages (tạo trang HTML và nén sẵn từ "
+                             "các biểu đồ đã vẽ), all (mặc định: toàn bộ), serve (xử lý dữ liệu rồi chạy server "
+                             "phục vụ các trang và vẽ biểu đồ theo yêu cầu qua /api/charts).")
+    args = parser.parse_args()
+
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    CACHE_DIR_PATH = os.path.join(BASE_DIR, build_cache.CACHE_DIR_NAME)
+    PROFILE_REPORT_PATH = args.profile_report or os.path.join(CACHE_DIR_PATH, 'build_profile.json')
+    profile = build_profiler.new_report()
+
+    if args.command == 'pages':
+        site_state = load_site_state(CACHE_DIR_PATH)
+        if site_state is None:
+            print("Chưa có biểu đồ nào được vẽ. Hãy chạy lệnh 'charts' (hoặc 'all') trước.")
         else:
-            print("Dừng chương trình vì không thể xử lý dữ liệu.")
\ No newline at end of file
+            run_pages_stage(profile, BASE_DIR, site_state, export_dir=args.export_dir)
+    else:
+        DATA_FILE_PATH = run_fetch_stage(args, profile, BASE_DIR, allow_network=args.command in ('fetch', 'all'))
+        if DATA_FILE_PATH is None:
+            print("Dừng chương trình vì không thể tải dữ liệu.")
+            # exit() # Bỏ comment nếu muốn chương trình dừng hẳn
+        elif args.command != 'fetch':
+            data = run_process_stage(args, profile, DATA_FILE_PATH, CACHE_DIR_PATH)
+            if data['df'] is None:
+                print("Dừng chương trình vì không thể xử lý dữ liệu.")
+            elif args.command == 'serve':
+                run_serve_stage(args, BASE_DIR, data)
+            elif args.command in ('charts', 'all'):
+                site_state = run_charts_stage(args, profile, BASE_DIR, CACHE_DIR_PATH, data)
+                if args.command == 'all':
+                    # Với nhiều mã, trang của từng mã đã được tạo cùng biểu đồ trong bước 3
+                    run_pages_stage(profile, BASE_DIR, site_state, write_pages=site_state['layout'] != 'multi',
+                                    export_dir=args.export_dir)
+
+    print("\n--- THỐNG KÊ THỜI GIAN BUILD ---")
+    print(build_profiler.format_summary(profile))
+    build_profiler.write_json_report(profile, PROFILE_REPORT_PATH)
+    print(f"Báo cáo chi tiết (JSON): {PROFILE_REPORT_PATH}")
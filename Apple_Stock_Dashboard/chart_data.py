@@ -0,0 +1,89 @@
+import base64
+import json
+import os
+
+DATA_DIR_NAME = 'charts_data'
+FIGURE_SUFFIX = '.figure.json'
+
+# Chế độ biểu đồ tương tác: 'html' = mỗi biểu đồ là một file HTML đã nhúng sẵn dữ liệu;
+# 'data' = dữ liệu và cấu hình hình vẽ là các file JSON riêng, trang tự vẽ bằng plotly.js
+CHART_MODES = ['html', 'data']
+
+# Kiểu mảng nhị phân mà plotly.js đọc được ({"dtype", "bdata"}); không có int64 nên chuyển sang f8
+_TYPED_DTYPES = {'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2',
+                 'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8'}
+
+
+def encode_column(values):
+    """
+    Mã hóa một cột thành mảng nhị phân base64 của plotly.js. Ngày được đổi sang mili-giây
+    kể từ epoch (f8); cột không phải số được giữ dạng danh sách chuỗi.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if values.dt.tz is not None:
+            values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+        array = values.to_numpy('datetime64[ms]').astype('int64').astype('float64')
+    elif pd.api.types.is_numeric_dtype(values):
+        array = np.asarray(values)
+        if array.dtype.name not in _TYPED_DTYPES:
+            array = array.astype('float64')
+    else:
+        return [str(v) for v in values]
+    array = array.astype(array.dtype.newbyteorder('<'), copy=False)
+    return {'dtype': _TYPED_DTYPES[array.dtype.name],
+            'bdata': base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')}
+
+
+def _write_json(payload, output_path):
+    with open(output_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(payload, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(output_path + '.tmp', output_path)
+
+
+def chart_data_payload(frame):
+    """
+    DataFrame dạng cột: {"rows": n, "columns": {tên cột: mảng nhị phân}}.
+    """
+    return {
+        'rows': len(frame),
+        'columns': {str(name): encode_column(frame[name]) for name in frame.columns},
+    }
+
+
+def write_chart_data(frame, output_path):
+    """
+    Ghi DataFrame thành file JSON dạng cột (chart_data_payload).
+    Các biểu đồ dùng chung một chuỗi dữ liệu cùng trỏ tới một file nên trình duyệt chỉ tải một lần.
+    """
+    _write_json(chart_data_payload(frame), output_path)
+
+
+def write_figure_spec(fig, output_path, bindings=None, hierarchy=None, date_axes=()):
+    """
+    Ghi cấu hình hình vẽ Plotly (layout, kiểu trace, hovertemplate...) nhưng thay dữ liệu bằng tham chiếu
+    tới file dữ liệu dùng chung; common_script.js ghép lại và vẽ ở phía trình duyệt.
+    - bindings: {số thứ tự trace: {thuộc tính: (tên nguồn, tên cột)}}, vd: {0: {'x': ('price_series', 'Date')}}
+    - hierarchy: {số thứ tự trace: {'source', 'path', 'values', 'root', 'color'}} cho treemap/sunburst;
+      ids/labels/parents/values được dựng lại từ bảng tổng hợp thay vì lưu sẵn từng nút.
+    - date_axes: các trục hiển thị cột ngày (ngày được lưu dưới dạng số mili-giây).
+    Trace/thuộc tính không được tham chiếu giữ nguyên dữ liệu trong file cấu hình.
+    """
+    spec = json.loads(fig.to_json())
+    for index, attrs in (bindings or {}).items():
+        trace = spec['data'][index]
+        trace['$data'] = {}
+        for attr, (source, column) in attrs.items():
+            trace.pop(attr, None)
+            trace['$data'][attr] = {'source': source, 'column': column}
+    for index, options in (hierarchy or {}).items():
+        trace = spec['data'][index]
+        for attr in ('ids', 'labels', 'parents', 'values', 'customdata'):
+            trace.pop(attr, None)
+        trace.get('marker', {}).pop('colors', None)
+        trace['$hierarchy'] = options
+    for axis in date_axes:
+        spec['layout'].setdefault(axis, {})['type'] = 'date'
+    _write_json(spec, output_path)
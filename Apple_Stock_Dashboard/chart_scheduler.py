@@ -0,0 +1,92 @@
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import build_cache
+import build_profiler
+
+
+def _init_worker():
+    # Tiến trình con không có màn hình: ép matplotlib dùng backend Agg
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def run_chart_job(job):
+    """
+    Vẽ một biểu đồ và trả về kết quả (không ném lỗi ra ngoài),
+    để tiến trình cha có thể tổng hợp lỗi của tất cả biểu đồ.
+    """
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    written = None
+    try:
+        written = job['render'](job['data'], job['output'], **job['params'])
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return {
+        'name': job['name'],
+        'output': job['output'],
+        # Hàm vẽ ghi nhiều file (vd: WordCloud nhiều tỉ lệ) trả về danh sách file để cache kiểm tra đủ
+        'outputs': build_cache.job_outputs(job['output'], written if isinstance(written, list) else None),
+        'ok': error is None,
+        'error': error,
+        'seconds': time.perf_counter() - start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'peak_rss_bytes': build_profiler.peak_rss_bytes(),
+    }
+
+
+def resolve_worker_count(workers, job_count):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, min(int(workers), job_count))
+
+
+def render_chart_jobs(jobs, workers=None):
+    """
+    Chạy các job vẽ biểu đồ song song trên một process pool.
+    Kết quả trả về theo đúng thứ tự của `jobs`; workers=1 chạy tuần tự trong tiến trình hiện tại.
+    """
+    if not jobs:
+        return []
+
+    workers = resolve_worker_count(workers, len(jobs))
+    if workers == 1:
+        return [run_chart_job(job) for job in jobs]
+
+    print(f"Đang vẽ {len(jobs)} biểu đồ song song với {workers} tiến trình...")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(run_chart_job, job) for job in jobs]
+        results = []
+        for job, future in zip(jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Lỗi ở tầng pool (vd: không pickle được dữ liệu, tiến trình con bị kill)
+                results.append({
+                    'name': job['name'],
+                    'output': job['output'],
+                    'ok': False,
+                    'error': f"{type(e).__name__}: {e}",
+                    'seconds': 0.0,
+                })
+    return results
+
+
+def report_chart_errors(results):
+    """
+    In báo cáo tổng hợp các biểu đồ bị lỗi. Trả về danh sách tên biểu đồ lỗi.
+    """
+    failed = [r for r in results if not r['ok']]
+    if not failed:
+        return []
+
+    print(f"⚠ {len(failed)}/{len(results)} biểu đồ bị lỗi:")
+    for result in failed:
+        print(f"  - {result['name']} ({os.path.basename(result['output'])}):")
+        for line in result['error'].rstrip().splitlines():
+            print(f"      {line}")
+    return [r['name'] for r in failed]
@@ -0,0 +1,214 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const modal = document.getElementById('chartModal');
+    const modalContent = document.getElementById('modalContent');
+    const closeModal = document.getElementById('modalCloseButton');
+    const frames = document.querySelectorAll('.chart-frame');
+    let expandedFrame = null;
+
+    // Mỗi URL (plotly.js, file cấu hình, file dữ liệu) chỉ được tải một lần cho cả trang
+    const requests = new Map();
+    const once = (key, load) => {
+        if (!requests.has(key)) {
+            requests.set(key, load());
+        }
+        return requests.get(key);
+    };
+    const loadScript = (src) => once(src, () => new Promise((resolve, reject) => {
+        const script = document.createElement('script');
+        script.src = src;
+        script.onload = resolve;
+        script.onerror = () => reject(new Error(`Không tải được ${src}`));
+        document.head.appendChild(script);
+    }));
+    const fetchJson = (url) => once(url, () => fetch(url).then(response => {
+        if (!response.ok) {
+            throw new Error(`Không tải được ${url} (${response.status})`);
+        }
+        return response.json();
+    }));
+
+    // Giải mã mảng nhị phân {dtype, bdata} (xem chart_data.encode_column)
+    const TYPED_ARRAYS = {
+        i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array,
+        i4: Int32Array, u4: Uint32Array, f4: Float32Array, f8: Float64Array,
+    };
+    const decodeColumn = (column) => {
+        if (Array.isArray(column)) {
+            return column;
+        }
+        const bytes = Uint8Array.from(atob(column.bdata), c => c.charCodeAt(0));
+        return new TYPED_ARRAYS[column.dtype](bytes.buffer);
+    };
+    const loadSource = (url) => once(`columns:${url}`, () => fetchJson(url).then(payload => {
+        const columns = {};
+        Object.entries(payload.columns).forEach(([name, column]) => {
+            columns[name] = decodeColumn(column);
+        });
+        return columns;
+    }));
+
+    // Dựng ids/labels/parents/values của treemap/sunburst từ bảng tổng hợp (giống plotly.express)
+    const buildHierarchy = (trace, columns, spec) => {
+        const nodes = new Map();
+        const values = columns[spec.values];
+        const colors = spec.color ? columns[spec.color] : null;
+        const addNode = (id, label, parent, value, color) => {
+            if (!nodes.has(id)) {
+                nodes.set(id, { id, label, parent, value: 0, weighted: 0 });
+            }
+            const node = nodes.get(id);
+            node.value += value;
+            node.weighted += color * value;
+        };
+        for (let i = 0; i < values.length; i++) {
+            const color = colors ? colors[i] : 0;
+            let parent = '';
+            if (spec.root) {
+                addNode(spec.root, spec.root, '', values[i], color);
+                parent = spec.root;
+            }
+            spec.path.forEach(name => {
+                const label = String(columns[name][i]);
+                const id = parent ? `${parent}/${label}` : label;
+                addNode(id, label, parent, values[i], color);
+                parent = id;
+            });
+        }
+        const list = Array.from(nodes.values());
+        trace.ids = list.map(node => node.id);
+        trace.labels = list.map(node => node.label);
+        trace.parents = list.map(node => node.parent);
+        trace.values = list.map(node => node.value);
+        if (colors) {
+            trace.marker = Object.assign({}, trace.marker, {
+                colors: list.map(node => (node.value ? node.weighted / node.value : 0)),
+            });
+        }
+    };
+
+    const renderPlot = (frame, element) => {
+        const sources = JSON.parse(element.dataset.sources || '{}');
+        Promise.all([loadScript(element.dataset.plotly), fetchJson(element.dataset.figure)])
+            .then(([, figure]) => {
+                const names = new Set();
+                figure.data.forEach(trace => {
+                    Object.values(trace.$data || {}).forEach(ref => names.add(ref.source));
+                    if (trace.$hierarchy) {
+                        names.add(trace.$hierarchy.source);
+                    }
+                });
+                return Promise.all(Array.from(names, name => loadSource(sources[name]).then(columns => [name, columns])))
+                    .then(entries => {
+                        const data = Object.fromEntries(entries);
+                        const traces = figure.data.map(spec => {
+                            const trace = Object.assign({}, spec);
+                            Object.entries(spec.$data || {}).forEach(([attr, ref]) => {
+                                trace[attr] = data[ref.source][ref.column];
+                            });
+                            if (spec.$hierarchy) {
+                                buildHierarchy(trace, data[spec.$hierarchy.source], spec.$hierarchy);
+                            }
+                            delete trace.$data;
+                            delete trace.$hierarchy;
+                            return trace;
+                        });
+                        const layout = JSON.parse(JSON.stringify(figure.layout));
+                        return Plotly.newPlot(element, traces, layout, { responsive: true });
+                    });
+            })
+            .then(() => frame.classList.add('loaded'))
+            .catch(error => console.error(error));
+    };
+
+    // Tải biểu đồ lần đầu cần tới; ảnh xem trước được ẩn khi biểu đồ đã tải xong
+    const hydrate = (frame) => {
+        if (frame.dataset.hydrated) {
+            return;
+        }
+        frame.dataset.hydrated = 'true';
+        const plot = frame.querySelector('.plotly-chart');
+        if (plot) {
+            renderPlot(frame, plot);
+            return;
+        }
+        const iframe = frame.querySelector('iframe');
+        if (iframe) {
+            iframe.addEventListener('load', () => frame.classList.add('loaded'), { once: true });
+            iframe.src = iframe.dataset.src;
+        }
+    };
+    const resizePlot = (frame) => {
+        const plot = frame.querySelector('.plotly-chart');
+        if (plot && window.Plotly && plot.classList.contains('js-plotly-plot')) {
+            window.Plotly.Plots.resize(plot);
+        }
+    };
+
+    if ('IntersectionObserver' in window) {
+        const observer = new IntersectionObserver((entries) => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    hydrate(entry.target);
+                    observer.unobserve(entry.target);
+                }
+            });
+        }, { rootMargin: '200px 0px' });
+        frames.forEach(frame => observer.observe(frame));
+    } else {
+        frames.forEach(hydrate);
+    }
+
+    document.querySelectorAll('.chart-card > img, .chart-card > picture > img').forEach(chart => {
+        chart.addEventListener('click', (e) => {
+            e.preventDefault();
+            modalContent.innerHTML = '';
+            const newElement = document.createElement('img');
+            newElement.src = chart.currentSrc || chart.src;
+            modalContent.appendChild(newElement);
+            modal.classList.add('visible');
+        });
+    });
+
+    // Biểu đồ tương tác được phóng to ngay tại chỗ: di chuyển iframe sang modal sẽ làm nó tải lại từ đầu
+    const expand = (frame) => {
+        hydrate(frame);
+        modalContent.innerHTML = '';
+        frame.classList.add('expanded');
+        expandedFrame = frame;
+        modal.classList.add('visible');
+        resizePlot(frame);
+    };
+    frames.forEach(frame => {
+        frame.querySelectorAll('.chart-expand, .chart-preview').forEach(trigger => {
+            trigger.addEventListener('click', (e) => {
+                e.preventDefault();
+                if (frame === expandedFrame) {
+                    closeTheModal();
+                } else {
+                    expand(frame);
+                }
+            });
+        });
+    });
+
+    const closeTheModal = () => {
+        modal.classList.remove('visible');
+        modalContent.innerHTML = '';
+        if (expandedFrame) {
+            expandedFrame.classList.remove('expanded');
+            resizePlot(expandedFrame);
+            expandedFrame = null;
+        }
+    };
+    closeModal.addEventListener('click', closeTheModal);
+    modal.addEventListener('click', (e) => {
+        if (e.target === modal || e.target === modalContent) {
+            closeTheModal();
+        }
+    });
+    document.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') {
+            closeTheModal();
+        }
+    });
+});
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+# Số phản hồi API (biểu đồ đã vẽ theo một bộ tham số) được giữ trong bộ nhớ
+CACHE_SIZE = 128
+
+API_PREFIX = '/api/'
+# Chỉ phục vụ các file mà bản triển khai tĩnh (Dockerfile/nginx) cũng xuất bản,
+# không để lộ mã nguồn, dữ liệu gốc hay thư mục cache trong base_dir
+PUBLIC_DIRS = ('assets', 'charts_static', 'charts_interactive', 'charts_data', 'tickers')
+PUBLIC_FILES = ('asset-manifest.json',)
+
+
+def response_etag(body):
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(header, etag):
+    """
+    Kiểm tra header If-None-Match (có thể là danh sách hoặc '*', có thể có tiền tố W/) với ETag của phản hồi.
+    """
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+def is_public_path(path):
+    """
+    Đường dẫn (đã giải mã và chuẩn hóa, tương đối so với thư mục site) có thuộc phần được xuất bản không.
+    """
+    parts = [part for part in path.split('/') if part]
+    if not parts:
+        return True
+    if len(parts) == 1:
+        return parts[0].endswith(('.html', '.html.gz', '.html.br')) or parts[0] in PUBLIC_FILES
+    return parts[0] in PUBLIC_DIRS and not any(part.startswith('.') for part in parts)
+
+
+def make_handler(base_dir, describe, render_chart, cache_size=CACHE_SIZE, normalize_params=None):
+    """
+    Tạo lớp xử lý request: file tĩnh của site trong base_dir và các API
+      GET /api/charts            -> describe(): danh sách biểu đồ, mã, khoảng ngày
+      GET /api/charts/<tên>?...  -> render_chart(tên, {tham số: giá trị}): hình vẽ + dữ liệu (JSON)
+    render_chart báo lỗi tham số bằng ValueError (400) và tên/mã không có bằng KeyError (404);
+    lỗi khác trả về 500 dạng JSON.
+    normalize_params(tên, tham số) (nếu có) kiểm tra và chuẩn hóa tham số trước khi tra cache, để tham số
+    lạ hay cùng giá trị viết khác nhau (vd: 'aapl' và 'AAPL') dùng chung một mục thay vì đẩy mục khác ra.
+    Phản hồi API được giữ trong bộ nhớ theo LRU (tối đa cache_size) và có ETag để trình duyệt nhận 304.
+    """
+    # http.server chỉ cần khi chạy server, không nạp khi build_website import module này
+    from http.server import SimpleHTTPRequestHandler
+
+    root = os.path.realpath(base_dir)
+    cache = OrderedDict()
+    cache_lock = threading.Lock()
+    render_lock = threading.Lock()
+
+    def cached_response(key, build):
+        with cache_lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key], True
+        # Vẽ tuần tự: nhiều request cùng tham số chỉ vẽ một lần, và không tranh CPU với nhau
+        with render_lock:
+            with cache_lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key], True
+            body = json.dumps(build(), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            entry = (body, response_etag(body))
+            with cache_lock:
+                cache[key] = entry
+                while len(cache) > cache_size:
+                    cache.popitem(last=False)
+        return entry, False
+
+    class DashboardRequestHandler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=base_dir, **kwargs)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path.startswith(API_PREFIX):
+                self.handle_api(url)
+            elif self.is_public_request():
+                super().do_GET()
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+
+        def do_HEAD(self):
+            url = urlsplit(self.path)
+            if url.path.startswith(API_PREFIX):
+                self.send_error(HTTPStatus.METHOD_NOT_ALLOWED)
+            elif not self.is_public_request():
+                self.send_error(HTTPStatus.NOT_FOUND)
+            else:
+                super().do_HEAD()
+
+        def is_public_request(self):
+            # Kiểm tra đúng file sẽ được phục vụ: translate_path giải mã %xx và bỏ '..' sau khi
+            # chuẩn hóa, nên URL thô như /charts_static/%2e%2e/x không được qua danh sách cho phép
+            target = os.path.realpath(self.translate_path(self.path))
+            if target == root:
+                return True
+            relative = os.path.relpath(target, root)
+            if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+                return False
+            return is_public_path(relative.replace(os.sep, '/'))
+
+        def handle_api(self, url):
+            parts = [part for part in url.path[len(API_PREFIX):].split('/') if part]
+            if not parts or parts[0] != 'charts' or len(parts) > 2:
+                self.send_json_error(HTTPStatus.NOT_FOUND, f"Không có API {url.path}")
+                return
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            try:
+                if len(parts) == 1:
+                    key, build = ('charts',), describe
+                else:
+                    name = parts[1]
+                    if normalize_params is not None:
+                        params = normalize_params(name, params)
+                    key = (name,) + tuple(sorted(params.items()))
+                    build = lambda: render_chart(name, params)
+                (body, etag), hit = cached_response(key, build)
+            except ValueError as e:
+                self.send_json_error(HTTPStatus.BAD_REQUEST, str(e))
+                return
+            except KeyError as e:
+                self.send_json_error(HTTPStatus.NOT_FOUND, str(e.args[0]) if e.args else str(e))
+                return
+            except Exception as e:
+                self.log_error("Lỗi khi xử lý %s: %r", url.path, e)
+                self.send_json_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Lỗi server: {type(e).__name__}")
+                return
+
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            # Luôn hỏi lại server (rẻ nhờ ETag) vì dữ liệu trong bộ nhớ có thể khác sau khi khởi động lại
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('X-Cache', 'HIT' if hit else 'MISS')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json_error(self, status, message):
+            body = json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return DashboardRequestHandler
+
+
+def serve(base_dir, describe, render_chart, host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=CACHE_SIZE,
+          normalize_params=None):
+    """
+    Chạy server (đa luồng, chỉ dùng thư viện chuẩn) cho tới khi bị dừng bằng Ctrl+C.
+    """
+    from http.server import ThreadingHTTPServer
+
+    handler = make_handler(os.path.abspath(base_dir), describe, render_chart, cache_size, normalize_params)
+    with ThreadingHTTPServer((host, port), handler) as server:
+        print(f"Dashboard đang chạy tại http://{host}:{server.server_address[1]}/ "
+              f"(API: http://{host}:{server.server_address[1]}{API_PREFIX}charts). Nhấn Ctrl+C để dừng.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nĐã dừng server.")
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+MANIFEST_FILE = 'manifest.json'
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+
+def load_manifest(mirror_dir):
+    path = os.path.join(mirror_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(mirror_dir, manifest):
+    os.makedirs(mirror_dir, exist_ok=True)
+    path = os.path.join(mirror_dir, MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def hash_file(filepath, prefix_bytes=None, chunk_size=1 << 20):
+    """
+    Tính SHA-256 của cả file và (tùy chọn) của `prefix_bytes` byte đầu tiên trong cùng một lần đọc.
+    Trả về (sha_toàn_bộ, sha_phần_đầu).
+    """
+    full = hashlib.sha256()
+    prefix = hashlib.sha256() if prefix_bytes is not None else None
+    remaining = prefix_bytes or 0
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            full.update(chunk)
+            if prefix is not None and remaining > 0:
+                prefix.update(chunk[:remaining])
+                remaining -= min(remaining, len(chunk))
+    return full.hexdigest(), (prefix.hexdigest() if prefix is not None else None)
+
+
+def find_csv(directory, filename):
+    """
+    Tìm file CSV mong muốn trong thư mục dataset; dự phòng: file .csv đầu tiên.
+    """
+    candidate = os.path.join(directory, filename)
+    if os.path.exists(candidate):
+        return candidate
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.csv'):
+            return os.path.join(directory, name)
+    return None
+
+
+def resolve_upstream(source, filename):
+    """
+    Xác định (file CSV upstream, phiên bản). `source` là thư mục cục bộ (dùng thay Kaggle
+    khi test/offline) hoặc handle Kaggle dạng 'owner/dataset'.
+    """
+    if os.path.isdir(source):
+        csv_path = find_csv(source, filename)
+        if csv_path is None:
+            raise FileNotFoundError(f"Không có file CSV trong {source}")
+        stat = os.stat(csv_path)
+        return csv_path, f"local-{stat.st_size}-{stat.st_mtime_ns}"
+
+    import kagglehub
+    dataset_path = kagglehub.dataset_download(source)
+    csv_path = find_csv(dataset_path, filename)
+    if csv_path is None:
+        raise FileNotFoundError(f"Đã tải dataset tới {dataset_path} nhưng không tìm thấy file CSV.")
+    # kagglehub lưu mỗi phiên bản trong .../versions/<số phiên bản>
+    parent, leaf = os.path.split(os.path.normpath(dataset_path))
+    version = f"kaggle-{leaf}" if os.path.basename(parent) == 'versions' else None
+    return csv_path, version
+
+
+def sync_mirror(upstream_path, mirror_path, mirror_sha256=None):
+    """
+    Cập nhật file mirror từ upstream. Nếu upstream chỉ được nối thêm dòng ở cuối
+    (phần đầu trùng byte-by-byte với mirror), chỉ ghi thêm phần đuôi mới thay vì chép lại cả file.
+    Trả về (chế độ, sha256 mới) với chế độ là 'unchanged', 'append' hoặc 'replace'.
+    """
+    if os.path.exists(mirror_path):
+        mirror_size = os.path.getsize(mirror_path)
+        if mirror_sha256 is None:
+            mirror_sha256, _ = hash_file(mirror_path)
+        upstream_size = os.path.getsize(upstream_path)
+        upstream_sha256, prefix_sha256 = hash_file(upstream_path, prefix_bytes=mirror_size)
+
+        if upstream_sha256 == mirror_sha256:
+            return 'unchanged', upstream_sha256
+
+        if upstream_size > mirror_size and prefix_sha256 == mirror_sha256 and _ends_with_newline(mirror_path):
+            with open(upstream_path, 'rb') as src, open(mirror_path, 'ab') as dst:
+                src.seek(mirror_size)
+                shutil.copyfileobj(src, dst)
+            return 'append', upstream_sha256
+    else:
+        upstream_sha256, _ = hash_file(upstream_path)
+
+    os.makedirs(os.path.dirname(os.path.abspath(mirror_path)), exist_ok=True)
+    tmp_path = mirror_path + '.tmp'
+    shutil.copyfile(upstream_path, tmp_path)
+    os.replace(tmp_path, mirror_path)
+    return 'replace', upstream_sha256
+
+
+def _ends_with_newline(filepath):
+    with open(filepath, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def verify_mirror(mirror_path, manifest):
+    """
+    Kiểm tra file mirror khớp với checksum trong manifest (bỏ qua việc băm lại nếu kích thước và mtime không đổi).
+    """
+    if not os.path.exists(mirror_path) or not manifest.get('sha256'):
+        return False
+    stat = os.stat(mirror_path)
+    if stat.st_size != manifest.get('size'):
+        return False
+    if stat.st_mtime_ns == manifest.get('mtime_ns'):
+        return True
+    sha256, _ = hash_file(mirror_path)
+    return sha256 == manifest['sha256']
+
+
+def seed_mirror(seed_path, mirror_dir, filename):
+    """
+    Tạo mirror từ bản dữ liệu đi kèm repo. seed_path chỉ được đọc; mọi lần đồng bộ sau đó chỉ ghi vào mirror.
+    Manifest có checked_at=0 để lần chạy có mạng tiếp theo vẫn kiểm tra upstream.
+    """
+    mirror_path = os.path.join(mirror_dir, filename)
+    os.makedirs(mirror_dir, exist_ok=True)
+    tmp_path = mirror_path + '.tmp'
+    shutil.copyfile(seed_path, tmp_path)
+    os.replace(tmp_path, mirror_path)
+    sha256, _ = hash_file(mirror_path)
+    stat = os.stat(mirror_path)
+    manifest = {
+        'source': 'seed',
+        'file': filename,
+        'version': None,
+        'sha256': sha256,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'checked_at': 0,
+    }
+    save_manifest(mirror_dir, manifest)
+    print(f"✓ Đã tạo mirror từ bản dữ liệu đi kèm: {seed_path}")
+    return manifest
+
+
+def fetch_dataset(mirror_dir, source, filename, ttl_seconds=DEFAULT_TTL_SECONDS, offline=False, force=False,
+                  seed_path=None):
+    """
+    Trả về đường dẫn file CSV trong mirror cục bộ, chỉ liên hệ upstream khi cần:
+    - mirror hợp lệ và chưa hết TTL (hoặc offline=True): dùng ngay, không cần mạng;
+    - upstream cùng phiên bản: chỉ làm mới thời điểm kiểm tra;
+    - upstream đổi: nối thêm các dòng mới hoặc thay cả file;
+    - upstream lỗi: dùng lại mirror cũ nếu nó còn khớp checksum.
+    Chưa có mirror hợp lệ mà có seed_path (bản dữ liệu đi kèm repo) thì mirror được tạo từ bản đó trước.
+    """
+    manifest = load_manifest(mirror_dir)
+    mirror_path = os.path.join(mirror_dir, filename)
+    mirror_ok = verify_mirror(mirror_path, manifest)
+    if not mirror_ok and os.path.exists(mirror_path):
+        print(f"⚠ Mirror {mirror_path} không khớp checksum trong manifest (bị sửa, hỏng hoặc thiếu manifest).")
+    if not mirror_ok and seed_path and os.path.exists(seed_path):
+        manifest = seed_mirror(seed_path, mirror_dir, filename)
+        mirror_ok = True
+    age = time.time() - manifest.get('checked_at', 0)
+
+    if offline:
+        if mirror_ok:
+            print(f"✓ Chế độ offline: dùng mirror {mirror_path}")
+            return mirror_path
+        print(f"⚠ Chế độ offline nhưng chưa có mirror hợp lệ tại {mirror_path}.")
+        return None
+
+    if mirror_ok and not force and manifest.get('source') == source and age < ttl_seconds:
+        print(f"✓ Mirror còn mới ({age / 3600:.1f} giờ < TTL {ttl_seconds / 3600:.1f} giờ), không cần tải lại.")
+        return mirror_path
+
+    print(f"Đang kiểm tra dữ liệu upstream ({source})...")
+    try:
+        upstream_path, version = resolve_upstream(source, filename)
+    except Exception as e:
+        print(f"⚠ Không lấy được dữ liệu upstream: {e}")
+        if mirror_ok:
+            print(f"✓ Dùng lại mirror hiện có: {mirror_path}")
+            return mirror_path
+        return None
+
+    if mirror_ok and version is not None and version == manifest.get('version') and manifest.get('source') == source:
+        mode, sha256 = 'unchanged', manifest['sha256']
+    else:
+        mode, sha256 = sync_mirror(upstream_path, mirror_path, manifest.get('sha256') if mirror_ok else None)
+
+    stat = os.stat(mirror_path)
+    manifest.update({
+        'source': source,
+        'file': filename,
+        'version': version,
+        'sha256': sha256,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'checked_at': time.time(),
+    })
+    if mode != 'unchanged':
+        manifest['updated_at'] = manifest['checked_at']
+        manifest['last_sync'] = mode
+    save_manifest(mirror_dir, manifest)
+
+    messages = {
+        'unchanged': "✓ Dữ liệu upstream không đổi, dùng mirror hiện có.",
+        'append': "✓ Đã nối thêm các dòng mới vào mirror.",
+        'replace': "✓ Đã cập nhật toàn bộ file mirror.",
+    }
+    print(messages[mode] + f" ({mirror_path})")
+    return mirror_path
@@ -0,0 +1,136 @@
+# numpy chỉ được nạp trong từng hàm để CLI đọc DOWNSAMPLE_METHODS mà không phải import numpy
+DOWNSAMPLE_METHODS = ['lttb', 'minmax', 'none']
+
+# Cách vẽ biểu đồ điểm/đường nhiều điểm: 'auto' chọn theo số dòng dữ liệu gốc (trước khi giảm mẫu),
+# vì sau khi giảm mẫu mọi chuỗi chỉ còn max_points điểm. SVG chậm dần từ khoảng vài chục nghìn điểm
+# nên từ WEBGL_THRESHOLD dùng trace WebGL (scattergl); từ DENSITY_THRESHOLD ngay cả WebGL cũng nặng
+# (dữ liệu nhúng trong trang) nên chỉ vẽ lưới mật độ 2D đã đếm sẵn phía server trên mọi dòng,
+# kích thước không phụ thuộc số dòng.
+# Dưới WEBGL_THRESHOLD vẫn giữ SVG: mỗi trang có nhiều biểu đồ mà trình duyệt giới hạn số WebGL context.
+RENDER_MODES = ['auto', 'svg', 'webgl', 'density']
+WEBGL_THRESHOLD = 10_000
+DENSITY_THRESHOLD = 500_000
+DENSITY_BINS = 200
+
+
+def _as_float(values):
+    import numpy as np
+
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: chọn `threshold` điểm sao cho hình dạng đường
+    được giữ lại tốt nhất (điểm đầu/cuối luôn được giữ, mỗi bucket chọn điểm tạo
+    tam giác có diện tích lớn nhất nên các đỉnh đột biến không bị mất).
+    """
+    import numpy as np
+
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+
+    # Chia n-2 điểm ở giữa thành threshold-2 bucket
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Điểm trung bình của bucket kế tiếp (hoặc điểm cuối cùng)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+
+def minmax_indices(y, threshold):
+    """
+    Min/max theo bucket: mỗi bucket giữ lại điểm nhỏ nhất và lớn nhất,
+    đảm bảo mọi đỉnh (vd: khối lượng giao dịch 2008, 2020) đều xuất hiện trên biểu đồ.
+    """
+    import numpy as np
+
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    y = _as_float(y)
+    n_buckets = (threshold - 2) // 2
+    edges = np.unique(np.linspace(1, n - 1, n_buckets + 1).astype(np.int64))
+
+    picked = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        picked.append(start + int(np.argmin(bucket)))
+        picked.append(start + int(np.argmax(bucket)))
+
+    return np.unique(np.asarray(picked, dtype=np.int64))
+
+
+def downsample_frame(df, x_col, y_col, max_points, method='lttb'):
+    """
+    Giảm số điểm của một chuỗi thời gian xuống khoảng `max_points` trước khi vẽ.
+    Dữ liệu phải được sắp xếp theo `x_col`.
+    """
+    if method == 'none' or not max_points or len(df) <= max_points:
+        return df
+
+    if method == 'lttb':
+        indices = lttb_indices(df[x_col].to_numpy(), df[y_col].to_numpy(), max_points)
+    elif method == 'minmax':
+        indices = minmax_indices(df[y_col].to_numpy(), max_points)
+    else:
+        raise ValueError(f"Phương pháp giảm mẫu không hợp lệ: {method} (chọn một trong {DOWNSAMPLE_METHODS})")
+
+    return df.iloc[indices]
+
+
+def resolve_render_mode(rows, mode='auto'):
+    """
+    Cách vẽ ('svg', 'webgl' hoặc 'density') cho một biểu đồ dựng từ `rows` dòng dữ liệu gốc.
+    """
+    if mode != 'auto':
+        return mode
+    if rows >= DENSITY_THRESHOLD:
+        return 'density'
+    return 'webgl' if rows >= WEBGL_THRESHOLD else 'svg'
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    """
+    Đếm số điểm trong lưới `bins` x `bins` ô phủ [min, max] của x và y (vector hóa bằng np.histogram2d).
+    Trả về (tâm ô theo x, tâm ô theo y, ma trận số đếm [y, x]); tâm ô theo x là datetime64 nếu x là ngày.
+    Ô không có điểm nào là NaN để heatmap để trống thay vì tô màu của giá trị 0. Số đếm là float32
+    (chính xác tới ~16 triệu điểm mỗi ô) để lưới nhúng trong trang chỉ bằng nửa so với float64.
+    """
+    import numpy as np
+
+    is_date = np.issubdtype(np.asarray(x).dtype, np.datetime64)
+    x, y = _as_float(x), _as_float(y)
+    keep = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    if is_date:
+        x_centers = x_centers.astype(np.int64).astype('datetime64[ns]')
+    return x_centers, y_centers, np.where(counts.T > 0, counts.T, np.nan).astype(np.float32)
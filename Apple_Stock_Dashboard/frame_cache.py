@@ -0,0 +1,162 @@
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+
+import data_source
+
+# Tăng số này mỗi khi logic của process_stock_data thay đổi để vô hiệu hóa cache cũ
+PROCESSING_VERSION = 1
+
+FRAME_FILE = 'processed_frame.feather'
+META_FILE = 'processed_frame.json'
+
+
+def file_sha256(filepath, chunk_size=1 << 20):
+    hasher = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _read_meta(cache_dir):
+    meta_path = os.path.join(cache_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    meta_path = os.path.join(cache_dir, META_FILE)
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _source_matches(filepath, cache_dir, meta):
+    """
+    So khớp nhanh bằng kích thước + mtime; nếu mtime đổi (vd: file được tải lại
+    với nội dung y hệt) thì so sánh hash SHA-256 và cập nhật lại mtime.
+    """
+    if meta is None or meta.get('processing_version') != PROCESSING_VERSION:
+        return False
+    if meta.get('source') != os.path.abspath(filepath):
+        return False
+
+    stat = os.stat(filepath)
+    if stat.st_size != meta.get('size'):
+        return False
+    if stat.st_mtime_ns == meta.get('mtime_ns'):
+        return True
+
+    if file_sha256(filepath) != meta.get('sha256'):
+        return False
+    meta['mtime_ns'] = stat.st_mtime_ns
+    _write_meta(cache_dir, meta)
+    return True
+
+
+def _read_frame(cache_dir):
+    import pyarrow.feather as feather
+    return feather.read_table(os.path.join(cache_dir, FRAME_FILE), memory_map=True).to_pandas()
+
+
+def load_cached_frame(filepath, cache_dir):
+    """
+    Trả về DataFrame đã xử lý từ cache Feather (đọc memory-mapped) nếu file nguồn
+    không thay đổi, ngược lại trả về None.
+    """
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+
+    frame_path = os.path.join(cache_dir, FRAME_FILE)
+    if not os.path.exists(frame_path):
+        return None
+    if not _source_matches(filepath, cache_dir, _read_meta(cache_dir)):
+        return None
+
+    try:
+        return _read_frame(cache_dir)
+    except Exception as e:
+        print(f"⚠ Không đọc được cache dữ liệu ({e}). Sẽ xử lý lại file CSV.")
+        return None
+
+
+def load_appended_frame(filepath, cache_dir, clean):
+    """
+    Nếu file nguồn chỉ được nối thêm dòng ở cuối (phần đầu trùng byte-by-byte với bản đã cache),
+    chỉ đọc phần đuôi mới, làm sạch bằng `clean` và nối vào DataFrame trong cache.
+    Trả về (DataFrame đầy đủ, DataFrame các dòng mới, thông tin để lưu lại cache) hoặc None.
+    """
+    meta = _read_meta(cache_dir)
+    if meta is None or meta.get('processing_version') != PROCESSING_VERSION or 'csv_rows' not in meta:
+        return None
+    if meta.get('source') != os.path.abspath(filepath) or os.path.getsize(filepath) <= meta['size']:
+        return None
+
+    sha256, prefix_sha256 = data_source.hash_file(filepath, prefix_bytes=meta['size'])
+    if prefix_sha256 != meta['sha256']:
+        return None
+    with open(filepath, 'rb') as f:
+        f.seek(meta['size'] - 1)
+        if f.read(1) != b'\n':
+            return None
+        tail = f.read()
+
+    try:
+        cached = _read_frame(cache_dir)
+    except Exception:
+        return None
+    raw = pd.read_csv(io.BytesIO(tail), header=None, names=meta['header'])
+    # clean có thể bỏ dòng ngay trên raw (dropna inplace) nên đếm số dòng CSV trước khi làm sạch
+    csv_rows = meta['csv_rows'] + len(raw)
+    raw.index = pd.RangeIndex(meta['csv_rows'], csv_rows)
+    new_rows = clean(raw)
+    # Phần đuôi được đọc riêng nên kiểu dữ liệu có thể khác (vd: int thay vì float); ép theo bản cache
+    new_rows = new_rows.astype({col: cached[col].dtype for col in new_rows.columns
+                                if col in cached.columns and new_rows[col].dtype != cached[col].dtype})
+    df = pd.concat([cached, new_rows])
+    return df, new_rows, {'header': meta['header'], 'csv_rows': csv_rows, 'sha256': sha256}
+
+
+def save_cached_frame(filepath, cache_dir, df, header=None, csv_rows=None, sha256=None):
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        print("⚠ Chưa cài pyarrow nên không lưu cache dữ liệu (pip install pyarrow).")
+        return False
+
+    os.makedirs(cache_dir, exist_ok=True)
+    frame_path = os.path.join(cache_dir, FRAME_FILE)
+    tmp_path = frame_path + '.tmp'
+
+    # Không nén để có thể đọc memory-mapped ở lần chạy sau
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, frame_path)
+
+    stat = os.stat(filepath)
+    meta = {
+        'processing_version': PROCESSING_VERSION,
+        'source': os.path.abspath(filepath),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha256 or file_sha256(filepath),
+        'rows': len(df),
+    }
+    # Tên cột và số dòng CSV (trước khi bỏ dòng thiếu dữ liệu) để đọc tiếp phần được nối thêm
+    if header is not None and csv_rows is not None:
+        meta.update({'header': list(header), 'csv_rows': csv_rows})
+    _write_meta(cache_dir, meta)
+    return True
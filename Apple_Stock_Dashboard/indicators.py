@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Tăng số này mỗi khi công thức/tham số chỉ báo thay đổi để vô hiệu hóa cache cũ
+INDICATOR_VERSION = 1
+
+FRAME_FILE = 'indicators.feather'
+META_FILE = 'indicators.json'
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_SPANS = (12, 26)
+BOLLINGER_WINDOW = 20
+BOLLINGER_STD = 2.0
+RSI_PERIOD = 14
+VOLATILITY_WINDOW = 21
+TRADING_DAYS = 252
+
+INDICATOR_COLUMNS = (['Log_Return'] + [f'SMA_{w}' for w in SMA_WINDOWS] + [f'EMA_{s}' for s in EMA_SPANS]
+                     + ['BB_Upper', 'BB_Lower', f'RSI_{RSI_PERIOD}', f'Volatility_{VOLATILITY_WINDOW}',
+                        'Drawdown_Percent'])
+
+# Số giá đóng cửa gần nhất cần giữ lại để tính tiếp các cửa sổ trượt khi có thêm dòng mới
+# (độ biến động cần VOLATILITY_WINDOW lợi suất, tức VOLATILITY_WINDOW + 1 giá)
+LOOKBACK = max(max(SMA_WINDOWS), BOLLINGER_WINDOW, VOLATILITY_WINDOW + 1)
+
+
+def _ewm(values, alpha, seed):
+    """
+    Trung bình trượt lũy thừa (adjust=False). Có `seed` (giá trị cuối của lần tính trước) thì nối vào
+    đầu chuỗi, nên kết quả trùng với việc tính lại từ đầu mà chỉ tốn O(số dòng mới).
+    """
+    if seed is None:
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return pd.Series(np.concatenate([[seed], values])).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def _compute_block(close, state):
+    """
+    Tính mọi chỉ báo cho các giá đóng cửa `close` (một mã, đã sắp xếp theo ngày) nối tiếp trạng thái
+    `state` của các dòng trước đó (None nếu là dòng đầu tiên). Trả về ({cột: mảng}, trạng thái mới).
+    """
+    tail = np.asarray(state['tail'] if state else [], dtype='float64')
+    offset = len(tail)
+    rows_before = state['rows'] if state else 0
+    full = np.concatenate([tail, close])
+    series = pd.Series(full)
+    # Vị trí (trong toàn bộ lịch sử của mã) của từng dòng mới, dùng để ẩn giá trị khi chưa đủ dữ liệu
+    position = np.arange(rows_before, rows_before + len(close))
+
+    out = {}
+    log_return = np.diff(np.log(full), prepend=np.nan)
+    out['Log_Return'] = log_return[offset:]
+    for window in SMA_WINDOWS:
+        out[f'SMA_{window}'] = series.rolling(window).mean().to_numpy()[offset:]
+
+    ema_state = {}
+    for span in EMA_SPANS:
+        ema = _ewm(close, 2.0 / (span + 1), state['ema'][str(span)] if state else None)
+        ema_state[str(span)] = float(ema[-1])
+        out[f'EMA_{span}'] = np.where(position >= span - 1, ema, np.nan)
+
+    middle = series.rolling(BOLLINGER_WINDOW).mean().to_numpy()[offset:]
+    band = BOLLINGER_STD * series.rolling(BOLLINGER_WINDOW).std(ddof=0).to_numpy()[offset:]
+    out['BB_Upper'] = middle + band
+    out['BB_Lower'] = middle - band
+
+    # RSI theo Wilder: trung bình lũy thừa của mức tăng/giảm với alpha = 1/RSI_PERIOD
+    delta = np.diff(full, prepend=np.nan)[offset:]
+    avg_gain = _ewm(np.clip(delta, 0, None), 1.0 / RSI_PERIOD, state['avg_gain'] if state else None)
+    avg_loss = _ewm(np.clip(-delta, 0, None), 1.0 / RSI_PERIOD, state['avg_loss'] if state else None)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    out[f'RSI_{RSI_PERIOD}'] = np.where(position >= RSI_PERIOD, rsi, np.nan)
+
+    volatility = pd.Series(log_return).rolling(VOLATILITY_WINDOW).std().to_numpy()[offset:]
+    out[f'Volatility_{VOLATILITY_WINDOW}'] = volatility * np.sqrt(TRADING_DAYS) * 100
+
+    peak = np.fmax.accumulate(np.concatenate([[state['peak']] if state else [], close]))[-len(close):]
+    out['Drawdown_Percent'] = (close / peak - 1.0) * 100
+
+    new_state = {
+        'tail': full[-LOOKBACK:].tolist(),
+        'ema': ema_state,
+        'avg_gain': float(avg_gain[-1]),
+        'avg_loss': float(avg_loss[-1]),
+        'peak': float(peak[-1]),
+        'rows': rows_before + len(close),
+    }
+    return out, new_state
+
+
+def _prefix_digest(dates, close):
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(dates.astype('datetime64[ns]').astype('int64').tobytes())
+    hasher.update(close.tobytes())
+    return hasher.hexdigest()
+
+
+def _ticker_groups(df):
+    """
+    Trả về [(mã, vị trí các dòng của mã trong df đã sắp xếp theo ngày)]; df không có cột ticker được coi là một mã.
+    """
+    dates = df['Date'].to_numpy()
+    if 'ticker' not in df.columns:
+        return [('', np.argsort(dates, kind='stable'))]
+    codes, uniques = pd.factorize(df['ticker'].astype(str), sort=True)
+    order = np.lexsort((dates, codes))
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return [(str(ticker), order[bounds[i]:bounds[i + 1]]) for i, ticker in enumerate(uniques)]
+
+
+def compute_indicators(df, states=None, cached=None):
+    """
+    Tính các chỉ báo kỹ thuật (INDICATOR_COLUMNS) cho từng mã trong df, vector hóa bằng NumPy/pandas.
+    Nếu có `states`/`cached` từ lần tính trước (xem load_or_compute_indicators) và lịch sử cũ của mã
+    không đổi, chỉ các dòng mới được tính tiếp từ trạng thái đã lưu.
+    Trả về (DataFrame chỉ báo cùng index với df, trạng thái mới theo mã, số dòng đã tính mới).
+    """
+    states = states or {}
+    values = np.full((len(df), len(INDICATOR_COLUMNS)), np.nan)
+    new_states, computed = {}, 0
+    all_dates = df['Date'].to_numpy()
+    all_close = df['Close'].to_numpy(dtype='float64')
+
+    for ticker, positions in _ticker_groups(df):
+        dates, close = all_dates[positions], all_close[positions]
+        state = states.get(ticker)
+        start = 0
+        if state is not None and cached is not None and ticker in cached:
+            rows = state['rows']
+            if (len(close) >= rows and len(cached[ticker]) == rows
+                    and _prefix_digest(dates[:rows], close[:rows]) == state['digest']):
+                values[positions[:rows]] = cached[ticker]
+                start = rows
+        if start < len(close):
+            block, state = _compute_block(close[start:], state if start else None)
+            values[positions[start:]] = np.column_stack([block[col] for col in INDICATOR_COLUMNS])
+            computed += len(close) - start
+        state['digest'] = _prefix_digest(dates, close)
+        new_states[ticker] = state
+
+    return pd.DataFrame(values, index=df.index, columns=INDICATOR_COLUMNS), new_states, computed
+
+
+def _load_cache(cache_dir):
+    meta_path = os.path.join(cache_dir, META_FILE)
+    frame_path = os.path.join(cache_dir, FRAME_FILE)
+    if not (os.path.exists(meta_path) and os.path.exists(frame_path)):
+        return None, None
+    try:
+        import pyarrow.feather as feather
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('indicator_version') != INDICATOR_VERSION or meta.get('columns') != INDICATOR_COLUMNS:
+            return None, None
+        table = feather.read_table(frame_path, memory_map=True)
+    except Exception as e:
+        print(f"⚠ Không đọc được cache chỉ báo ({e}). Sẽ tính lại toàn bộ.")
+        return None, None
+
+    # File cache lưu các mã nối tiếp nhau theo thứ tự trong meta['order']
+    values = np.column_stack([table.column(col).to_numpy() for col in INDICATOR_COLUMNS])
+    cached, start = {}, 0
+    for ticker in meta['order']:
+        rows = meta['states'][ticker]['rows']
+        cached[ticker] = values[start:start + rows]
+        start += rows
+    return meta['states'], cached
+
+
+def _save_cache(cache_dir, df, frame, states):
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return False
+
+    os.makedirs(cache_dir, exist_ok=True)
+    groups = _ticker_groups(df)
+    order = np.concatenate([positions for _, positions in groups]) if groups else np.array([], dtype='int64')
+    table = pa.table({col: frame[col].to_numpy()[order] for col in INDICATOR_COLUMNS})
+    frame_path = os.path.join(cache_dir, FRAME_FILE)
+    feather.write_feather(table, frame_path + '.tmp', compression='uncompressed')
+    os.replace(frame_path + '.tmp', frame_path)
+
+    meta_path = os.path.join(cache_dir, META_FILE)
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'indicator_version': INDICATOR_VERSION, 'columns': INDICATOR_COLUMNS,
+                   'order': [ticker for ticker, _ in groups], 'states': states}, f)
+    os.replace(meta_path + '.tmp', meta_path)
+    return True
+
+
+def add_indicators(df, cache_dir=None):
+    """
+    Thêm các cột chỉ báo kỹ thuật vào df (cache Feather + trạng thái JSON cạnh processed_frame trong
+    cache_dir). Khi dữ liệu chỉ được nối thêm dòng mới, các chỉ báo cũ được đọc lại từ cache và
+    các đường trung bình/cửa sổ trượt được tính tiếp với chi phí O(số dòng mới).
+    """
+    states, cached = _load_cache(cache_dir) if cache_dir is not None else (None, None)
+    frame, states, computed = compute_indicators(df, states, cached)
+    if cache_dir is not None and computed:
+        _save_cache(cache_dir, df, frame, states)
+    print(f"Tính chỉ báo kỹ thuật... Xong (tính mới {computed} dòng, dùng cache {len(df) - computed} dòng).")
+    return pd.concat([df.drop(columns=INDICATOR_COLUMNS, errors='ignore'), frame], axis=1)
+
+
+def has_indicators(df):
+    return all(col in df.columns for col in INDICATOR_COLUMNS)
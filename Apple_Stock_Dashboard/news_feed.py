@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_FEEDS = [
+    "https://developer.apple.com/news/rss/news.rss",
+    # Dù có đuôi .rss, feed của Newsroom là Atom (<feed>/<entry>); rss_parser đọc được cả hai
+    "https://www.apple.com/newsroom/rss-feed.rss",
+]
+
+# Tin được coi là còn mới trong khoảng này: không gửi request nào
+DEFAULT_MAX_AGE_SECONDS = 30 * 60
+# (connect, read) timeout cho mỗi lần chờ socket; không giới hạn tổng thời gian của request
+REQUEST_TIMEOUT = (3, 5)
+# Tổng thời gian tối đa (tính cả tải nội dung) build chờ tất cả các feed
+DEFAULT_DEADLINE_SECONDS = 8
+FEED_CHUNK_SIZE = 64 * 1024
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/rss+xml, application/atom+xml, application/xml, text/xml, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def _cache_paths(cache_dir, url):
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.json"), os.path.join(cache_dir, f"{key}.xml")
+
+
+def load_cached_feed(cache_dir, url):
+    """
+    Trả về (meta, nội dung bytes) của feed đã cache, hoặc (None, None).
+    """
+    meta_path, body_path = _cache_paths(cache_dir, url)
+    if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+        return None, None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            return meta, f.read()
+    except (OSError, ValueError):
+        return None, None
+
+
+def save_cached_feed(cache_dir, url, meta, content=None):
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path, body_path = _cache_paths(cache_dir, url)
+    if content is not None:
+        with open(body_path + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(body_path + '.tmp', body_path)
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def create_session(pool_size):
+    # requests chỉ được nạp khi thực sự cần gửi request (khởi động CLI nhanh hơn)
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _read_body(response, deadline_at):
+    """
+    Đọc nội dung response theo từng đoạn, dừng khi quá mốc thời gian `deadline_at` (time.monotonic).
+    Read timeout chỉ áp cho từng lần chờ socket nên server gửi nhỏ giọt vẫn có thể giữ request mãi
+    nếu không kiểm tra. read1 (urllib3 >= 2) trả về ngay phần dữ liệu đã nhận thay vì chờ đủ cả đoạn.
+    """
+    import requests
+    import urllib3
+
+    read1 = getattr(response.raw, 'read1', None)
+    if read1 is not None:
+        chunks = iter(lambda: read1(FEED_CHUNK_SIZE, decode_content=True), b'')
+    else:
+        chunks = response.iter_content(FEED_CHUNK_SIZE)
+    body = []
+    try:
+        for chunk in chunks:
+            body.append(chunk)
+            if deadline_at is not None and time.monotonic() > deadline_at:
+                raise requests.exceptions.Timeout("Quá tổng thời gian cho phép khi tải feed")
+    except urllib3.exceptions.HTTPError as e:
+        # read1 đọc thẳng từ urllib3 nên lỗi không được requests bọc lại như iter_content
+        raise requests.exceptions.ConnectionError(e)
+    return b''.join(body)
+
+
+def fetch_feed(session, url, cache_dir, max_age=DEFAULT_MAX_AGE_SECONDS, timeout=REQUEST_TIMEOUT, deadline=None):
+    """
+    Lấy một feed RSS/Atom, ưu tiên cache:
+    - cache còn mới: trả về ngay, không gửi request;
+    - cache cũ: gửi GET có điều kiện (If-None-Match / If-Modified-Since), 304 thì dùng lại cache;
+    - lỗi mạng/HTTP hoặc quá `deadline` giây (tổng thời gian, kể cả tải nội dung): trả về bản cache cũ nếu có.
+    Trả về dict {'url', 'content', 'status'} với status là 'fresh', 'not-modified', 'updated', 'stale' hoặc 'error'.
+    """
+    import requests
+
+    meta, cached = load_cached_feed(cache_dir, url)
+    if meta and time.time() - meta.get('fetched_at', 0) < max_age:
+        return {'url': url, 'content': cached, 'status': 'fresh'}
+
+    headers = {}
+    if meta and meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta and meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    deadline_at = time.monotonic() + deadline if deadline is not None else None
+    if deadline is not None:
+        # Không chờ socket lâu hơn phần thời gian còn lại
+        timeout = tuple(min(value, deadline) for value in timeout)
+
+    try:
+        with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and cached is not None:
+                meta['fetched_at'] = time.time()
+                save_cached_feed(cache_dir, url, meta)
+                return {'url': url, 'content': cached, 'status': 'not-modified'}
+            response.raise_for_status()
+            content = _read_body(response, deadline_at)
+    except requests.exceptions.RequestException as e:
+        print(f"⚠ Không lấy được feed {url}: {type(e).__name__}")
+        if cached is not None:
+            return {'url': url, 'content': cached, 'status': 'stale'}
+        return {'url': url, 'content': None, 'status': 'error'}
+
+    save_cached_feed(cache_dir, url, {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_type': response.headers.get('Content-Type'),
+        'fetched_at': time.time(),
+    }, content)
+    return {'url': url, 'content': content, 'status': 'updated'}
+
+
+def fetch_feeds(urls, cache_dir, max_age=DEFAULT_MAX_AGE_SECONDS, timeout=REQUEST_TIMEOUT,
+                deadline=DEFAULT_DEADLINE_SECONDS):
+    """
+    Lấy song song nhiều feed trên một session dùng chung. Mỗi request tự dừng sau `deadline` giây;
+    feed nào chưa xong khi đó sẽ dùng bản cache cũ (nếu có) để build không bao giờ bị treo vì một feed chậm.
+    Các luồng là daemon nên một request còn treo cũng không giữ tiến trình lại khi thoát.
+    Kết quả trả về theo đúng thứ tự của `urls`.
+    """
+    if not urls:
+        return []
+
+    session = create_session(len(urls))
+    fetched = [None] * len(urls)
+
+    def worker(index, url):
+        try:
+            fetched[index] = fetch_feed(session, url, cache_dir, max_age, timeout, deadline)
+        except Exception as e:
+            print(f"⚠ Lỗi khi xử lý feed {url}: {e}")
+
+    threads = [threading.Thread(target=worker, args=(index, url), name=f'news-feed-{index}', daemon=True)
+               for index, url in enumerate(urls)]
+    deadline_at = time.monotonic() + deadline
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(deadline_at - time.monotonic(), 0))
+
+    results = []
+    for url, thread, result in zip(urls, threads, list(fetched)):
+        if result is not None:
+            results.append(result)
+            continue
+        if thread.is_alive():
+            print(f"⚠ Feed {url} quá chậm (> {deadline}s), dùng bản cache cũ.")
+        _, cached = load_cached_feed(cache_dir, url)
+        results.append({'url': url, 'content': cached, 'status': 'stale' if cached is not None else 'error'})
+    return results
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+
+import asset_pipeline
+
+# Tăng số này mỗi khi cách tách từ thay đổi để vô hiệu hóa chỉ mục cũ
+INDEX_VERSION = 1
+INDEX_FILE = 'news_words.json'
+
+# Kích thước bố cục (bản 1x) và số từ tối đa như mặc định của WordCloud
+WIDTH, HEIGHT = 800, 400
+MAX_WORDS = 200
+# Seed cố định: cùng bảng tần suất luôn cho cùng một bố cục (và cùng khóa cache)
+RANDOM_SEED = 42
+# Các bản được ghi ra: tỉ lệ so với bản 1x và định dạng. Mặc định chỉ ghi png đã giảm còn 256 màu + tối ưu:
+# với chữ trên nền trắng, bản này nhỏ hơn cả WebP nén có mất mát (quality 80), nên webp là tùy chọn
+SCALES = (1, 2)
+FORMATS = ('png',)
+FORMAT_OPTIONS = ['png', 'webp']
+WEBP_QUALITY = 80
+# Tiêu đề vẽ trong ảnh (như bản matplotlib trước đây): dải trắng phía trên bố cục, kích thước theo bản 1x
+TITLE = 'WordCloud Tin tức về Apple'
+TITLE_BAND = 40
+TITLE_FONT_SIZE = 20
+
+
+def split_items(news_text):
+    """
+    Tách văn bản tin tức (mỗi tin cách nhau một dòng trống, xem parse_news_feed) thành danh sách tin.
+    """
+    return [item.strip() for item in news_text.split('\n\n') if item.strip()]
+
+
+def item_key(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def tokenize(text):
+    """
+    Đếm từ của một tin theo đúng cách WordCloud tách từ (bỏ stopword, gộp số nhiều, bỏ "'s").
+    Không ghép cụm hai từ vì thống kê cụm từ trên từng tin ngắn không có ý nghĩa.
+    """
+    from wordcloud import WordCloud
+
+    return WordCloud(collocations=False).process_text(text)
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index.get('items', {}) if index.get('version') == INDEX_VERSION else {}
+
+
+def _save_index(cache_dir, items):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, INDEX_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'items': items}, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def word_frequencies(news_text, cache_dir=None, max_words=MAX_WORDS):
+    """
+    Bảng tần suất từ của toàn bộ tin tức, gộp từ chỉ mục tần suất của từng tin (lưu trong cache_dir):
+    chỉ các tin mới được tách từ, tin không còn trong feed bị bỏ khỏi chỉ mục.
+    Trả về {từ: số lần} gồm `max_words` từ nhiều nhất theo thứ tự cố định (số lần giảm dần, rồi theo từ).
+    """
+    cached = _load_index(cache_dir) if cache_dir is not None else {}
+    items = {}
+    for text in split_items(news_text):
+        key = item_key(text)
+        items[key] = cached[key] if key in cached else tokenize(text)
+    if cache_dir is not None and items.keys() != cached.keys():
+        _save_index(cache_dir, items)
+
+    totals = {}
+    for counts in items.values():
+        for word, count in counts.items():
+            totals[word] = totals.get(word, 0) + count
+    ranked = sorted(totals.items(), key=lambda pair: (-pair[1], pair[0]))[:max_words]
+    return dict(ranked)
+
+
+def variant_path(output_path, scale, fmt):
+    """
+    news_wordcloud.png -> news_wordcloud.png (1x, png), news_wordcloud@2x.webp (2x, webp)...
+    """
+    stem = os.path.splitext(output_path)[0]
+    return f"{stem}{'' if scale == 1 else f'@{scale}x'}.{fmt}"
+
+
+def _title_font(size):
+    from PIL import ImageFont
+
+    # DejaVu Sans (đi kèm matplotlib) có đủ dấu tiếng Việt; phông mặc định của Pillow thì không chắc
+    try:
+        import matplotlib
+        return ImageFont.truetype(os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf', 'DejaVuSans.ttf'), size)
+    except (ImportError, OSError):
+        return ImageFont.load_default(size)
+
+
+def add_title(image, title, scale=1):
+    """
+    Thêm dải tiêu đề (căn giữa) phía trên ảnh, cao TITLE_BAND * scale điểm ảnh.
+    """
+    from PIL import Image, ImageDraw
+
+    band = TITLE_BAND * scale
+    canvas = Image.new('RGB', (image.width, image.height + band), 'white')
+    canvas.paste(image, (0, band))
+    ImageDraw.Draw(canvas).text((image.width / 2, band / 2), title, fill='black',
+                                font=_title_font(TITLE_FONT_SIZE * scale), anchor='mm')
+    return canvas
+
+
+def render_variants(frequencies, output_path, scales=SCALES, formats=FORMATS, seed=RANDOM_SEED, title=TITLE):
+    """
+    Dựng bố cục WordCloud một lần từ bảng tần suất rồi vẽ ở từng tỉ lệ trong `scales` (có tiêu đề `title`
+    nếu khác rỗng), ghi mỗi định dạng trong `formats` cạnh output_path (xem variant_path).
+    Bản png luôn có ở tỉ lệ 1x làm ảnh mặc định. Trả về danh sách file đã ghi.
+    """
+    from PIL import Image, features
+    from wordcloud import WordCloud
+
+    if 'webp' in formats and not features.check('webp'):
+        print("⚠ Pillow không hỗ trợ WebP, chỉ ghi bản PNG.")
+        formats = [fmt for fmt in formats if fmt != 'webp']
+    cloud = WordCloud(width=WIDTH, height=HEIGHT, background_color='white', max_words=MAX_WORDS,
+                      random_state=seed).generate_from_frequencies(frequencies)
+
+    written = []
+    for scale in sorted(set(scales) | {1}):
+        cloud.scale = scale
+        image = cloud.to_image()
+        if title:
+            image = add_title(image, title, scale)
+        wanted = [fmt for fmt in formats if scale in scales]
+        if scale == 1 and 'png' not in wanted:
+            wanted.append('png')
+        for fmt in wanted:
+            path = variant_path(output_path, scale, fmt)
+            if fmt == 'png':
+                # Chữ trên nền trắng: bảng 256 màu gần như không khác bằng mắt nhưng nhỏ hơn nhiều lần
+                image.quantize(256, method=Image.Quantize.FASTOCTREE).save(path, 'PNG', optimize=True)
+            else:
+                image.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+            written.append(path)
+
+    # Xóa các bản (kể cả bản đã băm tên) của lần vẽ trước không còn được yêu cầu, vd: khi đổi tỉ lệ
+    directory, stem = os.path.split(os.path.splitext(output_path)[0])
+    keep = {os.path.basename(path) for path in written}
+    for name in os.listdir(directory):
+        logical = asset_pipeline.logical_name(name) or name
+        base, ext = os.path.splitext(logical)
+        if (base == stem or base.startswith(f'{stem}@')) and ext[1:] in FORMAT_OPTIONS and logical not in keep:
+            os.remove(os.path.join(directory, name))
+    return written
+
+
+def manifest_variants(asset_manifest, logical_path, prefix=''):
+    """
+    Các bản của ảnh `logical_path` (vd: 'charts_static/news_wordcloud.png') có trong asset_manifest:
+    [(định dạng, tỉ lệ, đường dẫn đã băm có thêm `prefix`)]; chỉ có bản png 1x nếu manifest không có bản nào.
+    """
+    stem = os.path.splitext(logical_path)[0]
+    variants = []
+    for logical, hashed in asset_manifest.items():
+        base, ext = os.path.splitext(logical)
+        if ext[1:] not in FORMAT_OPTIONS:
+            continue
+        if base == stem:
+            variants.append((ext[1:], 1, prefix + hashed))
+        elif base.startswith(f'{stem}@') and base.endswith('x') and base[len(stem) + 1:-1].isdigit():
+            variants.append((ext[1:], int(base[len(stem) + 1:-1]), prefix + hashed))
+    return sorted(variants) or [('png', 1, prefix + logical_path)]
@@ -0,0 +1,145 @@
+import html
+import json
+import os
+from string import Template
+
+import asset_pipeline
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(SOURCE_DIR, 'templates')
+ASSETS_DIR_NAME = 'assets'
+
+# CSS/JS dùng chung cho mọi trang, được chép ra thư mục assets/ với tên có mã băm nội dung
+SHARED_ASSETS = {
+    'css': os.path.join(SOURCE_DIR, 'common_style.css'),
+    'js': os.path.join(SOURCE_DIR, 'common_script.js'),
+}
+
+_templates = {}
+
+
+def load_template(name):
+    if name not in _templates:
+        with open(os.path.join(TEMPLATE_DIR, name), 'r', encoding='utf-8') as f:
+            _templates[name] = Template(f.read())
+    return _templates[name]
+
+
+def render_template(name, **context):
+    """
+    Điền `context` vào templates/<name> (cú pháp $tên của string.Template).
+    Thiếu biến nào sẽ báo KeyError thay vì lặng lẽ để lại chỗ trống.
+    """
+    return load_template(name).substitute(context)
+
+
+def write_if_changed(path, content):
+    """
+    Chỉ ghi file khi nội dung khác bản đang có trên đĩa (giữ nguyên mtime/ETag của trang không đổi).
+    Trả về True nếu file đã được ghi.
+    """
+    data = content.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_hashed_asset(source_path, out_dir):
+    """
+    Chép file nguồn vào out_dir dưới tên <tên>.<mã băm><đuôi> và xóa các bản băm cũ của nó.
+    Nội dung đổi thì tên đổi, nên trình duyệt có thể cache file lâu dài. Trả về đường dẫn file.
+    """
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    filename = os.path.basename(source_path)
+    name = asset_pipeline.hashed_name(filename, data)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    asset_pipeline.remove_stale_versions(out_dir, filename, keep=name)
+    return path
+
+
+def write_shared_assets(site_dir):
+    """
+    Ghi CSS/JS dùng chung vào site_dir/assets/, trả về {'css': đường dẫn, 'js': đường dẫn}.
+    """
+    out_dir = os.path.join(site_dir, ASSETS_DIR_NAME)
+    return {key: write_hashed_asset(source, out_dir) for key, source in SHARED_ASSETS.items()}
+
+
+def asset_hrefs(assets, page_dir):
+    """
+    Đường dẫn tương đối từ thư mục chứa trang tới từng asset.
+    """
+    return {key: os.path.relpath(path, page_dir).replace(os.sep, '/') for key, path in assets.items()}
+
+
+def image_media(src, alt):
+    return f'<img src="{src}" alt="{alt}">'
+
+
+def picture_media(variants, alt):
+    """
+    Ảnh có nhiều bản [(định dạng, tỉ lệ, src)]: <picture> chọn bản theo mật độ điểm ảnh của màn hình,
+    ưu tiên WebP và dùng PNG (bản 1x) cho thẻ <img> dự phòng.
+    """
+    srcsets = {}
+    for fmt, scale, src in sorted(variants, key=lambda variant: variant[1]):
+        srcsets.setdefault(fmt, []).append(f"{src} {scale}x")
+    fallback = 'png' if 'png' in srcsets else next(iter(srcsets))
+    sources = ''.join(f'<source type="image/{fmt}" srcset="{", ".join(srcset)}">'
+                      for fmt, srcset in srcsets.items() if fmt != fallback)
+    img_src = srcsets[fallback][0].rsplit(' ', 1)[0]
+    return (f'<picture>{sources}<img src="{img_src}" srcset="{", ".join(srcsets[fallback])}" '
+            f'alt="{alt}"></picture>')
+
+
+def _chart_frame(chart_html, height, title, preview):
+    preview_html = f'<img class="chart-preview" src="{preview}" alt="{title}" loading="lazy">' if preview else ''
+    return (f'<div class="chart-frame" style="height: {height}px">{chart_html}{preview_html}'
+            f'<button type="button" class="chart-expand" title="Phóng to">&#x2922;</button></div>')
+
+
+def iframe_media(src, height, title, preview=None):
+    """
+    Biểu đồ tương tác được tải trễ: iframe chỉ có data-src, common_script.js gán src khi khung
+    cuộn tới gần màn hình. Trong lúc chờ, ảnh `preview` (nếu có) được hiển thị thay thế.
+    """
+    return _chart_frame(f'<iframe data-src="{src}" height="{height}" title="{title}"></iframe>',
+                        height, title, preview)
+
+
+def plotly_media(figure_src, sources, plotly_src, height, title, preview=None):
+    """
+    Biểu đồ vẽ ngay trên trang (chế độ 'data'): common_script.js tải plotly.js, file cấu hình
+    `figure_src` và các file dữ liệu trong `sources` ({tên nguồn: đường dẫn}) khi khung hiện ra.
+    """
+    chart_html = (f'<div class="plotly-chart" role="img" aria-label="{title}" data-figure="{figure_src}" '
+                  f'data-sources="{html.escape(json.dumps(sources))}" data-plotly="{plotly_src}"></div>')
+    return _chart_frame(chart_html, height, title, preview)
+
+
+def chart_card(title, insight, media, heading='h2'):
+    return render_template('chart_card.html', title=title, insight=insight, media=media,
+                           heading=heading).rstrip('\n')
+
+
+def render_page(page_template, title, nav, hrefs, container_class='container', **blocks):
+    """
+    Ghép phần nội dung riêng của trang (templates/<page_template>) vào bố cục chung base.html.
+    """
+    content = render_template(page_template, **blocks).rstrip('\n')
+    return render_template('base.html', title=title, nav=nav, content=content, container_class=container_class,
+                           css_href=hrefs['css'], js_href=hrefs['js'])
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# Hệ số của khoảng tin cậy 95% (phân phối chuẩn; với hàng nghìn dòng, phân phối t gần như trùng)
+Z_95 = 1.959963984540054
+# Seed cố định: cùng dữ liệu luôn cho cùng một mẫu điểm (và cùng file biểu đồ)
+RANDOM_SEED = 0
+
+
+def fit_from_moments(n, mean_x, mean_y, sxx, sxy, syy):
+    """
+    Hồi quy tuyến tính y = slope * x + intercept dạng đóng từ các mô-men
+    (sxx, sxy, syy là tổng bình phương/tích đã trừ trung bình, như comoment trong stream_aggregates).
+    Trả về dict chỉ gồm số thực nên có thể dùng làm tham số của job biểu đồ.
+    """
+    slope = sxy / sxx if sxx > 0 else 0.0
+    intercept = mean_y - slope * mean_x
+    r2 = sxy * sxy / (sxx * syy) if sxx > 0 and syy > 0 else 0.0
+    # Phương sai phần dư (n - 2 bậc tự do), dùng cho khoảng tin cậy của đường hồi quy
+    residual_var = max(syy - slope * sxy, 0.0) / (n - 2) if n > 2 else 0.0
+    return {'n': int(n), 'slope': float(slope), 'intercept': float(intercept), 'r2': float(r2),
+            'mean_x': float(mean_x), 'sxx': float(sxx), 'residual_std': float(np.sqrt(residual_var))}
+
+
+def ols_fit(x, y):
+    """
+    Hồi quy OLS của y theo x trên toàn bộ dữ liệu (bỏ các cặp có NaN), vector hóa bằng NumPy.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.isfinite(x) & np.isfinite(y)
+    x, y = x[keep], y[keep]
+    if len(x) == 0:
+        return fit_from_moments(0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    mean_x, mean_y = x.mean(), y.mean()
+    dx, dy = x - mean_x, y - mean_y
+    return fit_from_moments(len(x), mean_x, mean_y, dx @ dx, dx @ dy, dy @ dy)
+
+
+def trendline_frame(fit, x_min, x_max, points=50, z=Z_95):
+    """
+    Đường hồi quy trên [x_min, x_max] kèm khoảng tin cậy của giá trị trung bình:
+    y ± z * s * sqrt(1/n + (x - x̄)² / sxx). Trả về DataFrame gồm x, y, lower, upper.
+    """
+    x = np.linspace(x_min, x_max, points)
+    y = fit['slope'] * x + fit['intercept']
+    if fit['n'] > 2 and fit['sxx'] > 0:
+        half = z * fit['residual_std'] * np.sqrt(1 / fit['n'] + (x - fit['mean_x']) ** 2 / fit['sxx'])
+    else:
+        half = np.zeros_like(x)
+    return pd.DataFrame({'x': x, 'y': y, 'lower': y - half, 'upper': y + half})
+
+
+def stratified_sample(df, size, by='Year', seed=RANDOM_SEED):
+    """
+    Lấy mẫu `size` dòng của df phân tầng theo cột `by`: mỗi năm được số dòng tỉ lệ với số dòng của năm
+    (phần lẻ chia theo phương pháp số dư lớn nhất), chọn ngẫu nhiên với seed cố định.
+    Các dòng giữ thứ tự ban đầu nên cùng dữ liệu luôn cho cùng một mẫu.
+    """
+    if len(df) <= size:
+        return df
+    codes, _ = pd.factorize(df[by], sort=True)
+    counts = np.bincount(codes)
+    quota = counts * size / len(df)
+    take = np.floor(quota).astype(np.int64)
+    take[np.argsort(take - quota, kind='stable')[:size - take.sum()]] += 1
+
+    rng = np.random.default_rng(seed)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    chosen = [rng.choice(order[bounds[i]:bounds[i + 1]], take[i], replace=False) for i in range(len(counts))]
+    return df.iloc[np.sort(np.concatenate(chosen))]
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Tăng số này mỗi khi cách tổng hợp thay đổi để vô hiệu hóa bảng đã lưu
+ROLLUP_VERSION = 2
+
+META_FILE = 'rollups.json'
+FRAME_FILE = 'rollup_{level}.feather'
+
+# Các cấp thời gian, từ mịn đến thô, và tần suất pandas tương ứng
+LEVELS = ['day', 'week', 'month', 'quarter', 'year']
+LEVEL_FREQ = {'day': 'D', 'week': 'W', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+MEASURES = ['Close', 'Volume', 'Daily_Change_Percent']
+BASIC_STATS = ['sum', 'min', 'max', 'mean', 'count']
+QUANTILES = {'q25': 0.25, 'q50': 0.5, 'q75': 0.75}
+# Ở cấp ngày mỗi nhóm thường chỉ có một dòng nên không tính phân vị
+QUANTILE_LEVELS = ['week', 'month', 'quarter', 'year']
+WHISKER_IQR = 1.5
+
+
+def _period_columns(period, level):
+    """
+    Các cột nhãn của kỳ (Year, Quarter, Month, Week, Day) tùy theo cấp.
+    Cấp tuần dùng năm ISO đi cùng số tuần ISO (vd: tuần bắt đầu 2024-12-30 là tuần 1 của 2025).
+    """
+    columns = {'period': period, 'Year': period.dt.year}
+    if level == 'week':
+        iso = period.dt.isocalendar()
+        columns['Year'] = iso.year.astype('int32')
+        columns['Week'] = iso.week.astype('int32')
+    if level == 'quarter':
+        columns['Quarter'] = period.dt.quarter
+    if level in ('month', 'day'):
+        columns['Month'] = period.dt.month
+    if level == 'day':
+        columns['Day'] = period.dt.day
+    return columns
+
+
+def _rollup_level(df, level, keys):
+    period = df['Date'].dt.to_period(LEVEL_FREQ[level]).dt.start_time
+    frame = df[keys + MEASURES].assign(period=period)
+    grouped = frame.groupby(keys + ['period'], sort=True, observed=True)[MEASURES]
+
+    table = grouped.agg(BASIC_STATS)
+    table.columns = [f'{measure}_{stat}' for measure, stat in table.columns]
+    if level in QUANTILE_LEVELS:
+        quantiles = grouped.quantile(list(QUANTILES.values())).unstack()
+        quantiles.columns = [f'{measure}_{name}' for measure in MEASURES for name in QUANTILES]
+        table = table.join(quantiles)
+
+        # Râu của boxplot (như matplotlib, whis=1.5): giá trị xa nhất vẫn nằm trong [Q1 - 1.5 IQR, Q3 + 1.5 IQR]
+        codes = grouped.ngroup().to_numpy()
+        for measure in MEASURES:
+            q1 = table[f'{measure}_q25'].to_numpy()[codes]
+            q3 = table[f'{measure}_q75'].to_numpy()[codes]
+            values = frame[measure].to_numpy(dtype='float64')
+            iqr = q3 - q1
+            inside_low = np.where(values >= q1 - WHISKER_IQR * iqr, values, np.nan)
+            inside_high = np.where(values <= q3 + WHISKER_IQR * iqr, values, np.nan)
+            table[f'{measure}_whislo'] = pd.Series(inside_low).groupby(codes).min().to_numpy()
+            table[f'{measure}_whishi'] = pd.Series(inside_high).groupby(codes).max().to_numpy()
+
+    table = table.reset_index()
+    labels = pd.DataFrame(_period_columns(table['period'], level))
+    return pd.concat([table[keys], labels, table.drop(columns=keys + ['period'])], axis=1)
+
+
+def build_rollups(df, levels=LEVELS):
+    """
+    Tổng hợp df theo từng cấp thời gian (ngày -> tuần -> tháng -> quý -> năm) và theo mã (nếu có cột ticker).
+    Trả về {cấp: DataFrame} với các cột khóa (ticker, period, Year, ...) và <cột>_<thống kê>
+    cho mỗi cột trong MEASURES: sum/min/max/mean/count, phân vị q25/q50/q75 và râu boxplot whislo/whishi.
+    """
+    keys = ['ticker'] if 'ticker' in df.columns else []
+    if keys:
+        df = df.assign(ticker=df['ticker'].astype(str))
+    return {level: _rollup_level(df, level, keys) for level in levels}
+
+
+def frame_digest(df):
+    hasher = hashlib.blake2b(digest_size=16)
+    columns = ['Date'] + MEASURES + (['ticker'] if 'ticker' in df.columns else [])
+    hasher.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+
+def load_or_build_rollups(df, cache_dir=None):
+    """
+    Đọc các bảng tổng hợp đã lưu trong cache_dir (Feather) nếu chúng được dựng từ đúng dữ liệu này,
+    ngược lại dựng lại một lần và ghi ra để các lần build sau dùng lại.
+    """
+    digest = frame_digest(df)
+    meta_path = os.path.join(cache_dir, META_FILE) if cache_dir is not None else None
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        feather = None
+
+    if feather is not None and meta_path is not None and os.path.exists(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('rollup_version') == ROLLUP_VERSION and meta.get('digest') == digest:
+                store = {level: feather.read_feather(os.path.join(cache_dir, FRAME_FILE.format(level=level)))
+                         for level in LEVELS}
+                print(f"↷ Dùng bảng tổng hợp đã lưu ({len(store['day'])} dòng cấp ngày, "
+                      f"{len(store['year'])} dòng cấp năm).")
+                return store
+        except Exception as e:
+            print(f"⚠ Không đọc được bảng tổng hợp ({e}). Sẽ dựng lại.")
+
+    store = build_rollups(df)
+    if feather is not None and meta_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        for level, table in store.items():
+            path = os.path.join(cache_dir, FRAME_FILE.format(level=level))
+            feather.write_feather(table, path + '.tmp', compression='uncompressed')
+            os.replace(path + '.tmp', path)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'rollup_version': ROLLUP_VERSION, 'digest': digest,
+                       'rows': {level: len(table) for level, table in store.items()}}, f, indent=2)
+        os.replace(meta_path + '.tmp', meta_path)
+    print(f"Dựng bảng tổng hợp theo ngày/tuần/tháng/quý/năm... Xong ({len(store['day'])} dòng cấp ngày).")
+    return store
+
+
+def select_ticker(store, ticker):
+    """
+    Phần của một mã trong bảng tổng hợp nhiều mã (bỏ cột ticker).
+    """
+    return {level: table[table['ticker'] == ticker].drop(columns='ticker').reset_index(drop=True)
+            for level, table in store.items()}
+
+
+def query(store, level, measure, stats, since_year=None):
+    """
+    Lấy các cột nhãn kỳ và <measure>_<stat> của một cấp, đổi tên cột thống kê thành tên `stats`
+    (vd: query(store, 'month', 'Volume', ['sum']) -> Year, Month, ..., sum). since_year lọc các năm > since_year.
+    """
+    table = store[level]
+    if since_year is not None:
+        table = table[table['Year'] > since_year]
+    labels = [col for col in table.columns if col in ('ticker', 'period', 'Year', 'Quarter', 'Month', 'Week', 'Day')]
+    columns = {f'{measure}_{stat}': stat for stat in stats}
+    return table[labels + list(columns)].rename(columns=columns).reset_index(drop=True)
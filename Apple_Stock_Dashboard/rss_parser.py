@@ -0,0 +1,158 @@
+import html
+import re
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+
+FEED_CHUNK_SIZE = 64 * 1024
+
+# Các thẻ khối: chèn khoảng trắng khi bỏ thẻ để chữ không bị dính vào nhau
+_BLOCK_TAGS = {'p', 'br', 'div', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr', 'td', 'img'}
+_WHITESPACE = re.compile(r'\s+')
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+
+def strip_html(text):
+    """
+    Bỏ thẻ HTML và giải mã entity, trả về văn bản thuần đã gộp khoảng trắng.
+    """
+    if not text:
+        return ''
+    if '<' not in text and '&' not in text:
+        return _WHITESPACE.sub(' ', text).strip()
+    extractor = _TextExtractor()
+    extractor.feed(text)
+    extractor.close()
+    return _WHITESPACE.sub(' ', ''.join(extractor.parts)).strip()
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+# Thẻ bao mỗi tin: <item> của RSS và <entry> của Atom
+ENTRY_TAGS = ('item', 'entry')
+# Các thẻ (RSS và Atom) cho từng trường của item, theo thứ tự ưu tiên
+_FIELD_TAGS = {
+    'title': ('title',),
+    'description': ('description', 'summary', 'content'),
+    'link': ('link',),
+}
+
+
+def _pick_fields(values):
+    item = {}
+    for field, tags in _FIELD_TAGS.items():
+        for tag in tags:
+            if tag in values:
+                item[field] = values[tag]
+                break
+    return item
+
+
+def _item_from_element(element):
+    values = {}
+    for child in element:
+        name = _local_name(child.tag)
+        if name in values:
+            continue
+        if name == 'link' and child.get('href') is not None:
+            # Atom: <link rel="alternate" href="..."/>; bỏ qua các link khác (self, enclosure...)
+            if child.get('rel', 'alternate') == 'alternate':
+                values[name] = child.get('href').strip()
+        else:
+            # itertext: Atom <content type="xhtml"> chứa thẻ con thay vì văn bản
+            values[name] = ''.join(child.itertext()).strip()
+    return _pick_fields(values)
+
+
+_ITEM_RE = re.compile(rb'<(item|entry)(?=[\s>])[^>]*>(.*?)</\1\s*>', re.S | re.I)
+_FIELD_RES = {
+    tag: re.compile(rb'<' + tag.encode() + rb'(?=[\s/>])[^>]*>(.*?)</' + tag.encode() + rb'\s*>', re.S | re.I)
+    for tags in _FIELD_TAGS.values() for tag in tags
+}
+_LINK_TAG_RE = re.compile(rb'<link(?=[\s/>])([^>]*)>', re.I)
+_ATTR_RE = re.compile(rb'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_CDATA_RE = re.compile(r'<!\[CDATA\[(.*?)\]\]>', re.S)
+
+
+def _decode_field(raw):
+    text = raw.decode('utf-8', errors='replace')
+    cdata = _CDATA_RE.search(text)
+    return cdata.group(1).strip() if cdata else html.unescape(text).strip()
+
+
+def _atom_link(block):
+    for match in _LINK_TAG_RE.finditer(block):
+        attrs = {name.lower(): double or single for name, double, single in _ATTR_RE.findall(match.group(1))}
+        if b'href' in attrs and attrs.get(b'rel', b'alternate') == b'alternate':
+            return html.unescape(attrs[b'href'].decode('utf-8', errors='replace')).strip()
+    return None
+
+
+def _scan_items(content, skip, limit):
+    """
+    Quét từng khối <item>/<entry> bằng regex (dùng khi XML hỏng), bỏ qua `skip` item đầu
+    đã parse được và dừng sau `limit` item.
+    """
+    for index, match in enumerate(_ITEM_RE.finditer(content)):
+        if index < skip:
+            continue
+        if limit is not None and index >= limit:
+            return
+        block = match.group(2)
+        values = {}
+        link = _atom_link(block)
+        if link is not None:
+            values['link'] = link
+        for tag, pattern in _FIELD_RES.items():
+            if tag in values:
+                continue
+            field = pattern.search(block)
+            if field:
+                values[tag] = _decode_field(field.group(1))
+        yield _pick_fields(values)
+
+
+def iter_rss_items(content, limit=None):
+    """
+    Parse feed RSS hoặc Atom theo kiểu tăng dần (XMLPullParser): đọc từng đoạn, trả về mỗi
+    <item>/<entry> ngay khi đóng thẻ, giải phóng phần tử đã đọc và dừng hẳn sau `limit` item.
+    Nếu XML bị hỏng, phần còn lại được quét bằng regex thay vì parse lại toàn bộ tài liệu.
+    Mỗi item là dict có thể chứa 'title', 'description' (Atom: summary hoặc content), 'link'.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+
+    parser = ET.XMLPullParser(events=('end',))
+    count = 0
+    try:
+        for offset in range(0, len(content), FEED_CHUNK_SIZE):
+            parser.feed(content[offset:offset + FEED_CHUNK_SIZE])
+            for _, element in parser.read_events():
+                if _local_name(element.tag) not in ENTRY_TAGS:
+                    continue
+                yield _item_from_element(element)
+                element.clear()
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+        parser.close()
+    except ET.ParseError as e:
+        print(f"⚠ XML không hợp lệ ({e}), quét các item còn lại bằng regex.")
+        yield from _scan_items(content, skip=count, limit=limit)
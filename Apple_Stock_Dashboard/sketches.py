@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+
+# Sketch phân vị theo bucket log (kiểu DDSketch): mọi giá trị dương trong bucket i nằm trong
+# (gamma^(i-1), gamma^i] nên phân vị trả về có sai số tương đối tối đa RELATIVE_ACCURACY.
+# Bộ nhớ chỉ phụ thuộc vào tỉ lệ max/min (vd: giá 0.01 -> 1e6 cần ~920 bucket), không phụ thuộc số dòng,
+# và hai sketch gộp được bằng cách cộng số đếm.
+RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+
+# Histogram bin cố định cho % thay đổi hàng ngày: [-50%, 50%], độ rộng 0.1%.
+# Giá trị ngoài khoảng được dồn vào bin đầu/cuối.
+BINNED_RANGE = (-50.0, 50.0)
+BINNED_BINS = 1000
+
+WHISKER_IQR = 1.5
+QUARTILES = {'q25': 0.25, 'q50': 0.5, 'q75': 0.75}
+
+
+def init_quantile_sketch():
+    return {'offset': 0, 'counts': [], 'non_positive': 0}
+
+
+def update_quantile_sketch(sketch, values):
+    """
+    Cộng các giá trị vào sketch phân vị (giá trị <= 0 được đếm riêng và coi như 0).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    positive = values[values > 0]
+    sketch['non_positive'] += int(len(values) - len(positive))
+    if len(positive) == 0:
+        return sketch
+
+    index = np.ceil(np.log(positive) / _LOG_GAMMA).astype(np.int64)
+    old = np.asarray(sketch['counts'], dtype=np.int64)
+    low, high = int(index.min()), int(index.max())
+    if len(old):
+        low, high = min(low, sketch['offset']), max(high, sketch['offset'] + len(old) - 1)
+    counts = np.bincount(index - low, minlength=high - low + 1)
+    if len(old):
+        counts[sketch['offset'] - low:sketch['offset'] - low + len(old)] += old
+    sketch['offset'] = low
+    sketch['counts'] = counts.tolist()
+    return sketch
+
+
+def _sketch_buckets(sketch):
+    """
+    (giá trị đại diện, số đếm) của mọi bucket khác rỗng, tăng dần; bucket 0 chứa các giá trị <= 0.
+    """
+    counts = np.asarray(sketch['counts'], dtype=np.int64)
+    index = np.arange(sketch['offset'], sketch['offset'] + len(counts))
+    values = 2 * _GAMMA ** index / (_GAMMA + 1)
+    values = np.concatenate([[0.0], values])
+    counts = np.concatenate([[sketch['non_positive']], counts])
+    keep = counts > 0
+    return values[keep], counts[keep]
+
+
+def sketch_quantiles(sketch, quantiles):
+    """
+    Phân vị (theo thứ hạng q * (n - 1)) ước lượng từ sketch; trả về mảng NaN nếu sketch rỗng.
+    """
+    values, counts = _sketch_buckets(sketch)
+    if counts.sum() == 0:
+        return np.full(len(quantiles), np.nan)
+    cumulative = np.cumsum(counts)
+    ranks = np.asarray(quantiles) * (cumulative[-1] - 1)
+    return values[np.searchsorted(cumulative, ranks, side='right')]
+
+
+def box_stats(sketch):
+    """
+    Thống kê boxplot (q25/q50/q75 và râu 1.5 IQR như matplotlib) ước lượng từ sketch phân vị.
+    """
+    q1, median, q3 = sketch_quantiles(sketch, list(QUARTILES.values()))
+    values, _ = _sketch_buckets(sketch)
+    iqr = q3 - q1
+    inside = values[(values >= q1 - WHISKER_IQR * iqr) & (values <= q3 + WHISKER_IQR * iqr)]
+    return {'q25': q1, 'q50': median, 'q75': q3, 'whislo': inside.min(), 'whishi': inside.max()}
+
+
+def init_binned_sketch(value_range=BINNED_RANGE, bins=BINNED_BINS):
+    return {'range': list(value_range), 'counts': [0] * bins, 'min': None, 'max': None}
+
+
+def update_binned_sketch(sketch, values):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return sketch
+
+    low, high = sketch['range']
+    n_bins = len(sketch['counts'])
+    idx = np.clip(((values - low) / (high - low) * n_bins).astype(np.int64), 0, n_bins - 1)
+    counts = np.asarray(sketch['counts'], dtype=np.int64) + np.bincount(idx, minlength=n_bins)
+    sketch['counts'] = counts.tolist()
+
+    chunk_min, chunk_max = float(values.min()), float(values.max())
+    sketch['min'] = chunk_min if sketch['min'] is None else min(sketch['min'], chunk_min)
+    sketch['max'] = chunk_max if sketch['max'] is None else max(sketch['max'], chunk_max)
+    return sketch
+
+
+def binned_sketch(values, value_range=BINNED_RANGE, bins=BINNED_BINS):
+    return update_binned_sketch(init_binned_sketch(value_range, bins), values)
+
+
+def _bin_edges(sketch):
+    low, high = sketch['range']
+    return np.linspace(low, high, len(sketch['counts']) + 1)
+
+
+def binned_quantiles(sketch, quantiles):
+    """
+    Phân vị nội suy tuyến tính trong bin (sai số tối đa bằng độ rộng một bin).
+    """
+    counts = np.asarray(sketch['counts'], dtype=np.float64)
+    if counts.sum() == 0:
+        return np.full(len(quantiles), np.nan)
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)])
+    return np.interp(np.asarray(quantiles) * cumulative[-1], cumulative, _bin_edges(sketch))
+
+
+def binned_density(sketch, cut=2.0):
+    """
+    Mật độ xác suất làm mượt bằng kernel Gauss trên các bin (tương đương KDE với băng thông theo
+    quy tắc Scott như seaborn, nhưng chi phí theo số bin thay vì số dòng).
+    Trả về (tọa độ tâm bin, mật độ) trong khoảng [min - cut*bw, max + cut*bw].
+    """
+    counts = np.asarray(sketch['counts'], dtype=np.float64)
+    n = counts.sum()
+    edges = _bin_edges(sketch)
+    centers = (edges[:-1] + edges[1:]) / 2
+    width = edges[1] - edges[0]
+    if n == 0:
+        return centers[:0], centers[:0]
+
+    mean = (counts * centers).sum() / n
+    std = np.sqrt((counts * (centers - mean) ** 2).sum() / max(n - 1, 1))
+    bandwidth = max(std * n ** (-1 / 5), width)
+    sigma = bandwidth / width
+    radius = min(int(np.ceil(4 * sigma)), len(counts) - 1)
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    density = np.convolve(counts, kernel / kernel.sum(), mode='same') / (n * width)
+
+    keep = (centers >= sketch['min'] - cut * bandwidth) & (centers <= sketch['max'] + cut * bandwidth)
+    return centers[keep], density[keep]
+
+
+def histogram_frame(sketch, target_bins=50):
+    """
+    Gộp các bin mịn trong khoảng [min, max] quan sát được thành khoảng `target_bins` bin
+    để vẽ histogram, kèm cột kde (mật độ làm mượt quy về số đếm mỗi bin, đo tại tâm bin).
+    Trả về DataFrame gồm left, right, count, kde.
+    """
+    counts = np.asarray(sketch['counts'], dtype=np.int64)
+    if sketch['min'] is None:
+        return pd.DataFrame(columns=['left', 'right', 'count', 'kde'])
+
+    low, high = sketch['range']
+    n_bins = len(counts)
+    width = (high - low) / n_bins
+    first = int(np.clip((sketch['min'] - low) // width, 0, n_bins - 1))
+    last = int(np.clip((sketch['max'] - low) // width, 0, n_bins - 1))
+
+    used = counts[first:last + 1]
+    group = max(1, int(np.ceil(len(used) / target_bins)))
+    starts = np.arange(0, len(used), group)
+    grouped = np.add.reduceat(used, starts)
+
+    left = low + (first + starts) * width
+    right = np.minimum(left + group * width, low + (last + 1) * width)
+    centers, density = binned_density(sketch, cut=0)
+    kde = np.interp((left + right) / 2, centers, density) * counts.sum() * (right - left)
+    return pd.DataFrame({'left': left, 'right': right, 'count': grouped, 'kde': kde})
+
+
+def init_yearly_sketches():
+    """
+    Tóm tắt phân phối theo năm: sketch phân vị của giá đóng cửa và histogram bin cố định của % thay đổi.
+    Khóa năm là chuỗi để trạng thái ghi được ra JSON.
+    """
+    return {'close': {}, 'change': {}}
+
+
+def update_yearly_sketches(yearly, chunk):
+    for year, group in chunk.groupby('Year', observed=True):
+        key = str(int(year))
+        update_quantile_sketch(yearly['close'].setdefault(key, init_quantile_sketch()), group['Close'])
+        update_binned_sketch(yearly['change'].setdefault(key, init_binned_sketch()), group['Daily_Change_Percent'])
+    return yearly
+
+
+def yearly_change_sketches(df):
+    """
+    Chỉ histogram % thay đổi theo năm (cho violin): dùng khi boxplot đã có phân vị chính xác từ bảng tổng hợp.
+    """
+    yearly = init_yearly_sketches()
+    for year, group in df.groupby('Year', observed=True):
+        update_binned_sketch(yearly['change'].setdefault(str(int(year)), init_binned_sketch()),
+                             group['Daily_Change_Percent'])
+    return yearly
+
+
+def latest_year(yearly):
+    return max(int(year) for year in yearly['close']) if yearly['close'] else None
+
+
+def yearly_box_frame(yearly, since_year=None):
+    """
+    Thống kê boxplot của giá đóng cửa theo năm (> since_year): Year, q25, q50, q75, whislo, whishi.
+    """
+    rows = [{'Year': int(year), **box_stats(sketch)} for year, sketch in yearly['close'].items()
+            if since_year is None or int(year) > since_year]
+    return pd.DataFrame(rows, columns=['Year', 'q25', 'q50', 'q75', 'whislo', 'whishi']).sort_values('Year',
+                                                                                                    ignore_index=True)
+
+
+def yearly_violin_frame(yearly, since_year=None):
+    """
+    Mật độ của % thay đổi hàng ngày theo năm (> since_year) để vẽ violin: Year, value, density
+    và các tứ phân vị q25/q50/q75 của năm đó (lặp lại trên mỗi dòng).
+    """
+    frames = []
+    for year, sketch in sorted(yearly['change'].items()):
+        if since_year is not None and int(year) <= since_year:
+            continue
+        values, density = binned_density(sketch)
+        q1, median, q3 = binned_quantiles(sketch, list(QUARTILES.values()))
+        frames.append(pd.DataFrame({'Year': int(year), 'value': values, 'density': density,
+                                    'q25': q1, 'q50': median, 'q75': q3}))
+    if not frames:
+        return pd.DataFrame(columns=['Year', 'value', 'density', 'q25', 'q50', 'q75'])
+    return pd.concat(frames, ignore_index=True)
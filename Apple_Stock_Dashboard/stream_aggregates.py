@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import sketches
+
+CORR_COLS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Daily_Change_Percent']
+
+# Histogram bin cố định cho % thay đổi hàng ngày (xem sketches.BINNED_RANGE)
+HIST_RANGE = sketches.BINNED_RANGE
+HIST_BINS = sketches.BINNED_BINS
+
+# Tăng số này khi cấu trúc trạng thái thay đổi để trạng thái đã lưu được tổng hợp lại từ đầu
+AGGREGATES_VERSION = 2
+
+# Trạng thái tổng hợp được lưu trong thư mục cache để cập nhật tiếp khi dữ liệu được nối thêm dòng
+AGGREGATES_FILE = 'aggregates.json'
+
+
+def init_aggregates(corr_cols=None, hist_range=HIST_RANGE, hist_bins=HIST_BINS):
+    """
+    Tạo trạng thái rỗng cho các phép tổng hợp tăng dần. Trạng thái chỉ gồm
+    dict/list/số nên có thể ghi ra JSON và cập nhật tiếp ở lần chạy sau.
+    """
+    corr_cols = list(corr_cols or CORR_COLS)
+    k = len(corr_cols)
+    return {
+        'version': AGGREGATES_VERSION,
+        'rows': 0,
+        'monthly_volume': {},
+        'moments': {
+            'columns': corr_cols,
+            'n': 0,
+            'mean': [0.0] * k,
+            'comoment': [[0.0] * k for _ in range(k)],
+        },
+        'histogram': {
+            'column': 'Daily_Change_Percent',
+            **sketches.init_binned_sketch(hist_range, hist_bins),
+        },
+        # Tóm tắt phân phối theo năm cho boxplot/violin (sketches.init_yearly_sketches)
+        'yearly': sketches.init_yearly_sketches(),
+    }
+
+
+def _update_monthly_volume(state, chunk):
+    sums = chunk.groupby(['Year', 'Month'], observed=True)['Volume'].sum()
+    monthly = state['monthly_volume']
+    for (year, month), volume in sums.items():
+        key = f"{int(year)}-{int(month):02d}"
+        monthly[key] = monthly.get(key, 0) + int(volume)
+
+
+def _update_moments(state, chunk):
+    """
+    Gộp trung bình và ma trận đồng mô-men theo công thức song song của Chan
+    (ổn định số học hơn việc cộng dồn tổng bình phương với Volume ~1e8).
+    """
+    moments = state['moments']
+    values = chunk[moments['columns']].to_numpy(dtype=np.float64)
+    n_b = len(values)
+    if n_b == 0:
+        return
+
+    mean_b = values.mean(axis=0)
+    centered = values - mean_b
+    comoment_b = centered.T @ centered
+
+    n_a = moments['n']
+    mean_a = np.asarray(moments['mean'])
+    comoment_a = np.asarray(moments['comoment'])
+    n = n_a + n_b
+    delta = mean_b - mean_a
+
+    moments['n'] = n
+    moments['mean'] = (mean_a + delta * n_b / n).tolist()
+    moments['comoment'] = (comoment_a + comoment_b + np.outer(delta, delta) * n_a * n_b / n).tolist()
+
+
+def update_aggregates(state, chunk):
+    """
+    Cập nhật mọi phép tổng hợp với một chunk dữ liệu đã xử lý (cần có Year, Month,
+    Volume, Close, Daily_Change_Percent và các cột tương quan).
+    """
+    state['rows'] += len(chunk)
+    _update_monthly_volume(state, chunk)
+    _update_moments(state, chunk)
+    sketches.update_binned_sketch(state['histogram'], chunk[state['histogram']['column']])
+    sketches.update_yearly_sketches(state['yearly'], chunk)
+    return state
+
+
+def frame_digest(df, rows):
+    """
+    Mã băm nội dung `rows` dòng đầu của df (các cột dùng trong phép tổng hợp), để nhận biết
+    phần dữ liệu đã được tổng hợp có còn nguyên vẹn hay không.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    head = df.iloc[:rows]
+    for col in ['Year', 'Month'] + CORR_COLS:
+        hasher.update(np.ascontiguousarray(head[col].to_numpy(dtype=np.float64)).tobytes())
+    return hasher.hexdigest()
+
+
+def load_or_update_aggregates(df, cache_dir=None):
+    """
+    Trả về (trạng thái tổng hợp của df, số dòng vừa được cộng thêm). Nếu trạng thái đã lưu trong cache_dir
+    khớp với phần đầu của df (dữ liệu chỉ được nối thêm dòng), chỉ các dòng mới được cộng vào;
+    ngược lại tổng hợp lại từ đầu. Trạng thái được ghi lại khi có thay đổi.
+    """
+    path = os.path.join(cache_dir, AGGREGATES_FILE) if cache_dir is not None else None
+    state = None
+    if path is not None and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+
+    fresh = init_aggregates()
+    if (state is None or state.get('version') != AGGREGATES_VERSION or state.get('rows', 0) > len(df)
+            or state['moments']['columns'] != fresh['moments']['columns']
+            or state['histogram']['range'] != fresh['histogram']['range']
+            or len(state['histogram']['counts']) != len(fresh['histogram']['counts'])
+            or state.get('digest') != frame_digest(df, state['rows'])):
+        state = fresh
+
+    new_rows = df.iloc[state['rows']:]
+    if len(new_rows):
+        update_aggregates(state, new_rows)
+        state['digest'] = frame_digest(df, len(df))
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(path + '.tmp', path)
+    return state, len(new_rows)
+
+
+def monthly_volume_frame(state):
+    """
+    Tổng khối lượng theo Năm/Tháng, cùng dạng với df.groupby(['Year', 'Month'])['Volume'].sum().reset_index().
+    """
+    rows = []
+    for key, volume in sorted(state['monthly_volume'].items()):
+        year, month = key.split('-')
+        rows.append((int(year), int(month), volume))
+    return pd.DataFrame(rows, columns=['Year', 'Month', 'Volume'])
+
+
+def correlation_frame(state):
+    moments = state['moments']
+    comoment = np.asarray(moments['comoment'])
+    std = np.sqrt(np.diag(comoment))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = comoment / np.outer(std, std)
+    return pd.DataFrame(corr, index=moments['columns'], columns=moments['columns'])
+
+
+def histogram_frame(state, target_bins=50):
+    """
+    Histogram ~`target_bins` bin của % thay đổi hàng ngày (xem sketches.histogram_frame).
+    """
+    return sketches.histogram_frame(state['histogram'], target_bins)
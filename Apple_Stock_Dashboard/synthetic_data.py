@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+CSV_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'ticker', 'name']
+
+# pandas (độ phân giải ns) chỉ biểu diễn được ngày trong khoảng 1677-09-21..2262-04-11, nên mỗi mã có tối đa
+# khoảng 152 nghìn phiên theo lịch 'B'. Chuỗi dài hơn lịch từ DEFAULT_START thì bắt đầu từ EARLIEST_START;
+# dài hơn nữa thì được chia cho nhiều mã (xem effective_tickers), vì pipeline cắt Date về ngày và
+# dữ liệu theo phút sẽ thành hàng trăm dòng trùng ngày mà dữ liệu thật không bao giờ có.
+DEFAULT_START = '1980-12-12'
+EARLIEST_START = '1678-01-03'
+LATEST_DATE = '2262-04-10'
+MAX_DAILY_ROWS = len(pd.bdate_range(EARLIEST_START, LATEST_DATE))
+# Đổi khi cách sinh dữ liệu thay đổi để không dùng lại file cũ trong thư mục benchmark
+SYNTHETIC_VERSION = 2
+
+
+def ticker_symbols(count):
+    """
+    Sinh các mã giả định ổn định: SYN0000, SYN0001, ...
+    """
+    return [f"SYN{i:04d}" for i in range(count)]
+
+
+def effective_tickers(rows, tickers):
+    """
+    Số mã thực sự được sinh: đủ để mỗi mã không vượt quá MAX_DAILY_ROWS phiên (mỗi ngày một dòng).
+    """
+    return max(tickers, -(-rows // MAX_DAILY_ROWS))
+
+
+def generate_ohlcv_frame(rows, ticker='SYN0000', start=None, seed=0):
+    """
+    Sinh dữ liệu OHLCV giả lập theo chuyển động Brown hình học, cùng schema với
+    Apple_historical_data.csv (Date dạng chuỗi có múi giờ, ticker, name). Mỗi dòng là một phiên
+    (ngày làm việc) khác nhau; nhiều hơn MAX_DAILY_ROWS dòng thì báo ValueError.
+    """
+    if rows > MAX_DAILY_ROWS:
+        raise ValueError(f"Một mã có tối đa {MAX_DAILY_ROWS:,} phiên theo ngày, yêu cầu {rows:,} dòng")
+    if start is None:
+        start = DEFAULT_START if pd.Timestamp(DEFAULT_START) + pd.offsets.BDay(rows) <= pd.Timestamp(LATEST_DATE) \
+            else EARLIEST_START
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start=start, periods=rows)
+
+    log_returns = rng.normal(0.0004, 0.02, rows)
+    close = 10.0 * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.005, rows))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, rows)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, rows)))
+    volume = rng.lognormal(mean=18, sigma=0.6, size=rows).astype(np.int64)
+
+    return pd.DataFrame({
+        'Date': dates.strftime('%Y-%m-%d %H:%M:%S-05:00'),
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': volume,
+        'ticker': ticker,
+        'name': f"Synthetic {ticker} ({ticker}) Historical Data",
+    }, columns=CSV_COLUMNS)
+
+
+def write_synthetic_csv(path, rows, tickers=1, seed=0):
+    """
+    Ghi file CSV `rows` dòng chia đều cho `tickers` mã (nhiều mã hơn nếu cần, xem effective_tickers).
+    Mỗi mã được sinh và ghi riêng để bộ nhớ không phụ thuộc vào tổng số dòng. Trả về đường dẫn file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tickers = effective_tickers(rows, tickers)
+    symbols = ticker_symbols(tickers)
+    base, extra = divmod(rows, tickers)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for i, symbol in enumerate(symbols):
+            ticker_rows = base + (1 if i < extra else 0)
+            if ticker_rows == 0:
+                continue
+            frame = generate_ohlcv_frame(ticker_rows, ticker=symbol, seed=seed + i)
+            frame.to_csv(f, header=(i == 0), index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def synthetic_csv_path(out_dir, rows, tickers, seed=0):
+    tickers = effective_tickers(rows, tickers)
+    return os.path.join(out_dir, f"synthetic_v{SYNTHETIC_VERSION}_{rows}rows_{tickers}tickers_seed{seed}.csv")
+
+
+def ensure_synthetic_csv(out_dir, rows, tickers=1, seed=0):
+    """
+    Dùng lại file đã sinh (tham số giống nhau cho ra dữ liệu giống nhau), chỉ sinh khi chưa có.
+    """
+    path = synthetic_csv_path(out_dir, rows, tickers, seed)
+    if not os.path.exists(path):
+        print(f"Đang sinh dữ liệu giả lập: {rows:,} dòng, {tickers} mã...")
+        write_synthetic_csv(path, rows, tickers, seed)
+    return path
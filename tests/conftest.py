@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Các module của dashboard được import trực tiếp (import build_cache, ...) như khi chạy build_website.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Apple_Stock_Dashboard'))
@@ -0,0 +1,72 @@
+import gzip
+import os
+
+import asset_pipeline
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _site(tmp_path):
+    site = tmp_path / 'site'
+    body = b'<html>' + b'chart data ' * 200 + b'</html>'
+    _write(str(site / 'index.html'), body)
+    _write(str(site / 'charts_interactive' / 'price.html'), body)
+    asset_pipeline.fingerprint_outputs(str(site), ['charts_interactive'])
+    _write(str(site / 'tickers' / 'AAPL' / 'index.html'), body)
+    _write(str(site / 'tickers' / 'AAPL' / '.build_cache' / 'manifest.json'), b'{}' * 200)
+    return site, body
+
+
+def test_precompress_reuses_cached_output_for_unchanged_content(tmp_path, monkeypatch):
+    site, body = _site(tmp_path)
+    cache_dir = str(tmp_path / 'compressed')
+    targets = ['index.html', 'charts_interactive', 'tickers']
+    stats = asset_pipeline.precompress_site(str(site), targets, cache_dir)
+    assert stats['files'] == 3
+    assert gzip.decompress((site / 'index.html.gz').read_bytes()) == body
+    # File gốc đã có bản băm và cache build không được nén
+    assert not (site / 'charts_interactive' / 'price.html.gz').exists()
+    assert not (site / 'tickers' / 'AAPL' / '.build_cache' / 'manifest.json.gz').exists()
+
+    calls = []
+    monkeypatch.setattr(asset_pipeline.gzip, 'compress', lambda *args, **kwargs: calls.append(args))
+    for path in site.rglob('*.gz'):
+        path.unlink()
+    asset_pipeline.precompress_site(str(site), targets, cache_dir)
+    assert calls == []
+    assert gzip.decompress((site / 'tickers' / 'AAPL' / 'index.html.gz').read_bytes()) == body
+
+
+def test_precompress_prunes_cache_entries_no_file_uses(tmp_path):
+    site, _ = _site(tmp_path)
+    cache_dir = tmp_path / 'compressed'
+    asset_pipeline.precompress_site(str(site), ['index.html', 'tickers'], str(cache_dir))
+    before = set(os.listdir(cache_dir))
+    _write(str(site / 'index.html'), b'<html>' + b'changed ' * 200 + b'</html>')
+    asset_pipeline.precompress_site(str(site), ['index.html'], str(cache_dir))
+    after = set(os.listdir(cache_dir))
+    assert after and not after & before
+
+
+def test_large_files_use_the_faster_brotli_quality():
+    assert asset_pipeline._brotli_quality(1000) == asset_pipeline.BROTLI_QUALITY
+    assert asset_pipeline._brotli_quality(asset_pipeline.BROTLI_LARGE_BYTES) == asset_pipeline.BROTLI_LARGE_QUALITY
+
+
+def test_export_copies_only_published_files(tmp_path):
+    site, _ = _site(tmp_path)
+    targets = ['index.html', 'charts_interactive', 'tickers', asset_pipeline.MANIFEST_FILE]
+    asset_pipeline.precompress_site(str(site), targets)
+    export = tmp_path / 'export'
+    asset_pipeline.export_site(str(site), targets, str(export))
+
+    exported = sorted(str(path.relative_to(export)) for path in export.rglob('*') if path.is_file())
+    assert any(asset_pipeline.logical_name(os.path.basename(name)) == 'price.html' for name in exported)
+    assert 'charts_interactive/price.html' not in exported
+    assert 'index.html.gz' in exported and 'tickers/AAPL/index.html' in exported
+    assert asset_pipeline.MANIFEST_FILE in exported
+    assert not any('.build_cache' in name for name in exported)
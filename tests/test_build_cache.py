@@ -0,0 +1,69 @@
+import importlib
+import sys
+
+import build_cache
+
+
+def _write_modules(directory, helper_body):
+    (directory / 'cache_helper.py').write_text(f"SCALE = 2\n\n\ndef transform(value):\n    {helper_body}\n")
+    (directory / 'cache_render.py').write_text(
+        "import cache_helper\n\n\n"
+        "def render(data, output_path):\n"
+        "    with open(output_path, 'w') as f:\n"
+        "        f.write(str(cache_helper.transform(data)))\n")
+
+
+def _digest(directory, monkeypatch):
+    monkeypatch.setattr(build_cache, 'SOURCE_DIR', str(directory))
+    build_cache.code_digest.cache_clear()
+    build_cache._file_source.cache_clear()
+    for name in ('cache_helper', 'cache_render'):
+        sys.modules.pop(name, None)
+    module = importlib.import_module('cache_render')
+    return build_cache.code_digest(module.render)
+
+
+def test_code_digest_changes_when_helper_module_changes(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _write_modules(tmp_path, 'return value * SCALE')
+    before = _digest(tmp_path, monkeypatch)
+    assert _digest(tmp_path, monkeypatch) == before
+
+    _write_modules(tmp_path, 'return value * SCALE + 1')
+    assert _digest(tmp_path, monkeypatch) != before
+
+
+def test_chart_key_ignores_code_outside_the_project(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _write_modules(tmp_path, 'return value * SCALE')
+    module_digest = _digest(tmp_path, monkeypatch)
+    # Thư mục nguồn khác: cache_helper không còn là mã của dự án nên không được tính
+    monkeypatch.setattr(build_cache, 'SOURCE_DIR', str(tmp_path / 'elsewhere'))
+    build_cache.code_digest.cache_clear()
+    assert build_cache.code_digest(sys.modules['cache_render'].render) != module_digest
+
+
+def test_chart_is_stale_when_any_recorded_output_is_missing_or_changed(tmp_path):
+    main = tmp_path / 'news_wordcloud.png'
+    variant = tmp_path / 'news_wordcloud@2x.png'
+    main.write_bytes(b'1x')
+    variant.write_bytes(b'2x image')
+    outputs = build_cache.job_outputs(str(main), [str(main), str(variant)])
+    assert outputs == [str(main), str(variant)]
+
+    manifest = {}
+    build_cache.record_chart(manifest, 'news_wordcloud', 'key', outputs)
+    assert build_cache.is_chart_fresh(manifest, 'news_wordcloud', 'key', str(main))
+    assert not build_cache.is_chart_fresh(manifest, 'news_wordcloud', 'other-key', str(main))
+
+    variant.write_bytes(b'truncated')
+    assert not build_cache.is_chart_fresh(manifest, 'news_wordcloud', 'key', str(main))
+    variant.unlink()
+    assert not build_cache.is_chart_fresh(manifest, 'news_wordcloud', 'key', str(main))
+
+
+def test_manifest_entries_without_output_list_are_stale(tmp_path):
+    main = tmp_path / 'chart.png'
+    main.write_bytes(b'png')
+    legacy = {'chart': {'key': 'key', 'output': 'chart.png', 'size': 3}}
+    assert not build_cache.is_chart_fresh(legacy, 'chart', 'key', str(main))
@@ -0,0 +1,192 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import build_website
+import dashboard_server
+import synthetic_data
+
+
+class _Service:
+    def __init__(self):
+        self.calls = []
+
+    def describe(self):
+        return {'charts': ['price']}
+
+    def render_chart(self, name, params):
+        self.calls.append((name, params))
+        if name == 'missing':
+            raise KeyError("Không có biểu đồ 'missing'")
+        if params.get('points') == 'x':
+            raise ValueError('points phải là số nguyên: x')
+        if name == 'broken':
+            raise RuntimeError('hỏng')
+        return {'name': name, 'params': params}
+
+
+def _start(site_dir, service, **kwargs):
+    handler = dashboard_server.make_handler(str(site_dir), service.describe, service.render_chart, **kwargs)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+@pytest.fixture
+def site_dir(tmp_path):
+    (tmp_path / 'index.html').write_text('<html>ok</html>', encoding='utf-8')
+    (tmp_path / 'build_website.py').write_text('secret', encoding='utf-8')
+    (tmp_path / 'charts_static').mkdir()
+    (tmp_path / 'charts_static' / 'a.png').write_bytes(b'png')
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'prices.csv').write_text('Date,Close', encoding='utf-8')
+    (tmp_path / '.build_cache').mkdir()
+    (tmp_path / '.build_cache' / 'manifest.json').write_text('{}', encoding='utf-8')
+    return tmp_path
+
+
+@pytest.fixture
+def server(site_dir):
+    service = _Service()
+    httpd = _start(site_dir, service, cache_size=2)
+    yield f'http://127.0.0.1:{httpd.server_address[1]}', service
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(url, headers=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def test_chart_responses_are_cached_and_revalidated_with_etag(server):
+    base, service = server
+    status, headers, body = _get(base + '/api/charts/price?ticker=AAPL&points=500')
+    assert status == 200 and headers['X-Cache'] == 'MISS'
+    assert json.loads(body) == {'name': 'price', 'params': {'ticker': 'AAPL', 'points': '500'}}
+    assert headers['ETag'] == dashboard_server.response_etag(body)
+
+    # Cùng tham số (khác thứ tự) -> lấy từ cache, không vẽ lại
+    status, again, _ = _get(base + '/api/charts/price?points=500&ticker=AAPL')
+    assert status == 200 and again['X-Cache'] == 'HIT' and again['ETag'] == headers['ETag']
+    assert len(service.calls) == 1
+
+    status, not_modified, body = _get(base + '/api/charts/price?ticker=AAPL&points=500',
+                                      {'If-None-Match': 'W/' + headers['ETag']})
+    assert status == 304 and body == b'' and not_modified['ETag'] == headers['ETag']
+
+
+def test_cache_evicts_least_recently_used_entries(server):
+    base, service = server
+    for name in ('a', 'b', 'a', 'c'):
+        _get(f'{base}/api/charts/{name}')
+    assert [name for name, _ in service.calls] == ['a', 'b', 'c']
+    # b là mục ít dùng nhất nên bị loại khi thêm c; a vẫn còn trong cache
+    assert _get(base + '/api/charts/a')[1]['X-Cache'] == 'HIT'
+    assert _get(base + '/api/charts/b')[1]['X-Cache'] == 'MISS'
+
+
+def test_errors_are_reported_as_json(server):
+    base, _ = server
+    status, _, body = _get(base + '/api/charts/price?points=x')
+    assert status == 400 and 'points' in json.loads(body)['error']
+    status, _, body = _get(base + '/api/charts/missing')
+    assert status == 404 and 'missing' in json.loads(body)['error']
+    assert _get(base + '/api/unknown')[0] == 404
+    status, _, body = _get(base + '/api/charts/broken')
+    assert status == 500 and 'RuntimeError' in json.loads(body)['error']
+
+
+def test_cache_key_uses_normalized_params(site_dir):
+    def normalize(name, params):
+        if 'points' in params and not params['points'].isdigit():
+            raise ValueError('points phải là số nguyên')
+        return {'ticker': params.get('ticker', 'AAPL').upper(), 'points': int(params.get('points', 500))}
+
+    service = _Service()
+    httpd = _start(site_dir, service, cache_size=2, normalize_params=normalize)
+    base = f'http://127.0.0.1:{httpd.server_address[1]}'
+    try:
+        assert _get(base + '/api/charts/price?ticker=aapl&points=500')[1]['X-Cache'] == 'MISS'
+        for query in ('ticker=AAPL&points=0500', 'ticker=Aapl&points=500&_=1', 'points=500', ''):
+            assert _get(base + '/api/charts/price?' + query)[1]['X-Cache'] == 'HIT'
+        assert service.calls == [('price', {'ticker': 'AAPL', 'points': 500})]
+        assert _get(base + '/api/charts/price?points=abc')[0] == 400
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_only_published_files_are_served(server):
+    base, _ = server
+    assert _get(base + '/')[0] == 200
+    assert _get(base + '/index.html')[2] == b'<html>ok</html>'
+    assert _get(base + '/build_website.py')[0] == 404
+    assert _get(base + '/charts_static/a.png')[2] == b'png'
+
+
+@pytest.mark.parametrize('path', [
+    '/charts_static/%2e%2e/build_website.py',
+    '/charts_static/%2E%2E/data/prices.csv',
+    '/charts_static/..%2fbuild_website.py',
+    '/charts_static/%2e%2e%2f.build_cache/manifest.json',
+    '/charts_static/./%2e%2e/data/prices.csv',
+    '/charts_static/%2e/%2e%2e/build_website.py',
+    '/charts_static/../data/prices.csv',
+    '/%2e%2e/%2e%2e/etc/passwd',
+    '/charts_static/%2e/../.build_cache/manifest.json',
+])
+def test_encoded_dot_segments_cannot_escape_public_dirs(server, path):
+    base, _ = server
+    for method in ('GET', 'HEAD'):
+        request = urllib.request.Request(base + path, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        assert status == 404, (method, path)
+    assert json.loads(_get(base + '/api/charts')[2]) == {'charts': ['price']}
+
+
+@pytest.fixture(scope='module')
+def stock_frame(tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / 'prices.csv'
+    df = build_website.process_stock_data(synthetic_data.write_synthetic_csv(str(path), 1500, tickers=2, seed=9))
+    import indicators
+    return indicators.add_indicators(df)
+
+
+def test_chart_service_builds_only_the_requested_chart(stock_frame, monkeypatch):
+    pytest.importorskip('plotly')
+    describe, render_chart, normalize_params = build_website.make_chart_service(stock_frame)
+    tickers = list(describe()['tickers'])
+    monkeypatch.setattr(build_website, 'get_chart_jobs', lambda *args, **kwargs: pytest.fail('full build'))
+
+    payload = render_chart('volume_over_time', {'ticker': tickers[1].lower(), 'points': '100'})
+    assert set(payload['sources']) == {'volume_series'}
+    assert payload['sources']['volume_series']['rows'] <= 100
+    assert payload['figure']['data'][0]['$data']
+    assert payload['params']['ticker'] == tickers[1]
+
+    payload = render_chart('volume_sunburst', {'ticker': tickers[0]})
+    assert set(payload['sources']) == {'volume_by_month'}
+    assert tickers[0] in json.dumps(payload['figure'], ensure_ascii=False)
+
+    assert normalize_params('volume_over_time', {'ticker': tickers[1].lower(), 'points': '0100', '_': '1'}) == \
+        {'ticker': tickers[1], 'points': 100, 'render_mode': 'auto'}
+    assert normalize_params('price_over_time', {'start': '2001-1-2'})['start'] == '2001-01-02T00:00:00'
+
+    with pytest.raises(KeyError):
+        render_chart('nope', {})
+    with pytest.raises(KeyError):
+        render_chart('price_over_time', {'ticker': 'ZZZZ'})
+    with pytest.raises(ValueError):
+        render_chart('price_over_time', {'points': '5'})
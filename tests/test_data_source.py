@@ -0,0 +1,156 @@
+import json
+import os
+
+import pytest
+
+import data_source
+
+FILENAME = 'prices.csv'
+HEADER = b'Date,Close\n'
+
+
+def _rows(start, stop):
+    return b''.join(f'2020-01-{day:02d},{day}.5\n'.encode() for day in range(start, stop))
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    upstream = tmp_path / 'upstream'
+    mirror = tmp_path / 'mirror'
+    upstream.mkdir()
+    (upstream / FILENAME).write_bytes(HEADER + _rows(1, 10))
+    return upstream, mirror
+
+
+def _fetch(upstream, mirror, **kwargs):
+    return data_source.fetch_dataset(str(mirror), str(upstream), FILENAME, **kwargs)
+
+
+def _bump_mtime(path):
+    # Bảo đảm mtime đổi kể cả trên hệ thống file có độ phân giải thời gian thấp
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_first_fetch_copies_upstream_and_writes_manifest(dirs):
+    upstream, mirror = dirs
+    path = _fetch(upstream, mirror)
+    assert open(path, 'rb').read() == (upstream / FILENAME).read_bytes()
+    manifest = data_source.load_manifest(str(mirror))
+    assert manifest['last_sync'] == 'replace'
+    assert manifest['sha256'] == data_source.hash_file(path)[0]
+    assert manifest['size'] == os.path.getsize(path)
+
+
+def test_fresh_mirror_is_used_without_contacting_upstream_until_ttl_expires(dirs):
+    upstream, mirror = dirs
+    _fetch(upstream, mirror)
+    with open(upstream / FILENAME, 'ab') as f:
+        f.write(_rows(10, 12))
+    _bump_mtime(upstream / FILENAME)
+
+    path = _fetch(upstream, mirror, ttl_seconds=3600)
+    assert open(path, 'rb').read() == HEADER + _rows(1, 10)
+
+    path = _fetch(upstream, mirror, ttl_seconds=0)
+    assert open(path, 'rb').read() == HEADER + _rows(1, 12)
+    assert data_source.load_manifest(str(mirror))['last_sync'] == 'append'
+
+
+def test_force_refresh_ignores_ttl(dirs):
+    upstream, mirror = dirs
+    _fetch(upstream, mirror)
+    (upstream / FILENAME).write_bytes(HEADER + _rows(2, 10))
+    _bump_mtime(upstream / FILENAME)
+    path = _fetch(upstream, mirror, ttl_seconds=3600, force=True)
+    assert open(path, 'rb').read() == HEADER + _rows(2, 10)
+    assert data_source.load_manifest(str(mirror))['last_sync'] == 'replace'
+
+
+def test_sync_appends_only_when_upstream_extends_the_mirror(tmp_path):
+    upstream, mirror = tmp_path / 'up.csv', tmp_path / 'mirror.csv'
+    mirror.write_bytes(HEADER + _rows(1, 5))
+    upstream.write_bytes(HEADER + _rows(1, 8))
+    assert data_source.sync_mirror(str(upstream), str(mirror))[0] == 'append'
+    assert mirror.read_bytes() == upstream.read_bytes()
+
+    assert data_source.sync_mirror(str(upstream), str(mirror))[0] == 'unchanged'
+
+    # Dòng cũ bị sửa: phần đầu không còn trùng nên phải chép lại cả file
+    upstream.write_bytes(HEADER + b'2020-01-01,99.0\n' + _rows(2, 9))
+    assert data_source.sync_mirror(str(upstream), str(mirror))[0] == 'replace'
+    assert mirror.read_bytes() == upstream.read_bytes()
+
+
+def test_sync_replaces_when_mirror_does_not_end_with_newline(tmp_path):
+    upstream, mirror = tmp_path / 'up.csv', tmp_path / 'mirror.csv'
+    mirror.write_bytes(HEADER + b'2020-01-01,1')
+    upstream.write_bytes(HEADER + b'2020-01-01,1.5\n')
+    assert data_source.sync_mirror(str(upstream), str(mirror))[0] == 'replace'
+    assert mirror.read_bytes() == upstream.read_bytes()
+
+
+def test_corrupt_manifest_triggers_a_verified_resync(dirs):
+    upstream, mirror = dirs
+    _fetch(upstream, mirror)
+    (mirror / data_source.MANIFEST_FILE).write_text('{not json')
+    assert data_source.load_manifest(str(mirror)) == {}
+
+    path = _fetch(upstream, mirror, ttl_seconds=3600)
+    assert open(path, 'rb').read() == (upstream / FILENAME).read_bytes()
+    manifest = json.loads((mirror / data_source.MANIFEST_FILE).read_text())
+    assert manifest['sha256'] == data_source.hash_file(path)[0]
+
+
+def test_tampered_mirror_fails_verification_and_is_replaced(dirs):
+    upstream, mirror = dirs
+    path = _fetch(upstream, mirror)
+    original = open(path, 'rb').read()
+    with open(path, 'wb') as f:
+        f.write(original.replace(b'1.5', b'9.5'))
+    _bump_mtime(path)
+
+    assert not data_source.verify_mirror(path, data_source.load_manifest(str(mirror)))
+    path = _fetch(upstream, mirror, ttl_seconds=3600)
+    assert open(path, 'rb').read() == original
+
+
+def test_offline_and_upstream_failures_fall_back_to_the_mirror(dirs, tmp_path):
+    upstream, mirror = dirs
+    assert _fetch(upstream, mirror, offline=True) is None
+
+    path = _fetch(upstream, mirror)
+    assert _fetch(upstream, mirror, offline=True) == path
+    assert data_source.fetch_dataset(str(mirror), str(tmp_path / 'missing'), FILENAME, ttl_seconds=0) == path
+
+
+def test_offline_refuses_a_mirror_that_does_not_match_the_manifest(dirs):
+    upstream, mirror = dirs
+    path = _fetch(upstream, mirror)
+    with open(path, 'ab') as f:
+        f.write(b'2020-02-01,1.0\n')
+
+    assert _fetch(upstream, mirror, offline=True) is None
+    # Upstream lỗi: không quay về mirror bị sửa
+    assert data_source.fetch_dataset(str(mirror), str(upstream / 'missing'), FILENAME, ttl_seconds=0) is None
+
+
+def test_seed_is_copied_into_the_mirror_and_never_written(dirs, tmp_path):
+    upstream, mirror = dirs
+    seed = tmp_path / 'seed.csv'
+    seed.write_bytes(HEADER + _rows(1, 5))
+    seed_bytes, seed_mtime = seed.read_bytes(), os.stat(seed).st_mtime_ns
+
+    path = _fetch(upstream, mirror, offline=True, seed_path=str(seed))
+    assert path == str(mirror / FILENAME) and open(path, 'rb').read() == seed_bytes
+
+    # Lần chạy có mạng kế tiếp vẫn kiểm tra upstream và chỉ nối thêm các dòng mới vào mirror
+    path = _fetch(upstream, mirror, seed_path=str(seed))
+    assert open(path, 'rb').read() == (upstream / FILENAME).read_bytes()
+    assert data_source.load_manifest(str(mirror))['last_sync'] == 'append'
+    assert seed.read_bytes() == seed_bytes and os.stat(seed).st_mtime_ns == seed_mtime
+
+    # Mirror bị sửa: tạo lại từ bản đi kèm thay vì dùng bản hỏng
+    with open(path, 'ab') as f:
+        f.write(b'junk')
+    assert open(_fetch(upstream, mirror, offline=True, seed_path=str(seed)), 'rb').read() == seed_bytes
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+import build_website
+import frame_cache
+import synthetic_data
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def history():
+    return synthetic_data.generate_ohlcv_frame(400, ticker='AAPL', seed=3)
+
+
+def _write(path, frame, append=False):
+    frame.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+
+
+def _full_process(path):
+    return build_website.process_stock_data(str(path))
+
+
+def test_appended_tail_matches_full_processing(tmp_path, history):
+    csv, cache_dir = tmp_path / 'prices.csv', tmp_path / 'cache'
+    _write(csv, history.iloc[:300])
+    build_website.process_stock_data(str(csv), str(cache_dir))
+
+    tail = history.iloc[300:].copy()
+    # Một dòng thiếu dữ liệu trong phần nối thêm: bị bỏ như khi đọc cả file, index vẫn theo số dòng CSV
+    tail.iloc[10, tail.columns.get_loc('Close')] = None
+    _write(csv, tail, append=True)
+
+    appended = frame_cache.load_appended_frame(str(csv), str(cache_dir), build_website.clean_stock_frame)
+    assert appended is not None
+    df, new_rows, info = appended
+    assert len(new_rows) == 99
+    assert info['csv_rows'] == 400
+    pd.testing.assert_frame_equal(df, _full_process(csv))
+
+
+def test_repeated_appends_keep_matching_full_processing(tmp_path, history):
+    csv, cache_dir = tmp_path / 'prices.csv', tmp_path / 'cache'
+    _write(csv, history.iloc[:200])
+    build_website.process_stock_data(str(csv), str(cache_dir))
+    for start, stop in ((200, 250), (250, 400)):
+        _write(csv, history.iloc[start:stop], append=True)
+        df = build_website.process_stock_data(str(csv), str(cache_dir))
+        pd.testing.assert_frame_equal(df, _full_process(csv))
+    assert frame_cache.load_cached_frame(str(csv), str(cache_dir)) is not None
+
+
+def test_rewritten_history_is_not_treated_as_an_append(tmp_path, history):
+    csv, cache_dir = tmp_path / 'prices.csv', tmp_path / 'cache'
+    _write(csv, history.iloc[:300])
+    build_website.process_stock_data(str(csv), str(cache_dir))
+
+    changed = history.copy()
+    changed.loc[5, 'Close'] += 1.0
+    _write(csv, changed)
+    assert frame_cache.load_appended_frame(str(csv), str(cache_dir), build_website.clean_stock_frame) is None
+    pd.testing.assert_frame_equal(build_website.process_stock_data(str(csv), str(cache_dir)), _full_process(csv))
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+import synthetic_data
+
+
+def _frame(rows, tickers=('AAPL',), seed=0):
+    frames = [synthetic_data.generate_ohlcv_frame(rows, ticker=ticker, seed=seed + i)
+              for i, ticker in enumerate(tickers)]
+    df = pd.concat(frames, ignore_index=True)
+    df['Date'] = pd.to_datetime(df['Date'].str[:10])
+    # Xen kẽ các mã theo ngày như file dữ liệu nhiều mã thật
+    return df.sort_values(['Date', 'ticker'], kind='stable').reset_index(drop=True)
+
+
+def _assert_matches_full(frame, df):
+    expected, _, computed = indicators.compute_indicators(df)
+    assert computed == len(df)
+    for col in indicators.INDICATOR_COLUMNS:
+        np.testing.assert_allclose(frame[col].to_numpy(), expected[col].to_numpy(),
+                                   rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=col)
+
+
+def _cached_state(df):
+    # Trạng thái và giá trị theo mã như add_indicators đọc lại từ cache
+    frame, states, _ = indicators.compute_indicators(df)
+    values = frame[indicators.INDICATOR_COLUMNS].to_numpy()
+    return states, {ticker: values[positions] for ticker, positions in indicators._ticker_groups(df)}
+
+
+@pytest.mark.parametrize('tickers', [('AAPL',), ('AAPL', 'MSFT', 'NVDA')])
+def test_incremental_state_matches_full_recompute(tickers):
+    df = _frame(600, tickers)
+    head = df[df['Date'] <= df['Date'].iloc[len(df) // 2]]
+    states, cached = _cached_state(head)
+    frame, _, computed = indicators.compute_indicators(df, states, cached)
+    assert computed == len(df) - len(head)
+    _assert_matches_full(frame, df)
+
+
+@pytest.mark.parametrize('split', [1, 13, 199, 250])
+def test_incremental_state_matches_across_warmup_boundaries(split):
+    # Điểm cắt trước/sau khi các cửa sổ (RSI 14, SMA 200...) đủ dữ liệu
+    df = _frame(300)
+    head = df.iloc[:split]
+    states, cached = _cached_state(head)
+    frame, _, computed = indicators.compute_indicators(df, states, cached)
+    assert computed == len(df) - split
+    _assert_matches_full(frame, df)
+
+
+def test_add_indicators_reuses_cache_only_for_appended_rows(tmp_path, capsys):
+    pytest.importorskip('pyarrow')
+    df = _frame(400, ('AAPL', 'MSFT'))
+    indicators.add_indicators(df.iloc[:500], str(tmp_path))
+    capsys.readouterr()
+
+    result = indicators.add_indicators(df, str(tmp_path))
+    assert 'tính mới 300 dòng' in capsys.readouterr().out
+    _assert_matches_full(result, df)
+
+    # Lịch sử cũ bị sửa: cache của mã đó không được dùng, kết quả vẫn đúng
+    changed = df.copy()
+    changed.loc[changed.index[0], 'Close'] *= 1.5
+    result = indicators.add_indicators(changed, str(tmp_path))
+    assert 'tính mới 400 dòng' in capsys.readouterr().out
+    _assert_matches_full(result, changed)
+
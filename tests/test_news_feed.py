@@ -0,0 +1,93 @@
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import news_feed
+
+pytest.importorskip('requests')
+
+FEED = b'<rss><channel><item><title>Hello</title></item></channel></rss>'
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/feed':
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = gzip.compress(FEED)
+            self.send_response(200)
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/stall':
+            # Gửi header rồi im lặng: chỉ read timeout mới cắt được
+            self.send_response(200)
+            self.send_header('Content-Length', '1000')
+            self.end_headers()
+            self.wfile.flush()
+            self.server.release.wait(10)
+        elif self.path == '/trickle':
+            # Mỗi byte đến trước read timeout nên request không bao giờ tự hết hạn
+            self.send_response(200)
+            self.send_header('Content-Length', '1000')
+            self.end_headers()
+            try:
+                while not self.server.release.wait(0.05):
+                    self.wfile.write(b'<')
+                    self.wfile.flush()
+            except OSError:
+                pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _FeedHandler)
+    httpd.release = threading.Event()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.release.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_updates_then_revalidates_with_etag(server, tmp_path):
+    session = news_feed.create_session(1)
+    url = server + '/feed'
+    result = news_feed.fetch_feed(session, url, str(tmp_path), max_age=0)
+    assert result == {'url': url, 'content': FEED, 'status': 'updated'}
+    assert news_feed.fetch_feed(session, url, str(tmp_path), max_age=0)['status'] == 'not-modified'
+    assert news_feed.fetch_feed(session, url, str(tmp_path), max_age=60)['status'] == 'fresh'
+
+
+@pytest.mark.parametrize('path', ['/stall', '/trickle'])
+def test_stalled_feed_is_cut_at_the_total_deadline(server, tmp_path, path):
+    url = server + path
+    news_feed.save_cached_feed(str(tmp_path), url, {'url': url, 'fetched_at': 0}, FEED)
+
+    started = time.monotonic()
+    result = news_feed.fetch_feed(news_feed.create_session(1), url, str(tmp_path), deadline=0.5)
+    assert time.monotonic() - started < 2
+    assert result == {'url': url, 'content': FEED, 'status': 'stale'}
+
+
+def test_fetch_feeds_returns_by_the_deadline_in_order(server, tmp_path):
+    urls = [server + '/trickle', server + '/feed', server + '/stall']
+    started = time.monotonic()
+    results = news_feed.fetch_feeds(urls, str(tmp_path), max_age=0, deadline=0.5)
+    assert time.monotonic() - started < 2
+    assert [result['url'] for result in results] == urls
+    assert [result['status'] for result in results] == ['error', 'updated', 'error']
+    assert results[1]['content'] == FEED
+    # Các luồng tải là daemon: request còn treo không giữ tiến trình lại khi thoát
+    assert all(thread.daemon for thread in threading.enumerate() if thread.name.startswith('news-feed'))
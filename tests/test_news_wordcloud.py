@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+import asset_pipeline
+import news_wordcloud
+
+pytest.importorskip('wordcloud')
+
+NEWS = "Apple unveils new iPhone chips\n\nApple shares rise after iPhone launch\n\nChip makers rally"
+
+
+def test_word_frequencies_sum_the_per_item_index(tmp_path):
+    frequencies = news_wordcloud.word_frequencies(NEWS, str(tmp_path))
+    assert frequencies['Apple'] == 2 and frequencies['iPhone'] == 2
+    # Số lần giảm dần, cùng số lần thì theo thứ tự chữ
+    assert list(frequencies)[:2] == ['Apple', 'iPhone']
+
+    with open(tmp_path / news_wordcloud.INDEX_FILE, encoding='utf-8') as f:
+        index = json.load(f)
+    items = news_wordcloud.split_items(NEWS)
+    assert index['version'] == news_wordcloud.INDEX_VERSION
+    assert set(index['items']) == {news_wordcloud.item_key(text) for text in items}
+    assert index['items'][news_wordcloud.item_key(items[2])] == news_wordcloud.tokenize(items[2])
+
+    assert news_wordcloud.word_frequencies(NEWS, max_words=1) == {'Apple': 2}
+
+
+def test_only_new_items_are_tokenized_and_old_ones_pruned(tmp_path, monkeypatch):
+    news_wordcloud.word_frequencies(NEWS, str(tmp_path))
+    tokenized = []
+    tokenize = news_wordcloud.tokenize
+    monkeypatch.setattr(news_wordcloud, 'tokenize', lambda text: tokenized.append(text) or tokenize(text))
+
+    latest = "Apple earnings beat estimates\n\n" + NEWS.split('\n\n', 1)[1]
+    frequencies = news_wordcloud.word_frequencies(latest, str(tmp_path))
+    assert tokenized == ["Apple earnings beat estimates"]
+    assert frequencies['iPhone'] == 1 and 'unveils' not in frequencies
+
+    with open(tmp_path / news_wordcloud.INDEX_FILE, encoding='utf-8') as f:
+        assert len(json.load(f)['items']) == 3
+
+
+def test_render_variants_writes_each_scale_and_format_with_title(tmp_path):
+    from PIL import Image
+
+    output = str(tmp_path / 'news_wordcloud.png')
+    # Bản cũ của lần vẽ trước (tỉ lệ 3x, kể cả bản đã băm tên) phải bị xóa
+    for stale in ('news_wordcloud@3x.png', asset_pipeline.hashed_name('news_wordcloud@3x.webp', b'old')):
+        (tmp_path / stale).write_bytes(b'old')
+    (tmp_path / 'other.png').write_bytes(b'keep')
+
+    written = news_wordcloud.render_variants({'apple': 10, 'iphone': 7, 'chip': 3}, output,
+                                             scales=(1, 2), formats=('png', 'webp'))
+    assert sorted(os.path.basename(path) for path in written) == [
+        'news_wordcloud.png', 'news_wordcloud.webp', 'news_wordcloud@2x.png', 'news_wordcloud@2x.webp']
+    assert sorted(os.listdir(tmp_path)) == sorted(['other.png'] + [os.path.basename(path) for path in written])
+
+    title_band = news_wordcloud.TITLE_BAND
+    assert Image.open(output).size == (news_wordcloud.WIDTH, news_wordcloud.HEIGHT + title_band)
+    assert Image.open(tmp_path / 'news_wordcloud@2x.webp').size == \
+        (2 * news_wordcloud.WIDTH, 2 * (news_wordcloud.HEIGHT + title_band))
+
+    untitled = news_wordcloud.render_variants({'apple': 10}, output, scales=(2,), formats=('webp',), title='')
+    assert sorted(os.path.basename(path) for path in untitled) == ['news_wordcloud.png', 'news_wordcloud@2x.webp']
+    assert Image.open(output).size == (news_wordcloud.WIDTH, news_wordcloud.HEIGHT)
+
+
+def test_manifest_variants_map_logical_names_to_hashed_files():
+    manifest = {
+        'charts_static/news_wordcloud.png': 'charts_static/news_wordcloud.1111111111.png',
+        'charts_static/news_wordcloud@2x.png': 'charts_static/news_wordcloud@2x.2222222222.png',
+        'charts_static/news_wordcloud@2x.webp': 'charts_static/news_wordcloud@2x.3333333333.webp',
+        'charts_static/news_wordcloud@big.png': 'charts_static/news_wordcloud@big.4444444444.png',
+        'charts_static/price.png': 'charts_static/price.5555555555.png',
+    }
+    assert news_wordcloud.manifest_variants(manifest, 'charts_static/news_wordcloud.png', prefix='../') == [
+        ('png', 1, '../charts_static/news_wordcloud.1111111111.png'),
+        ('png', 2, '../charts_static/news_wordcloud@2x.2222222222.png'),
+        ('webp', 2, '../charts_static/news_wordcloud@2x.3333333333.webp'),
+    ]
+    assert news_wordcloud.manifest_variants({}, 'charts_static/news_wordcloud.png') == \
+        [('png', 1, 'charts_static/news_wordcloud.png')]
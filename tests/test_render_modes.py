@@ -0,0 +1,46 @@
+import pytest
+
+import build_website
+import downsampling
+import synthetic_data
+
+
+@pytest.fixture(scope='module')
+def df(tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / 'prices.csv'
+    return build_website.process_stock_data(synthetic_data.write_synthetic_csv(str(path), 3000, seed=5))
+
+
+def _jobs(df, tmp_path, **kwargs):
+    jobs = build_website.get_chart_jobs(df, None, str(tmp_path / 'static'), str(tmp_path / 'interactive'), **kwargs)
+    return {job['name']: job for job in jobs}
+
+
+def test_resolve_render_mode_thresholds():
+    assert downsampling.resolve_render_mode(downsampling.WEBGL_THRESHOLD - 1) == 'svg'
+    assert downsampling.resolve_render_mode(downsampling.WEBGL_THRESHOLD) == 'webgl'
+    assert downsampling.resolve_render_mode(downsampling.DENSITY_THRESHOLD) == 'density'
+    assert downsampling.resolve_render_mode(10, 'density') == 'density'
+
+
+def test_auto_mode_uses_rows_before_downsampling(df, tmp_path, monkeypatch):
+    monkeypatch.setattr(downsampling, 'WEBGL_THRESHOLD', 2500)
+    jobs = _jobs(df, tmp_path, max_points=500, scatter_points=500)
+    # Chỉ còn 500 điểm được vẽ nhưng số dòng gốc vượt ngưỡng WebGL
+    assert len(jobs['price_over_time']['data']) <= 500
+    assert {jobs[name]['params']['render_mode'] for name in
+            ('price_over_time', 'volume_over_time', 'scatter_regression', 'price_indicators')} == {'webgl'}
+
+
+def test_auto_density_counts_every_row(df, tmp_path, monkeypatch):
+    monkeypatch.setattr(downsampling, 'DENSITY_THRESHOLD', 2500)
+    jobs = _jobs(df, tmp_path, max_points=500, scatter_points=500)
+    for name in ('price_over_time', 'volume_over_time', 'scatter_regression'):
+        assert jobs[name]['params']['render_mode'] == 'density'
+        assert len(jobs[name]['data']) == len(df)
+    assert jobs['price_indicators']['params']['render_mode'] == 'webgl'
+
+
+def test_small_frames_stay_svg(df, tmp_path):
+    jobs = _jobs(df, tmp_path)
+    assert jobs['price_over_time']['params']['render_mode'] == 'svg'
@@ -0,0 +1,13 @@
+import pandas as pd
+
+import rollup_store
+
+
+def test_week_level_uses_iso_year_and_week():
+    dates = pd.to_datetime(['2024-12-30', '2024-12-31', '2025-01-03', '2021-01-01', '2021-01-04'])
+    df = pd.DataFrame({'Date': dates, 'Close': 1.0, 'Volume': 10, 'Daily_Change_Percent': 0.0})
+    week = rollup_store.build_rollups(df, levels=['week'])['week']
+    labels = list(zip(week['period'].dt.strftime('%Y-%m-%d'), week['Year'], week['Week']))
+    # 2021-01-01 thuộc tuần 53 của năm ISO 2020; tuần bắt đầu 2024-12-30 là tuần 1 của 2025
+    assert labels == [('2020-12-28', 2020, 53), ('2021-01-04', 2021, 1), ('2024-12-30', 2025, 1)]
+    assert week['Close_count'].tolist() == [1, 1, 3]
@@ -0,0 +1,90 @@
+import rss_parser
+
+RSS_FEED = b'''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel>
+  <title>Developer News</title>
+  <atom:link href="https://example.com/news.rss" rel="self"/>
+  <item>
+    <title>Xcode &amp; Swift</title>
+    <link>https://example.com/1</link>
+    <description><![CDATA[<p>New <b>tools</b></p>]]></description>
+    <content:encoded><![CDATA[<p>Full text</p>]]></content:encoded>
+  </item>
+  <item>
+    <title>Second</title>
+    <link>https://example.com/2</link>
+    <description>Plain text</description>
+  </item>
+</channel>
+</rss>'''
+
+ATOM_FEED = '''<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Newsroom</title>
+  <link href="https://example.com/newsroom" rel="alternate"/>
+  <entry>
+    <title>Apple unveils a product</title>
+    <link rel="enclosure" href="https://example.com/image.jpg"/>
+    <link href="https://example.com/newsroom/1"/>
+    <content type="html">&lt;p&gt;Long content&lt;/p&gt;</content>
+    <summary>Short summary</summary>
+  </entry>
+  <entry>
+    <title type="text">Xhtml entry</title>
+    <link rel="alternate" type="text/html" href="https://example.com/newsroom/2"/>
+    <content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>Hello <b>world</b></p></div></content>
+  </entry>
+</feed>'''
+
+
+def test_rss_items():
+    items = list(rss_parser.iter_rss_items(RSS_FEED))
+    assert items == [
+        {'title': 'Xcode & Swift', 'description': '<p>New <b>tools</b></p>', 'link': 'https://example.com/1'},
+        {'title': 'Second', 'description': 'Plain text', 'link': 'https://example.com/2'},
+    ]
+    assert rss_parser.strip_html(items[0]['description']) == 'New tools'
+
+
+def test_atom_entries_use_alternate_link_and_prefer_summary():
+    items = list(rss_parser.iter_rss_items(ATOM_FEED))
+    assert items == [
+        {'title': 'Apple unveils a product', 'description': 'Short summary',
+         'link': 'https://example.com/newsroom/1'},
+        {'title': 'Xhtml entry', 'description': 'Hello world', 'link': 'https://example.com/newsroom/2'},
+    ]
+
+
+def test_limit_stops_after_n_items():
+    assert len(list(rss_parser.iter_rss_items(RSS_FEED, limit=1))) == 1
+    assert len(list(rss_parser.iter_rss_items(ATOM_FEED, limit=1))) == 1
+
+
+def test_malformed_rss_falls_back_to_regex_for_remaining_items(capsys):
+    broken = RSS_FEED.replace(b'<title>Second</title>', b'<title>Second & broken</title>')
+    items = list(rss_parser.iter_rss_items(broken))
+    assert 'XML không hợp lệ' in capsys.readouterr().out
+    assert [item['link'] for item in items] == ['https://example.com/1', 'https://example.com/2']
+    assert items[1]['title'] == 'Second & broken'
+    assert items[1]['description'] == 'Plain text'
+
+
+def test_malformed_atom_falls_back_to_regex():
+    broken = ATOM_FEED.replace('<title>Newsroom</title>', '<title>News & room</title>')
+    items = list(rss_parser.iter_rss_items(broken))
+    assert [item['link'] for item in items] == ['https://example.com/newsroom/1', 'https://example.com/newsroom/2']
+    assert items[0]['title'] == 'Apple unveils a product'
+    assert items[0]['description'] == 'Short summary'
+    assert rss_parser.strip_html(items[1]['description']) == 'Hello world'
+
+
+def test_truncated_feed_keeps_complete_items():
+    truncated = RSS_FEED[:RSS_FEED.index(b'<title>Second')]
+    items = list(rss_parser.iter_rss_items(truncated))
+    assert [item['title'] for item in items] == ['Xcode & Swift']
+
+
+def test_strip_html_decodes_entities_and_separates_blocks():
+    assert rss_parser.strip_html('<p>One</p><p>Two&nbsp;&amp; three</p>') == 'One Two & three'
+    assert rss_parser.strip_html(None) == ''
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import build_website
+import sketches
+import synthetic_data
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return synthetic_data.write_synthetic_csv(str(tmp_path / 'prices.csv'), 3000, seed=7)
+
+
+def _job_data(jobs, name):
+    return next(job['data'] for job in jobs if job['name'] == name)
+
+
+def test_yearly_change_sketches_match_the_full_yearly_sketches(csv_path):
+    df = build_website.process_stock_data(csv_path)
+    full = sketches.update_yearly_sketches(sketches.init_yearly_sketches(), df)
+    change_only = sketches.yearly_change_sketches(df)
+    assert change_only['close'] == {}
+    assert change_only['change'] == full['change']
+
+
+def test_frameless_mode_draws_boxplot_and_violin_from_sketches(csv_path, tmp_path):
+    df = build_website.process_stock_data(csv_path)
+    frame_jobs = build_website.get_chart_jobs(df, None, str(tmp_path / 's1'), str(tmp_path / 'i1'))
+    _, aggregates = build_website.process_stock_data_chunked(csv_path, chunksize=1000, keep_frame=False)
+    sketch_jobs = build_website.get_chart_jobs(None, None, str(tmp_path / 's2'), str(tmp_path / 'i2'),
+                                               aggregates=aggregates)
+
+    exact, approx = _job_data(frame_jobs, 'price_boxplot_by_year'), _job_data(sketch_jobs, 'price_boxplot_by_year')
+    assert approx['Year'].tolist() == exact['Year'].tolist()
+    # Sketch phân vị có sai số tương đối khoảng 1%
+    for col in ('q25', 'q50', 'q75'):
+        np.testing.assert_allclose(approx[col], exact[col], rtol=0.02)
+
+    violin_frame = _job_data(frame_jobs, 'daily_change_violin_by_year')
+    violin_sketch = _job_data(sketch_jobs, 'daily_change_violin_by_year')
+    assert sorted(violin_frame['Year'].unique()) == sorted(violin_sketch['Year'].unique())
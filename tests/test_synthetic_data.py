@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+import build_website
+import synthetic_data
+
+
+def _process(tmp_path, rows, tickers=1):
+    return build_website.process_stock_data(synthetic_data.write_synthetic_csv(str(tmp_path / 'prices.csv'), rows, tickers))
+
+
+def test_long_single_ticker_series_has_one_row_per_trading_day(tmp_path):
+    # Dài hơn lịch từ DEFAULT_START (trước đây chuyển sang dữ liệu theo phút): bắt đầu sớm hơn, vẫn mỗi ngày một dòng
+    rows = 75_000
+    df = _process(tmp_path, rows)
+    assert df['Date'].iloc[0] == pd.Timestamp(synthetic_data.EARLIEST_START)
+    assert len(df) == rows and df['Date'].is_unique and df['Date'].is_monotonic_increasing
+    assert (df['Date'].dt.dayofweek < 5).all()
+
+
+def test_rows_beyond_the_calendar_are_split_across_tickers(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic_data, 'MAX_DAILY_ROWS', 1000)
+    assert synthetic_data.effective_tickers(2500, 1) == 3
+    assert synthetic_data.effective_tickers(2500, 5) == 5
+
+    df = _process(tmp_path, 2500)
+    assert len(df) == 2500
+    counts = df.groupby('ticker', observed=True)['Date'].agg(['size', 'nunique'])
+    assert len(counts) == 3 and (counts['size'] == counts['nunique']).all() and counts['size'].max() <= 1000
+
+    with pytest.raises(ValueError):
+        synthetic_data.generate_ohlcv_frame(1001)
+
+
+def test_short_series_keep_the_default_start(tmp_path):
+    frame = synthetic_data.generate_ohlcv_frame(10)
+    assert frame['Date'].iloc[0].startswith(synthetic_data.DEFAULT_START)